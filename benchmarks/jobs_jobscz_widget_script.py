@@ -0,0 +1,111 @@
+import json
+import re
+import timeit
+from pathlib import Path
+from typing import Any
+
+from jg.plucker.jobs_jobscz.spider import scan_widget_script
+
+
+# Compares the widget script scanner with the regular expressions it replaced
+
+FIXTURES_DIR = Path(__file__).parent.parent / "tests" / "jobs_jobscz"
+
+REPEAT = 5
+
+NUMBER = 20
+
+
+WIDGET_DATA_SCRIPT_JSON_RE = re.compile(
+    r"""
+        =JSON\.parse\('
+        (?P<data>
+            {"[^"]+":         # JSON object key
+            (                 # one or more characters that are not the start of "function" or "JSON.parse"
+                (?!function)
+                (?!JSON\.parse)
+                .
+            )+
+        )
+        '\)
+        (}|,\w+={)
+    """,
+    re.VERBOSE,
+)
+
+WIDGET_DATA_SCRIPT_MESS_RE = re.compile(
+    r"""
+        \([^"]+
+        "
+            (?P<key>[^"]+)
+        "
+        \s*,\s*
+        "
+            (?P<value>[^"]+)
+        "
+        \)
+    """,
+    re.VERBOSE,
+)
+
+REACT_CHUNK_RE = re.compile(r'"(?P<chunk_name>react\.[^\.]+\.react.min.js)"')
+
+
+def parse_widget_script_json(text: str) -> dict[str, Any] | None:
+    for match in re.finditer(WIDGET_DATA_SCRIPT_JSON_RE, text):
+        data_text = match.group("data")
+        data_text = re.sub(r"\'", r"\\'", data_text)
+        data_text = re.sub(r'\\\\"', r"\"", data_text)
+        data = json.loads(data_text)
+        if "widgets" in data:
+            return data
+    return None
+
+
+def parse_widget_script_mess(text: str) -> dict[str, str] | None:
+    matches = re.finditer(WIDGET_DATA_SCRIPT_MESS_RE, text)
+    data = {match.group("key"): match.group("value") for match in matches}
+    try:
+        return {"widgetId": data["widgetId"], "widgetApiKey": data["widgetApiKey"]}
+    except KeyError:
+        return None
+
+
+def parse_react_chunk_names(text: str) -> list[str]:
+    return [match.group("chunk_name") for match in REACT_CHUNK_RE.finditer(text)]
+
+
+def legacy_scan_widget_script(text: str) -> tuple[Any, Any, Any]:
+    return (
+        parse_widget_script_json(text),
+        parse_widget_script_mess(text),
+        parse_react_chunk_names(text),
+    )
+
+
+def measure(fn, text: str) -> float:
+    timings = timeit.repeat(lambda: fn(text), repeat=REPEAT, number=NUMBER)
+    return min(timings) / NUMBER
+
+
+def main() -> None:
+    total_legacy = total = 0.0
+    for path in sorted(FIXTURES_DIR.glob("job_widget_script*.js")):
+        text = path.read_text()
+        legacy_time = measure(legacy_scan_widget_script, text)
+        time = measure(scan_widget_script, text)
+        total_legacy += legacy_time
+        total += time
+        print(
+            f"{path.name:36} {len(text) / 1024:7.0f}KB "
+            f"{legacy_time * 1000:8.2f}ms → {time * 1000:6.2f}ms "
+            f"({legacy_time / time:5.1f}×)"
+        )
+    print(
+        f"{'Total':44} {total_legacy * 1000:8.2f}ms → {total * 1000:6.2f}ms "
+        f"({total_legacy / total:5.1f}×)"
+    )
+
+
+if __name__ == "__main__":
+    main()
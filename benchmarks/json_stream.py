@@ -0,0 +1,57 @@
+import json
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+from jg.plucker.json_stream import iter_json_array
+
+
+# Compares peak memory and time of loading the whole feed with streaming its items
+
+FIXTURE_PATH = Path(__file__).parent.parent / "tests" / "jobs_startupjobs" / "feed.json"
+
+SCALE = 200
+
+NUMBER = 5
+
+
+def load(body: bytes) -> int:
+    return sum(len(offer["description"]) for offer in json.loads(body)["offers"])
+
+
+def stream(body: bytes) -> int:
+    return sum(len(offer["description"]) for offer in iter_json_array(body, "offers"))
+
+
+def measure(fn: Callable[[bytes], Any], body: bytes) -> int:
+    tracemalloc.start()
+    fn(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def measure_time(fn: Callable[[bytes], Any], body: bytes) -> float:
+    return min(timeit.repeat(lambda: fn(body), repeat=3, number=NUMBER)) / NUMBER
+
+
+def main() -> None:
+    offers = json.loads(FIXTURE_PATH.read_bytes())["offers"]
+    body = json.dumps({"offers": offers * SCALE}, ensure_ascii=False).encode()
+    assert load(body) == stream(body)
+
+    load_peak = measure(load, body)
+    stream_peak = measure(stream, body)
+    print(f"Feed with {len(offers) * SCALE} offers, {len(body) / 1024:.0f}KB")
+    print(
+        f"Peak memory {load_peak / 1024:.0f}KB → {stream_peak / 1024:.0f}KB "
+        f"({load_peak / stream_peak:.1f}×)"
+    )
+    load_time = measure_time(load, body)
+    stream_time = measure_time(stream, body)
+    print(f"Time {load_time * 1000:.1f}ms → {stream_time * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import timeit
+from datetime import date
+from pathlib import Path
+
+from ics import Calendar
+
+from jg.plucker.ical import parse_events
+
+
+# Compares parsing whole calendars with pre-filtering their events by start
+
+TESTS_DIR = Path(__file__).parent.parent / "tests"
+
+FIXTURE_PATHS = [
+    TESTS_DIR / "meetups_pyvo" / "pyvo.ics",
+    TESTS_DIR / "meetups_nepyvo" / "nepyvo.ics",
+]
+
+TODAY = date(2026, 4, 15)
+
+REPEAT = 5
+
+NUMBER = 3
+
+
+def parse_calendar(text: str) -> list:
+    return [
+        event
+        for event in Calendar(text).events
+        if event.begin and event.begin.date() >= TODAY
+    ]
+
+
+def parse_upcoming(text: str) -> list:
+    return [
+        event
+        for event in parse_events(text, since=TODAY)
+        if event.begin and event.begin.date() >= TODAY
+    ]
+
+
+def measure(fn, text: str) -> float:
+    timings = timeit.repeat(lambda: fn(text), repeat=REPEAT, number=NUMBER)
+    return min(timings) / NUMBER
+
+
+def main() -> None:
+    total_legacy = total = 0.0
+    for path in FIXTURE_PATHS:
+        text = path.read_text()
+        assert len(parse_calendar(text)) == len(parse_upcoming(text))
+        legacy_time = measure(parse_calendar, text)
+        time = measure(parse_upcoming, text)
+        total_legacy += legacy_time
+        total += time
+        print(
+            f"{path.name:12} {len(text) / 1024:7.0f}KB "
+            f"{legacy_time * 1000:8.2f}ms → {time * 1000:6.2f}ms "
+            f"({legacy_time / time:5.1f}×)"
+        )
+    print(
+        f"{'Total':20} {total_legacy * 1000:8.2f}ms → {total * 1000:6.2f}ms "
+        f"({total_legacy / total:5.1f}×)"
+    )
+
+
+if __name__ == "__main__":
+    main()
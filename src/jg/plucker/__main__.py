@@ -0,0 +1,4 @@
+from jg.plucker.cli import main
+
+
+main()
@@ -0,0 +1,226 @@
+import gzip
+import hashlib
+import logging
+import pickle
+from pathlib import Path
+from time import time
+from typing import Any, cast
+
+from diskcache import Cache
+from scrapy import Request, Spider
+from scrapy.crawler import Crawler
+from scrapy.extensions.httpcache import DummyPolicy, rfc1123_to_epoch
+from scrapy.http import Response
+from scrapy.http.headers import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.settings import BaseSettings
+from scrapy.utils.project import data_path
+from scrapy.utils.request import RequestFingerprinterProtocol
+
+
+logger = logging.getLogger("jg.plucker.cache")
+
+
+# All spiders share a single cache, so that bodies can be deduplicated across
+# them, e.g. the same JavaScript bundles downloaded for many jobs. Responses
+# are stored as metadata pointing to compressed bodies addressed by their hash.
+# The cache is bounded by size and evicts the least recently used entries.
+class DiskCacheStorage:
+    def __init__(self, settings: BaseSettings):
+        self.cachedir = Path(data_path(settings["HTTPCACHE_DIR"], createdir=True))
+        self.expiration_secs = settings.getint("HTTPCACHE_EXPIRATION_SECS")
+        self.size_limit = settings.getint("HTTPCACHE_SIZE_LIMIT")
+        self.cache: Cache | None = None
+        self._fingerprinter: RequestFingerprinterProtocol | None = None
+
+    def open_spider(self, spider: Spider) -> None:
+        path = self.cachedir / "diskcache"
+        logger.debug(f"Using disk cache storage in {path}")
+        assert spider.crawler.request_fingerprinter
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        self.cache = Cache(
+            str(path),
+            size_limit=self.size_limit,
+            eviction_policy="least-recently-used",
+            disk_min_file_size=self.size_limit,  # keep everything inside SQLite
+        )
+
+    def close_spider(self, spider: Spider) -> None:
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+    def retrieve_response(self, spider: Spider, request: Request) -> Response | None:
+        assert self.cache is not None, "Cache not opened"
+        metadata = cast(
+            dict[str, Any] | None, self.cache.get(self.get_key(spider, request))
+        )
+        if metadata is None:
+            return None  # not cached
+        if 0 < self.expiration_secs < time() - metadata["timestamp"]:
+            return None  # expired
+        compressed_body = cast(bytes | None, self.cache.get(metadata["body_key"]))
+        if compressed_body is None:
+            return None  # evicted
+        body = gzip.decompress(compressed_body)
+        url = metadata["response_url"]
+        headers = Headers(metadata["headers"])
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=metadata["status"], body=body)
+
+    def store_response(
+        self, spider: Spider, request: Request, response: Response
+    ) -> None:
+        assert self.cache is not None, "Cache not opened"
+        expire = self.expiration_secs or None
+        body_key = f"body:{hashlib.sha256(response.body).hexdigest()}"
+        if self.cache.touch(body_key, expire=expire):
+            if spider.crawler.stats:
+                spider.crawler.stats.inc_value("httpcache/deduplicated")
+        else:
+            self.cache.set(
+                body_key, gzip.compress(response.body, mtime=0), expire=expire
+            )
+        metadata = {
+            "url": request.url,
+            "method": request.method,
+            "status": response.status,
+            "response_url": response.url,
+            "headers": dict(response.headers),
+            "body_key": body_key,
+            "timestamp": time(),
+        }
+        self.cache.set(self.get_key(spider, request), metadata, expire=expire)
+
+    def get_key(self, spider: Spider, request: Request) -> str:
+        assert self._fingerprinter is not None, "Cache not opened"
+        return f"{spider.name}:{self._fingerprinter.fingerprint(request).hex()}"
+
+
+# Cached responses are fresh for HTTPCACHE_FRESHNESS_SECS. After that they're
+# revalidated using their ETag or Last-Modified and if the server responds with
+# 304 Not Modified, the cached response is used. Meant for spiders downloading
+# sources which rarely change, e.g. calendars. They should set a long
+# HTTPCACHE_EXPIRATION_SECS, so that the storage keeps the responses around.
+class ConditionalPolicy(DummyPolicy):
+    def __init__(self, settings: BaseSettings):
+        super().__init__(settings)
+        self.freshness_secs = settings.getint("HTTPCACHE_FRESHNESS_SECS")
+
+    def is_cached_response_fresh(
+        self, cachedresponse: Response, request: Request
+    ) -> bool:
+        if (date := get_date(cachedresponse)) and time() - date < self.freshness_secs:
+            return True
+        if etag := cachedresponse.headers.get("ETag"):
+            request.headers["If-None-Match"] = etag
+        if last_modified := cachedresponse.headers.get("Last-Modified"):
+            request.headers["If-Modified-Since"] = last_modified
+        return False
+
+    def is_cached_response_valid(
+        self, cachedresponse: Response, response: Response, request: Request
+    ) -> bool:
+        return response.status == 304
+
+
+def get_date(response: Response) -> float | None:
+    if date := response.headers.get("Date"):
+        if timestamp := rfc1123_to_epoch(date):
+            return timestamp
+    return None
+
+
+# Some feeds are downloaded by several spiders scheduled close to each other,
+# e.g. StartupJobs by both jobs-startupjobs and job-checks. Whichever spider
+# comes first stores a compact parsed form of the feed and the others reuse
+# it for a while instead of downloading and parsing the whole feed again.
+# Locally the cache lives on the disk. Actors don't share disks, not even
+# runs of the same actor, so at Apify it lives in a named key-value store.
+class FeedCache:
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        expiration_secs: int | None = None,
+        kvs_name: str | None = None,
+    ):
+        self.expiration_secs = expiration_secs or None
+        if kvs_name:
+            self.cache: Cache | KeyValueStoreCache = KeyValueStoreCache(kvs_name)
+        elif path:
+            self.cache = Cache(str(path))
+        else:
+            raise ValueError("Either path or kvs_name is required")
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> "FeedCache | None":
+        if not crawler.settings.getbool("FEED_CACHE_ENABLED"):
+            return None
+        expiration_secs = crawler.settings.getint("FEED_CACHE_EXPIRATION_SECS")
+        if kvs_name := crawler.settings.get("FEED_CACHE_KVS_NAME"):
+            logger.debug(f"Using feed cache in key-value store {kvs_name!r}")
+            return cls(expiration_secs=expiration_secs, kvs_name=kvs_name)
+        path = Path(data_path(crawler.settings["FEED_CACHE_DIR"], createdir=True))
+        logger.debug(f"Using feed cache in {path}")
+        return cls(path, expiration_secs)
+
+    def get(self, url: str) -> Any | None:
+        return self.cache.get(url)
+
+    def set(self, url: str, data: Any) -> None:
+        self.cache.set(url, data, expire=self.expiration_secs)
+
+    def close(self) -> None:
+        self.cache.close()
+
+
+# Named key-value stores outlive actor runs and are shared by all actors of the
+# account. Provides the part of the diskcache interface the caches above use.
+# Like 'ApifyCacheStorage', runs the async storage client in its own thread,
+# because the caches are used from synchronous spider code. Values are pickled
+# and compressed, keys are hashed to fit the characters allowed by Apify.
+class KeyValueStoreCache:
+    def __init__(self, name: str):
+        from apify.scrapy._async_thread import AsyncThread
+
+        self.name = name
+        self._async_thread = AsyncThread()
+        self._kvs = self._async_thread.run_coro(open_key_value_store(name))
+
+    def get(self, key: str) -> Any | None:
+        data = self._async_thread.run_coro(self._kvs.get_value(get_kvs_key(key)))
+        if data is None:
+            return None
+        entry = pickle.loads(gzip.decompress(data))
+        if entry["expires_at"] is not None and entry["expires_at"] < time():
+            return None
+        return entry["value"]
+
+    def set(self, key: str, value: Any, expire: float | None = None) -> None:
+        entry = dict(value=value, expires_at=time() + expire if expire else None)
+        data = gzip.compress(pickle.dumps(entry), mtime=0)
+        self._async_thread.run_coro(
+            self._kvs.set_value(
+                get_kvs_key(key), data, content_type="application/octet-stream"
+            )
+        )
+
+    def close(self) -> None:
+        self._async_thread.close()
+
+
+async def open_key_value_store(name: str) -> Any:
+    from apify import Configuration
+    from apify.storage_clients import ApifyStorageClient
+    from apify.storages import KeyValueStore
+
+    configuration = Configuration.get_global_configuration()
+    if configuration.is_at_home:
+        return await KeyValueStore.open(
+            name=name, configuration=configuration, storage_client=ApifyStorageClient()
+        )
+    return await KeyValueStore.open(name=name)
+
+
+def get_kvs_key(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
@@ -4,32 +4,29 @@ import logging
 import subprocess
 import sys
 import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import IO, Callable, Generator, Type
+from typing import IO, Callable, Generator
 from urllib.parse import quote
 
 import click
-from apify.scrapy import initialize_logging
-from apify_client import ApifyClient
-from apify_shared.consts import ActorJobStatus, ActorSourceType
-from pydantic import BaseModel
-from scrapy import Item
-
-from jg.plucker.scrapers import (
-    StatsError,
-    generate_schema,
-    get_spider_module_name,
-    iter_actor_paths,
-    run_as_actor,
-    run_as_spider,
-    start_reactor,
+
+from jg.plucker.profiling import (
+    format_import_times,
+    parse_import_times,
+    summarize_import_times,
 )
 
 
-class BuildWaitStatus(BaseModel):
+# Heavy imports (Scrapy, Apify SDK, Apify client) are deferred to the commands
+# which need them. Run 'plucker profile-imports' to see what each command imports.
+
+
+@dataclass(frozen=True)
+class BuildWaitStatus:
     attempt: int
     total_attempts: int
-    status: ActorJobStatus
+    status: str
 
     def __str__(self) -> str:
         return f"{self.attempt}/{self.total_attempts}, {self.status}"
@@ -40,8 +37,14 @@ logger = logging.getLogger("jg.plucker")
 
 @click.group()
 @click.option("-d", "--debug", default=False, is_flag=True)
-def main(debug: bool = False):
-    initialize_logging()
+@click.pass_context
+def main(context: click.Context, debug: bool = False):
+    if context.invoked_subcommand in ["crawl", "crawl-all"]:
+        from apify.scrapy import initialize_logging
+
+        initialize_logging()
+    else:
+        logging.basicConfig(format="[%(name)s] %(levelname)s %(message)s")
     level = logging.DEBUG if debug else logging.INFO
     logging.getLogger().setLevel(level)
     logger.setLevel(level)
@@ -71,6 +74,16 @@ def crawl(
     apify: bool = False,
     spider_params_f: IO | None = None,
 ):
+    from scrapy.utils.project import get_project_settings
+
+    from jg.plucker.scrapers import (
+        StatsError,
+        get_spider_specs,
+        run_as_actor,
+        run_as_spider,
+        start_reactor,
+    )
+
     spider_module_name, actor_path = get_scraper(spider_name, actor_path)
     logger.info(f"Importing spider from {spider_module_name!r}")
     spider_class = importlib.import_module(spider_module_name).Spider
@@ -85,7 +98,8 @@ def crawl(
         if apify:
             logger.info(f"Crawling as Apify actor {actor_path}")
             if not (actor_path / ".actor/actor.json").is_file():
-                actors = ", ".join([str(path) for path in iter_actor_paths(".")])
+                specs = get_spider_specs(get_project_settings())
+                actors = ", ".join([spec.actor_path for spec in specs])
                 raise click.BadParameter(
                     f"Actor {actor_path} not found! Valid actors: {actors}"
                 )
@@ -99,6 +113,52 @@ def crawl(
         raise click.Abort()
 
 
+@main.command()
+@click.argument("spider_names", nargs=-1, type=str)
+@click.option(
+    "-p",
+    "--max-parallel",
+    default=4,
+    type=int,
+    help="How many spiders to crawl at the same time.",
+)
+def crawl_all(spider_names: tuple[str, ...], max_parallel: int):
+    from scrapy.spiderloader import get_spider_loader
+    from scrapy.utils.project import get_project_settings
+
+    from jg.plucker.scrapers import (
+        StatsError,
+        get_spider_specs,
+        run_as_spiders,
+        start_reactor,
+    )
+
+    settings = get_project_settings()
+    spider_loader = get_spider_loader(settings)
+    if not spider_names:
+        # Spiders which can't run without input, e.g. links to check, are
+        # left out unless asked for explicitly
+        specs = get_spider_specs(settings)
+        if skipped := sorted(spec.name for spec in specs if spec.required_input):
+            logger.info(f"Skipping spiders which require input: {', '.join(skipped)}")
+        spider_names = tuple(
+            sorted(spec.name for spec in specs if not spec.required_input)
+        )
+    try:
+        spider_classes = [spider_loader.load(name) for name in spider_names]
+    except KeyError as e:
+        raise click.BadParameter(
+            f"{e.args[0]}! Valid spiders: {', '.join(spider_loader.list())}"
+        )
+
+    try:
+        logger.info(f"Crawling as Scrapy spiders: {', '.join(spider_names)}")
+        start_reactor(run_as_spiders(spider_classes, max_parallel))
+    except StatsError as e:
+        logger.error(e)
+        raise click.Abort()
+
+
 @main.command()
 @click.argument("items_module_name", default="jg.plucker.items", type=str)
 @click.argument(
@@ -107,6 +167,8 @@ def crawl(
     type=click.Path(exists=True, file_okay=False, path_type=Path),
 )
 def schemas(items_module_name: str, output_path: Path):
+    from jg.plucker.scrapers import generate_schema
+
     for item_type in item_types(items_module_name):
         item_type_name = item_type.__name__
         logger.info(f"Generating schema for {item_type_name}…")
@@ -117,6 +179,26 @@ def schemas(items_module_name: str, output_path: Path):
         schema_path.write_text(json.dumps(schema, indent=4, ensure_ascii=False) + "\n")
 
 
+@main.command()
+@click.argument(
+    "spiders_path",
+    default="src/jg/plucker",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+)
+@click.argument(
+    "output_path",
+    default="src/jg/plucker/manifest.json",
+    type=click.Path(dir_okay=False, path_type=Path),
+)
+def manifest(spiders_path: Path, output_path: Path):
+    from jg.plucker.scrapers import generate_manifest
+
+    logger.info(f"Generating manifest of spiders in {spiders_path}…")
+    manifest = generate_manifest(spiders_path)
+    logger.info(f"Found {len(manifest)} spiders")
+    output_path.write_text(json.dumps(manifest, indent=4, ensure_ascii=False) + "\n")
+
+
 @main.command()
 @click.option("--token", envvar="APIFY_TOKEN", required=True)
 @click.option(
@@ -134,6 +216,8 @@ def build(
     build_polling_wait: int,
     build_attempts: int,
 ):
+    from apify_client import ApifyClient
+
     client = ApifyClient(token=token)
     success = False
     for actor_info in client.actors().list(my=True).items:
@@ -188,6 +272,9 @@ def build(
     help="How many previous runs to consider in the decision.",
 )
 def check(token: str, lookback: int):
+    from apify_client import ApifyClient
+    from apify_shared.consts import ActorJobStatus
+
     client = ApifyClient(token=token)
     schedules = [
         schedule
@@ -299,6 +386,9 @@ def deploy(
     spider_name: str | None = None,
     actor_path: str | None | Path = None,
 ):
+    from apify_client import ApifyClient
+    from apify_shared.consts import ActorJobStatus, ActorSourceType
+
     client = ApifyClient(token=token)
     _, actor_path = get_scraper(spider_name, actor_path)
     actor_config = json.loads((actor_path / ".actor/actor.json").read_text())
@@ -375,25 +465,63 @@ def li_params():
     click.echo(json.dumps(params, indent=2, ensure_ascii=False))
 
 
+@main.command(context_settings={"ignore_unknown_options": True})
+@click.argument("command_args", nargs=-1, type=click.UNPROCESSED)
+@click.option(
+    "-o",
+    "--output",
+    "output_path",
+    default="imports.json",
+    type=click.Path(dir_okay=False, path_type=Path),
+)
+@click.option("-n", "--limit", default=20, type=int, help="How many rows to show.")
+def profile_imports(command_args: tuple[str, ...], output_path: Path, limit: int):
+    args = [sys.executable, "-X", "importtime", "-m", "jg.plucker", *command_args]
+    logger.info(f"Profiling imports of: plucker {' '.join(command_args)}")
+    process = subprocess.run(args, stderr=subprocess.PIPE, text=True)
+    import_times, other_lines = parse_import_times(process.stderr.splitlines())
+    sys.stderr.write("".join(f"{line}\n" for line in other_lines))
+
+    summary = summarize_import_times(import_times)
+    logger.info(format_import_times(summary, limit))
+    output_path.write_text(json.dumps(summary, indent=2, ensure_ascii=False) + "\n")
+    logger.info(f"Saved to {output_path}")
+    if process.returncode:
+        logger.error(f"Command exited with code {process.returncode}")
+        raise click.Abort()
+
+
 def get_scraper(
     spider_name: str | None = None,
     actor_path: str | Path | None = None,
 ) -> tuple[str, Path]:
+    from scrapy.utils.project import get_project_settings
+
+    from jg.plucker.scrapers import get_spider_module_name, get_spider_specs
+
     if spider_name:
         if actor_path:
             logger.warning(
                 "Both spider_name and actor_path specified, actor_path will be ignored!"
             )
+        for spec in get_spider_specs(get_project_settings()):
+            if spec.name == spider_name:
+                return (spec.module_name, Path(spec.actor_path))
         spider_package_name = spider_name.replace("-", "_")
         actor_path = Path(f"src/jg/plucker/{spider_package_name}")
         return (f"jg.plucker.{spider_package_name}.spider", actor_path)
     if actor_path:
         # e.g. src/jg/plucker/exchange_rates
+        for spec in get_spider_specs(get_project_settings()):
+            if Path(spec.actor_path) == Path(actor_path):
+                return (spec.module_name, Path(spec.actor_path))
         return (get_spider_module_name(actor_path), Path(actor_path))
     raise click.BadParameter("Either spider_name or actor_path must be specified")
 
 
-def item_types(items_module_name: str) -> Generator[Type[Item], None, None]:
+def item_types(items_module_name: str) -> Generator[type, None, None]:
+    from scrapy import Item
+
     items_module = importlib.import_module(items_module_name)
     for member_name in dir(items_module):
         member = getattr(items_module, member_name)
@@ -409,6 +537,8 @@ def item_types(items_module_name: str) -> Generator[Type[Item], None, None]:
 def wait_for_build_status(
     get_build_info: Callable, build_timeout: int, build_polling_wait: int
 ) -> Generator[BuildWaitStatus, None, None]:
+    from apify_shared.consts import ActorJobStatus
+
     total_attempts = build_timeout // build_polling_wait
     time.sleep(build_polling_wait)
     for attempt in range(1, total_attempts):
@@ -1,11 +1,11 @@
 import json
-from typing import Generator, cast
+from typing import Generator
 
 from scrapy import Request, Spider as BaseSpider
 from scrapy.http.response import Response
-from scrapy.http.response.text import TextResponse
 
 from jg.plucker.items import Company
+from jg.plucker.json_stream import iter_json_array
 
 
 class Spider(BaseSpider):
@@ -21,19 +21,19 @@ class Spider(BaseSpider):
 
     def parse(self, response: Response) -> Generator[Request, None, None]:
         if api_key := self.settings.get("MERK_API_KEY"):
-            response = cast(TextResponse, response)
-            course_providers: list[dict] = response.json()
-            self.logger.info(f"Fetched {len(course_providers)} course providers")
-            for country_code in ["cz", "sk"]:
-                self.logger.info(
-                    f"Filtering course providers for {country_code.upper()} "
-                    f"({len(course_providers)} total)"
-                )
-                business_ids = sorted(
-                    course_provider[f"{country_code}_business_id"]
-                    for course_provider in course_providers
-                    if course_provider[f"{country_code}_business_id"]
-                )
+            country_codes = ["cz", "sk"]
+            business_ids_by_country: dict[str, list[str]] = {
+                country_code: [] for country_code in country_codes
+            }
+            count = 0
+            for course_provider in iter_json_array(response.body):
+                count += 1
+                for country_code in country_codes:
+                    if business_id := course_provider[f"{country_code}_business_id"]:
+                        business_ids_by_country[country_code].append(business_id)
+            self.logger.info(f"Fetched {count} course providers")
+            for country_code in country_codes:
+                business_ids = sorted(business_ids_by_country[country_code])
                 self.logger.info(
                     f"Found {len(business_ids)} course providers "
                     f"with {country_code.upper()} business IDs"
@@ -58,8 +58,7 @@ class Spider(BaseSpider):
     def parse_companies(
         self, response: Response, country_code: str
     ) -> Generator[Company, None, None]:
-        response = cast(TextResponse, response)
-        for data in response.json():
+        for data in iter_json_array(response.body):
             yield Company(
                 name=data["name"],
                 country_code=country_code,
@@ -1,12 +1,12 @@
 import json
 from pprint import pformat
-from typing import Generator, cast
+from typing import Generator
 
 from scrapy import Request, Spider as BaseSpider
 from scrapy.http.response import Response
-from scrapy.http.response.text import TextResponse
 
 from jg.plucker.items import CourseProvider
+from jg.plucker.json_stream import iter_json_array
 
 
 class Spider(BaseSpider):
@@ -22,10 +22,9 @@ class Spider(BaseSpider):
 
     def parse(self, response: Response) -> Generator[Request, None, None]:
         self.logger.info("Acquiring cookies")
-        response = cast(TextResponse, response)
         business_ids = [
             course_provider["cz_business_id"]
-            for course_provider in response.json()
+            for course_provider in iter_json_array(response.body)
             if course_provider["cz_business_id"]
         ]
         yield Request(
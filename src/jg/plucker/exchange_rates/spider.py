@@ -11,6 +11,12 @@ from jg.plucker.items import ExchangeRate
 class Spider(BaseSpider):
     name = "exchange-rates"
 
+    custom_settings = {
+        # Revalidates the cached rates instead of downloading them again
+        "HTTPCACHE_POLICY": "jg.plucker.cache.ConditionalPolicy",
+        "HTTPCACHE_EXPIRATION_SECS": 60 * 60 * 24 * 7,  # 7 days, the URL changes weekly
+    }
+
     async def start(self) -> AsyncGenerator[Request, None]:
         monday = get_last_monday(date.today())
         yield Request(
@@ -0,0 +1,197 @@
+import json
+import logging
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable
+from urllib.parse import urlparse
+
+from scrapy import Request, Spider, signals
+from scrapy.crawler import Crawler
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Response
+
+
+logger = logging.getLogger("jg.plucker.extensions")
+
+
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10]  # seconds
+
+
+class PerformanceReport:
+    def __init__(self, crawler: Crawler):
+        self.crawler = crawler
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.callbacks: dict[str, dict[str, float]] = defaultdict(
+            lambda: dict(calls=0, wall_s=0.0, cpu_s=0.0, items=0, requests=0)
+        )
+        self.domains: dict[str, dict[str, Any]] = defaultdict(
+            lambda: dict(
+                responses=0,
+                cached_responses=0,
+                bytes=0,
+                latency_s=0.0,
+                latency_histogram=dict.fromkeys(get_latency_buckets(), 0),
+            )
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> "PerformanceReport":
+        if not crawler.settings.getbool("PERFORMANCE_REPORT_ENABLED"):
+            raise NotConfigured()
+        extension = cls(crawler)
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(
+            extension.response_received, signal=signals.response_received
+        )
+        return extension
+
+    def spider_opened(self, spider: Spider) -> None:
+        self.started_at = time.perf_counter()
+
+    def response_received(self, response: Response, request: Request) -> None:
+        domain = urlparse(response.url).hostname or "<unknown>"
+        stats = self.domains[domain]
+        stats["responses"] += 1
+        stats["bytes"] += len(response.body)
+        if "cached" in response.flags:
+            stats["cached_responses"] += 1
+        elif (latency := request.meta.get("download_latency")) is not None:
+            stats["latency_s"] += latency
+            stats["latency_histogram"][get_latency_bucket(latency)] += 1
+
+    def record_callback(
+        self, name: str, wall_s: float, cpu_s: float, items: int, requests: int
+    ) -> None:
+        stats = self.callbacks[name]
+        stats["calls"] += 1
+        stats["wall_s"] += wall_s
+        stats["cpu_s"] += cpu_s
+        stats["items"] += items
+        stats["requests"] += requests
+
+    def spider_closed(self, spider: Spider) -> None:
+        self.finished_at = time.perf_counter()
+        report = self.get_report()
+        logger.info(
+            f"Crawled {report['items']} items in {report['elapsed_s']:.1f}s "
+            f"({report['items_per_s']:.1f} items/s), downloaded {report['bytes']} bytes"
+        )
+        for name, stats in report["callbacks"].items():
+            logger.info(
+                f"Callback {name}: {stats['calls']} calls, "
+                f"{stats['wall_s']:.2f}s wall time, {stats['cpu_s']:.2f}s CPU time"
+            )
+        if path := self.crawler.settings.get("PERFORMANCE_REPORT_PATH"):
+            path = Path(path % {"name": spider.name})
+            logger.info(f"Saving performance report to {path}")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2) + "\n")
+
+    def get_report(self) -> dict[str, Any]:
+        spider = self.crawler.spider
+        assert self.crawler.stats is not None, "Stats collector not initialized"
+        items = self.crawler.stats.get_value("item_scraped_count", 0)
+        elapsed_s = (self.finished_at or time.perf_counter()) - (
+            self.started_at or time.perf_counter()
+        )
+        return {
+            "spider": spider.name if spider else None,
+            "elapsed_s": elapsed_s,
+            "items": items,
+            "items_per_s": items / elapsed_s if elapsed_s else 0.0,
+            "bytes": sum(stats["bytes"] for stats in self.domains.values()),
+            "callbacks": dict(
+                sorted(
+                    self.callbacks.items(),
+                    key=lambda item: item[1]["wall_s"],
+                    reverse=True,
+                )
+            ),
+            "domains": dict(
+                sorted(
+                    self.domains.items(),
+                    key=lambda item: item[1]["responses"],
+                    reverse=True,
+                )
+            ),
+        }
+
+
+# Measures the time spent inside callbacks, i.e. while their output is being
+# iterated. Needs to be the closest middleware to the spider.
+class CallbackTimingMiddleware:
+    def __init__(self, report: PerformanceReport):
+        self.report = report
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> "CallbackTimingMiddleware":
+        if report := crawler.get_extension(PerformanceReport):
+            return cls(report)
+        raise NotConfigured()
+
+    def process_spider_output(
+        self, response: Response, result: Iterable[Any]
+    ) -> Iterable[Any]:
+        name = get_callback_name(response)
+        items = requests = 0
+        wall_s = cpu_s = 0.0
+        iterator = iter(result)
+        while True:
+            wall_started_at, cpu_started_at = time.perf_counter(), time.thread_time()
+            try:
+                obj = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                wall_s += time.perf_counter() - wall_started_at
+                cpu_s += time.thread_time() - cpu_started_at
+            if isinstance(obj, Request):
+                requests += 1
+            else:
+                items += 1
+            yield obj
+        self.report.record_callback(name, wall_s, cpu_s, items, requests)
+
+    async def process_spider_output_async(
+        self, response: Response, result: AsyncIterator[Any]
+    ) -> AsyncIterator[Any]:
+        name = get_callback_name(response)
+        items = requests = 0
+        wall_s = cpu_s = 0.0
+        iterator = aiter(result)
+        while True:
+            wall_started_at, cpu_started_at = time.perf_counter(), time.thread_time()
+            try:
+                obj = await anext(iterator)
+            except StopAsyncIteration:
+                break
+            finally:
+                wall_s += time.perf_counter() - wall_started_at
+                cpu_s += time.thread_time() - cpu_started_at
+            if isinstance(obj, Request):
+                requests += 1
+            else:
+                items += 1
+            yield obj
+        self.report.record_callback(name, wall_s, cpu_s, items, requests)
+
+
+def get_callback_name(response: Response) -> str:
+    if response.request and response.request.callback:
+        callback = response.request.callback
+        return getattr(callback, "__qualname__", repr(callback))
+    return "Spider.parse"
+
+
+def get_latency_buckets() -> list[str]:
+    return [f"<={bucket}s" for bucket in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+
+
+def get_latency_bucket(latency: float) -> str:
+    for bucket in LATENCY_BUCKETS:
+        if latency <= bucket:
+            return f"<={bucket}s"
+    return f">{LATENCY_BUCKETS[-1]}s"
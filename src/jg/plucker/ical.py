@@ -0,0 +1,158 @@
+import re
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Any, Callable, Generator
+
+from ics import Calendar, Event
+from scrapy import Spider as BaseSpider
+from scrapy.http import TextResponse
+
+from jg.plucker.items import Meetup
+
+
+EVENT_BEGIN = "\nBEGIN:VEVENT"
+
+EVENT_END = "\nEND:VEVENT"
+
+DTSTART_RE = re.compile(r"^DTSTART[^:\r\n]*:(?P<date>\d{8})", re.MULTILINE)
+
+EventFilter = tuple[str, Callable[[Event, date], bool]]
+
+
+# Calendars such as Google Calendar exports contain years of history, but the
+# spiders are interested only in upcoming events. Building full event objects
+# is slow, so the raw VEVENT blocks are pre-filtered by their DTSTART first and
+# only the remaining ones are parsed, together with the calendar's header with
+# its time zones. The pre-filter is generous by a day to stay on the safe side
+# with time zones, so the spiders still need to check the exact start.
+def parse_events(text: str, since: date | None = None) -> list[Event]:
+    header_end = text.find(EVENT_BEGIN)
+    if header_end == -1:
+        return list(Calendar(text).events)
+    header = text[: header_end + 1]
+    min_date = since - timedelta(days=1) if since else None
+    blocks = [
+        block
+        for block in iter_event_blocks(text, header_end)
+        if min_date is None or not is_before(block, min_date)
+    ]
+    return list(Calendar(header + "".join(blocks) + "END:VCALENDAR\r\n").events)
+
+
+def iter_event_blocks(text: str, pos: int = 0) -> Generator[str, None, None]:
+    while (start := text.find(EVENT_BEGIN, pos)) != -1:
+        end = text.find(EVENT_END, start)
+        if end == -1:
+            raise ValueError(f"Unterminated event at position {start}")
+        end = text.find("\n", end + len(EVENT_END))
+        end = len(text) if end == -1 else end + 1
+        yield text[start + 1 : end]
+        pos = end - 1
+
+
+def is_before(block: str, min_date: date) -> bool:
+    if match := DTSTART_RE.search(block):
+        return match.group("date") < f"{min_date:%Y%m%d}"
+    return False
+
+
+# Base for spiders scraping meetups from iCal feeds. Subclasses declare the
+# feeds as start_urls, the series metadata, and which events to skip. The rules
+# are turned into a list of filters once, when the spider is created, and each
+# feed is then processed in a single pass. Several feeds can be listed, Scrapy
+# downloads them concurrently and each response is parsed as soon as it comes.
+class CalendarSpider(BaseSpider):
+    custom_settings = {
+        # Revalidates the cached calendar instead of downloading it again
+        "HTTPCACHE_POLICY": "jg.plucker.cache.ConditionalPolicy",
+        "HTTPCACHE_EXPIRATION_SECS": 60 * 60 * 24 * 30,  # 30 days
+    }
+
+    min_items = 0
+
+    series_name: str
+
+    series_org: str
+
+    series_url: str
+
+    default_event_url: str | None = None
+
+    require_location: bool = False
+
+    skip_categories: frozenset[str] = frozenset()
+
+    min_duration: timedelta | None = None
+
+    timezone: tzinfo | None = None
+
+    def __init__(self, name: str | None = None, **kwargs: Any):
+        super().__init__(name, **kwargs)
+        self.filters = self.get_filters()
+
+    def get_filters(self) -> list[EventFilter]:
+        filters = []
+        if self.require_location:
+            filters.append(("Event without location", has_no_location))
+        filters.append(("Past event", is_past))
+        if self.skip_categories:
+            filters.append(("Skipped category", self.has_skipped_category))
+        return filters
+
+    def parse(
+        self, response: TextResponse, today: date | None = None
+    ) -> Generator[Meetup, None, None]:
+        today = today or date.today()
+        self.logger.info(f"Parsing {response.url}, today is {today}")
+        events = parse_events(response.text, since=today)
+        self.logger.debug(f"Upcoming events: {len(events)}")
+        meetups = (self.parse_event(response.url, today, event) for event in events)
+        yield from filter(None, meetups)
+
+    def parse_event(self, source_url: str, today: date, event: Event) -> Meetup | None:
+        for reason, is_skipped in self.filters:
+            if is_skipped(event, today):
+                self.logger.debug(f"{reason}: {event.summary} {event.begin}")
+                return None
+
+        if not event.begin:
+            raise ValueError(f"Event without start time: {event}")
+
+        self.logger.info(f"Event: {event.summary} {event.begin}")
+        starts_at, ends_at = self.get_times(event)
+
+        return Meetup(
+            title=event.summary,
+            url=self.get_url(event),
+            description=event.description,
+            starts_at=starts_at,
+            ends_at=ends_at,
+            location=event.location,
+            source_url=source_url,
+            series_name=self.series_name,
+            series_org=self.series_org,
+            series_url=self.series_url,
+        )
+
+    def get_url(self, event: Event) -> str | None:
+        return event.url or self.default_event_url
+
+    def get_times(self, event: Event) -> tuple[datetime, datetime | None]:
+        starts_at, ends_at = event.begin, event.end
+        if self.timezone:
+            starts_at = starts_at.replace(tzinfo=self.timezone)
+            ends_at = ends_at.replace(tzinfo=self.timezone) if ends_at else None
+        if self.min_duration:
+            default_ends_at = starts_at + self.min_duration
+            ends_at = max(ends_at or default_ends_at, default_ends_at)
+        return starts_at, ends_at
+
+    def has_skipped_category(self, event: Event, today: date) -> bool:
+        return not self.skip_categories.isdisjoint(event.categories)
+
+
+def has_no_location(event: Event, today: date) -> bool:
+    return not event.location or event.location.startswith("http")
+
+
+def is_past(event: Event, today: date) -> bool:
+    return bool(event.begin) and event.begin.date() < today
@@ -0,0 +1,31 @@
+from io import BytesIO
+
+from PIL import Image
+
+
+# This module is imported by worker processes, keep its imports light
+
+
+def normalize_image(
+    body: bytes, max_size: int, format: str = "webp"
+) -> tuple[bytes, int, int]:
+    with Image.open(BytesIO(body)) as img:
+        if img.format == "ICO":
+            img.size = get_best_ico_size(img)
+        img.load()
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        if format == "webp":
+            img.save(buffer, format="WEBP", quality=90, method=6)
+        elif format == "png":
+            img.save(buffer, format="PNG", optimize=True)
+        else:
+            raise ValueError(f"Unsupported format: {format!r}")
+        width, height = img.size
+    return buffer.getvalue(), width, height
+
+
+def get_best_ico_size(img: Image.Image) -> tuple[int, int]:
+    return max(img.info.get("sizes") or [img.size], key=lambda size: size[0] * size[1])
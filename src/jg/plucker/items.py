@@ -29,12 +29,14 @@ class Job(Item):
 
 
 class JobLogo(Item):
-    image_url = Field(required=True, apify_format="image")
+    image_url = Field(required=True, apify_format="image", hash_field="image_hash")
+    image_hash = Field(apify_format="string")
     original_image_url = Field(required=True, apify_format="image")
     width = Field(apify_format="number")
     height = Field(apify_format="number")
     format = Field(required=True, apify_format="string")
     source_url = Field(required=True, apify_format="link")
+    alternatives = Field(apify_format="array")
 
 
 class JobCheck(Item):
@@ -100,3 +102,8 @@ def get_image_fields(item_class: type[Item]) -> set[str]:
         for name, kwargs in item_class.fields.items()
         if kwargs.get("apify_format") == "image"
     }
+
+
+@cache
+def get_hash_field(item_class: type[Item], field: str) -> str | None:
+    return item_class.fields[field].get("hash_field")
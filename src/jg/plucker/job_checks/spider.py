@@ -1,28 +1,93 @@
-import re
-from typing import Any, AsyncGenerator, Generator
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Generator, Hashable, cast
 from urllib.parse import urlparse
 
-from scrapy import Request, Spider as BaseSpider
+from diskcache import Cache
+from scrapy import Request, Spider as BaseSpider, signals
+from scrapy.crawler import Crawler
+from scrapy.exceptions import StopDownload
 from scrapy.http.response import Response
 
+from jg.plucker.cache import FeedCache, KeyValueStoreCache
 from jg.plucker.items import JobCheck
-from jg.plucker.jobs_startupjobs.spider import EXPORT_URL as STARTUPJOBS_EXPORT_URL
+from jg.plucker.jobs_startupjobs.spider import (
+    EXPORT_URL as STARTUPJOBS_EXPORT_URL,
+    get_offer_ids as get_startupjobs_ids,
+    parse_offer_id as parse_startupjobs_id,
+    parse_offers as parse_startupjobs_offers,
+)
 from jg.plucker.scrapers import Link, evaluate_stats, parse_links
 
 
+# Job boards which publish all their current jobs in a single feed, so that
+# any number of their URLs can be checked with just one request
+@dataclass(frozen=True)
+class BulkChecker:
+    name: str
+    domain: str
+    feed_url: str
+    parse_id: Callable[[str], Hashable]
+    parse_feed: Callable[[Response], Any]  # compact enough to be cached
+    get_feed_ids: Callable[[Any], set[Hashable]]
+
+    def matches(self, url: str) -> bool:
+        return self.domain in urlparse(url).netloc
+
+
+BULK_CHECKERS = {
+    checker.name: checker
+    for checker in [
+        BulkChecker(
+            name="STARTUPJOBS",
+            domain="startupjobs.cz",
+            feed_url=STARTUPJOBS_EXPORT_URL,
+            parse_id=parse_startupjobs_id,
+            parse_feed=parse_startupjobs_offers,
+            get_feed_ids=get_startupjobs_ids,  # type: ignore
+        ),
+    ]
+}
+
+
 class Spider(BaseSpider):
     name = "job-checks"
 
     custom_settings = {
         "HTTPCACHE_ENABLED": False,
-        "HTTPERROR_ALLOWED_CODES": [404, 410],
+        # 405 and 501 need to get through, see head_rejected_codes
+        "HTTPERROR_ALLOWED_CODES": [404, 410, 405, 501],
         "RETRY_TIMES": 10,
         "DUPEFILTER_CLASS": "scrapy.dupefilters.BaseDupeFilter",
         "METAREFRESH_ENABLED": False,
+        # Checks are cheap for the servers, there's no need to slow down like
+        # when scraping, but let's not hammer a single job board either
+        "AUTOTHROTTLE_ENABLED": False,
+        "CONCURRENT_REQUESTS": 64,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 4,
+        "DOWNLOAD_TIMEOUT": 30,
     }
 
     min_items = 0
 
+    # Servers which don't implement HEAD, see RFC 9110, section 15.5.6 and 15.6.2
+    head_rejected_codes = [405, 501]
+
+    # Results can be persisted across runs by setting a path, e.g. as a spider
+    # param. Then links checked recently enough aren't requested again and
+    # their previous results are emitted instead. At Apify, where runs don't
+    # share disks, the results are always persisted in a named key-value store,
+    # see CHECK_STATE_KVS_NAME.
+    check_state_path: str | None = None
+
+    recheck_ok_after: int | None = 60 * 60 * 24  # seconds
+
+    recheck_not_ok_after: int | None = None  # seconds, never by default
+
+    feed_cache: FeedCache | None = None
+
     @classmethod
     def evaluate_stats(cls, stats: dict[str, Any], min_items: int) -> None:
         # TODO is this still needed?
@@ -36,37 +101,140 @@ class Spider(BaseSpider):
 
         return evaluate_stats(stats, min_items)
 
-    def __init__(self, name: str | None = None, links: list[Link] | None = None):
-        super().__init__(name)
+    def __init__(
+        self,
+        name: str | None = None,
+        links: list[Link] | None = None,
+        **kwargs: Any,
+    ):
+        super().__init__(name, **kwargs)
         self._start_urls = parse_links(links)
+        self._started_at: float | None = None
+        self._results: Counter[str] = Counter()
+        self._state = CheckState(self.check_state_path)
+        self._replayed_urls: set[str] = set()
 
-    async def start(self) -> AsyncGenerator[Request, None]:
+    @classmethod
+    def from_crawler(cls, crawler: Crawler, *args: Any, **kwargs: Any) -> "Spider":
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(
+            spider.headers_received, signal=signals.headers_received
+        )
+        crawler.signals.connect(spider.item_scraped, signal=signals.item_scraped)
+        spider.feed_cache = FeedCache.from_crawler(crawler)
+        if not spider.check_state_path and (
+            kvs_name := crawler.settings.get("CHECK_STATE_KVS_NAME")
+        ):
+            spider._state = CheckState(kvs_name=kvs_name)
+        return spider
+
+    async def start(self) -> AsyncGenerator[Request | JobCheck, None]:
         if not self._start_urls:
             raise ValueError("No links provided")
         self.logger.info(f"Loading {len(self._start_urls)} links")
-        startupjobs_urls = []  # StartupJobs URLs bulk
+        self._started_at = time.perf_counter()
+        bulk_urls: dict[str, list[str]] = {}
         for url in self._start_urls:
-            if is_linkedin_url(url):
+            if check := self.get_recent_check(url):
+                self.logger.debug(f"Skipping {url}, checked recently")
+                self._replayed_urls.add(check["url"])
+                yield check
+            elif is_linkedin_url(url):
                 if request := self._linkedin_request(url):
                     yield request
-            elif is_startupjobs_url(url):
-                startupjobs_urls.append(url)
+            elif checker := get_bulk_checker(url):
+                bulk_urls.setdefault(checker.name, []).append(url)
             else:
-                yield Request(url, method="HEAD", callback=self.check_http)
-        if startupjobs_urls:
-            yield Request(
-                STARTUPJOBS_EXPORT_URL,
-                callback=self.check_startupjobs,
-                cb_kwargs={"urls": startupjobs_urls},
-            )
+                yield self.get_http_request(url)
+        for checker_name, urls in bulk_urls.items():
+            checker = BULK_CHECKERS[checker_name]
+            if self.feed_cache and (data := self.feed_cache.get(checker.feed_url)):
+                self.logger.info(f"Using cached feed {checker.feed_url}")
+                for result in self.check_feed(checker, data, urls):
+                    yield result
+            else:
+                yield Request(
+                    checker.feed_url,
+                    callback=self.check_bulk,
+                    cb_kwargs={"checker_name": checker_name, "urls": urls},
+                )
+
+    def get_http_request(self, url: str) -> Request:
+        return Request(
+            url,
+            method="HEAD",
+            callback=self.check_http,
+            meta={"check_url": url},
+        )
 
-    def check_http(self, response: Response) -> JobCheck:
+    def check_http(self, response: Response) -> JobCheck | Request:
         self.logger.info(f"Checking {response.url} (HTTP)")
+        request = response.request
+        if (
+            request
+            and request.method == "HEAD"
+            and response.status in self.head_rejected_codes
+        ):
+            self.logger.debug(f"HEAD rejected by {response.url}, trying GET")
+            self._results["head_rejected"] += 1
+            return Request(
+                request.url,
+                # Asking just for the first byte, but some servers ignore
+                # ranges, so the body gets aborted after headers anyway
+                headers={"Range": "bytes=0-0"},
+                callback=self.check_http,
+                meta={"abort_body": True, "check_url": request.meta.get("check_url")},
+                dont_filter=True,
+            )
         reason = f"HTTP {response.status}"
-        if response.status == 200:
+        if response.status in (200, 206):
             return JobCheck(url=response.url, ok=True, reason=reason)
         return JobCheck(url=response.url, ok=False, reason=reason)
 
+    def headers_received(
+        self, headers: Any, body_length: int, request: Request, spider: BaseSpider
+    ) -> None:
+        if request.meta.get("abort_body"):
+            raise StopDownload(fail=False)
+
+    def item_scraped(self, item: JobCheck, response: Response | None = None) -> None:
+        if item["url"] in self._replayed_urls:
+            self._results["skipped"] += 1
+            return
+        self._results["ok" if item["ok"] else "not_ok"] += 1
+        urls = {item["url"]}
+        if response is not None and (check_url := response.meta.get("check_url")):
+            urls.add(check_url)  # the original URL, before redirects
+        for url in urls:
+            self._state.set(url, dict(item), time.time())
+
+    def get_recent_check(self, url: str) -> JobCheck | None:
+        if not (entry := self._state.get(url)):
+            return None
+        recheck_after = (
+            self.recheck_ok_after if entry["item"]["ok"] else self.recheck_not_ok_after
+        )
+        if (
+            recheck_after is not None
+            and time.time() - entry["checked_at"] > recheck_after
+        ):
+            return None
+        return JobCheck(**entry["item"])
+
+    def closed(self, reason: str) -> None:
+        self._state.close()
+        if self.feed_cache:
+            self.feed_cache.close()
+        elapsed_s = time.perf_counter() - (self._started_at or time.perf_counter())
+        checked = self._results["ok"] + self._results["not_ok"]
+        rate = checked / elapsed_s if elapsed_s else 0.0
+        self.logger.info(
+            f"Checked {checked} URLs in {elapsed_s:.1f}s ({rate:.1f} URLs/s): "
+            f"{self._results['ok']} ok, {self._results['not_ok']} not ok, "
+            f"{self._results['head_rejected']} fell back from HEAD to GET, "
+            f"{self._results['skipped']} skipped as checked recently"
+        )
+
     def _linkedin_request(self, url: str) -> Request | None:
         self.logger.warning(f"Skipping {url}, LinkedIn job checks are not supported")
         return None
@@ -89,30 +257,58 @@ class Spider(BaseSpider):
         )
         raise NotImplementedError("Failed to parse LinkedIn API response")
 
-    def check_startupjobs(
-        self, response: Response, urls: list[str]
-    ) -> Generator[JobCheck, None, None]:
-        self.logger.info(f"Checking {len(urls)} URLs (StartupJobs)")
-        data = response.json()
-        current_ids = set(
-            parse_startupjobs_id(offer["url"]) for offer in data.get("offers", [])
-        )
+    def check_bulk(
+        self, response: Response, checker_name: str, urls: list[str]
+    ) -> Generator[JobCheck | Request, None, None]:
+        checker = BULK_CHECKERS[checker_name]
+        data = checker.parse_feed(response)
+        if self.feed_cache:
+            self.feed_cache.set(checker.feed_url, data)
+        yield from self.check_feed(checker, data, urls)
+
+    def check_feed(
+        self, checker: BulkChecker, data: Any, urls: list[str]
+    ) -> Generator[JobCheck | Request, None, None]:
+        self.logger.info(f"Checking {len(urls)} URLs ({checker.name})")
+        current_ids = checker.get_feed_ids(data)
         for url in urls:
-            if parse_startupjobs_id(url) in current_ids:
-                yield JobCheck(url=url, ok=True, reason="STARTUPJOBS")
-            else:
-                yield JobCheck(url=url, ok=False, reason="STARTUPJOBS")
+            try:
+                job_id = checker.parse_id(url)
+            except ValueError as e:
+                self.logger.warning(f"{e}, checking {url} over HTTP instead")
+                yield self.get_http_request(url)
+                continue
+            yield JobCheck(url=url, ok=job_id in current_ids, reason=checker.name)
 
 
-def is_linkedin_url(url: str) -> bool:
-    return "linkedin.com" in urlparse(url).netloc
+class CheckState:
+    def __init__(self, path: str | Path | None = None, kvs_name: str | None = None):
+        self._cache: Cache | KeyValueStoreCache | None = None
+        if kvs_name:
+            self._cache = KeyValueStoreCache(kvs_name)
+        elif path:
+            self._cache = Cache(str(path))
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        if self._cache is None:
+            return None
+        return cast(dict[str, Any] | None, self._cache.get(url))
 
+    def set(self, url: str, item: dict[str, Any], checked_at: float) -> None:
+        if self._cache is not None:
+            self._cache.set(url, dict(item=item, checked_at=checked_at))
 
-def is_startupjobs_url(url: str) -> bool:
-    return "startupjobs.cz" in urlparse(url).netloc
+    def close(self) -> None:
+        if self._cache is not None:
+            self._cache.close()
+
+
+def is_linkedin_url(url: str) -> bool:
+    return "linkedin.com" in urlparse(url).netloc
 
 
-def parse_startupjobs_id(url: str) -> int:
-    if match := re.search(r"/nabidka/(\d+)/", url):
-        return int(match.group(1))
-    raise ValueError(f"Could not parse StartupJobs ID: {url}")
+def get_bulk_checker(url: str) -> BulkChecker | None:
+    for checker in BULK_CHECKERS.values():
+        if checker.matches(url):
+            return checker
+    return None
@@ -1,13 +1,23 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
 from enum import StrEnum
 from io import BytesIO
-from typing import Generator
+from pathlib import Path
+from typing import Any, AsyncGenerator, Generator, cast
 from urllib.parse import urljoin
 
+from diskcache import Cache
 from favicon import Icon, favicon
-from PIL import Image
-from scrapy import Request, Spider as BaseSpider
+from PIL import Image, UnidentifiedImageError
+from scrapy import Request, Spider as BaseSpider, signals
+from scrapy.crawler import Crawler
+from scrapy.exceptions import DontCloseSpider, DownloadCancelledError
 from scrapy.http.response import Response
+from twisted.internet.defer import CancelledError
+from twisted.python.failure import Failure
 
+from jg.plucker.cache import KeyValueStoreCache
 from jg.plucker.items import JobLogo
 from jg.plucker.scrapers import Link, parse_links
 
@@ -40,70 +50,118 @@ class Format(StrEnum):
         raise ValueError(f"Unsupported content type: {content_type!r}")
 
 
+class Kind(StrEnum):
+    FAVICON = "favicon"
+    ICON = "icon"
+    APPLE_TOUCH_ICON = "apple-touch-icon"
+    MANIFEST = "manifest"
+
+
+PREFERRED_KINDS = [Kind.APPLE_TOUCH_ICON, Kind.MANIFEST]
+
+
+@dataclass
+class Candidates:
+    pending: int = 0
+    logos: list[tuple[Kind, JobLogo]] = field(default_factory=list)
+
+
 class Spider(BaseSpider):
     name = "job-logos"
 
     start_urls = []
 
+    custom_settings = {
+        # Some homepages are large, but anything beyond this is suspicious
+        "DOWNLOAD_MAXSIZE": 5 * 1024 * 1024,  # 5 MB
+        "LOGO_NORMALIZATION_ENABLED": True,
+    }
+
     min_items = 1
 
-    def __init__(self, name: str | None = None, links: list[Link] | None = None):
-        super().__init__(name)
+    image_maxsize = 1024 * 1024  # bytes
+
+    # Logos can be persisted across runs by setting a path, e.g. as a spider
+    # param. Then only the winning icon of each source gets revalidated and
+    # the homepage is processed again only if the icon has changed. At Apify,
+    # where runs don't share disks, the logos are always persisted in a named
+    # key-value store, see LOGO_CACHE_KVS_NAME.
+    logo_cache_path: str | None = None
+
+    logo_cache_ttl = 60 * 60 * 24 * 30  # seconds
+
+    def __init__(
+        self,
+        name: str | None = None,
+        links: list[Link] | None = None,
+        **kwargs: Any,
+    ):
+        super().__init__(name, **kwargs)
         self.start_urls = parse_links(links)
+        self.candidates: dict[str, Candidates] = {}
+        self.logo_cache = LogoCache(self.logo_cache_path, ttl=self.logo_cache_ttl)
+        self.icon_validators: dict[str, dict[str, str | None]] = {}
+        # the cache is keyed by the input links, not by the URLs they redirect to
+        self.source_links: dict[str, str] = {}
 
-    def parse(
-        self, response: Response, source_url: str | None = None
-    ) -> Generator[Request | JobLogo, None, None]:
+    @classmethod
+    def from_crawler(cls, crawler: Crawler, *args: Any, **kwargs: Any) -> "Spider":
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(spider.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(spider.item_scraped, signal=signals.item_scraped)
+        if not spider.logo_cache_path and (
+            kvs_name := crawler.settings.get("LOGO_CACHE_KVS_NAME")
+        ):
+            spider.logo_cache = LogoCache(ttl=spider.logo_cache_ttl, kvs_name=kvs_name)
+        return spider
+
+    async def start(self) -> AsyncGenerator[Request, None]:
+        for url in self.start_urls:
+            if entry := self.logo_cache.get(url):
+                yield self.get_revalidation_request(url, entry)
+            else:
+                yield Request(url, dont_filter=True)
+
+    def closed(self, reason: str) -> None:
+        self.logo_cache.close()
+
+    def parse(self, response: Response) -> Generator[Request | JobLogo, None, None]:
         if not response.request:
             raise ValueError("Response does not have a request")
         request = response.request
 
-        details = []
-        if response.url != request.url:
-            details.append(f"redirected from {request.url}")
-        if source_url:
-            details.append(f"originally {source_url}")
-        details = f" ({' '.join(details)})" if details else ""
+        details = (
+            f" (redirected from {request.url})" if response.url != request.url else ""
+        )
         self.logger.info(f"Processing {response.url}{details}")
+        if (link := request.meta.get("redirect_urls", [request.url])[0]) != request.url:
+            self.source_links[request.url] = link
 
-        content_type = (response.headers.get("Content-Type") or b"").decode("utf8")
-        if not content_type.startswith(("image/", "text/")):
-            self.logger.warning(f"Declared content type: {content_type!r}")
-        elif "image/svg" in content_type:
-            self.logger.warning("SVG images are not supported")
+        if (content_type := self.get_content_type(response)) is None:
             return
-        else:
-            self.logger.debug(f"Declared content type: {content_type!r}")
-
         try:
             html = response.text
         except AttributeError:
             self.logger.debug("Assuming image URL")
-            with Image.open(BytesIO(response.body)) as img:
-                content_type = img.get_format_mimetype() or content_type
-                self.logger.debug(f"Detected content type: {content_type!r}")
-                width, height = img.size
-                self.logger.debug(f"Image size: {width}x{height}")
-            yield JobLogo(
-                image_url=response.body,
-                original_image_url=response.url,
-                width=width,
-                height=height,
-                format=Format.from_content_type(content_type),
-                source_url=source_url or request.url,
-            )
+            if logo := self.load_logo(response, content_type, request.url):
+                logo["alternatives"] = []
+                yield logo
         else:
             self.logger.debug("Assuming company homepage URL")
+            source_url = request.url
+            candidates = self.candidates[source_url] = Candidates()
+
             favicon_url = urljoin(response.url, "/favicon.ico")
             self.logger.debug(f"Favicon URL: {favicon_url}")
-            if response.url == favicon_url:
-                self.logger.warning("Favicon URL doesn't return an image")
-                return
-            yield Request(
-                favicon_url,
-                callback=self.parse,
-                cb_kwargs={"source_url": source_url or request.url},
-            )
+            candidates.pending += 1
+            yield self.get_icon_request(favicon_url, source_url, Kind.FAVICON)
+
+            apple_touch_icon_urls = {
+                response.urljoin(href)
+                for href in response.css(
+                    'link[rel*="apple-touch-icon"]::attr(href)'
+                ).getall()
+            }
             icons: set[Icon] = {
                 icon
                 for icon in favicon.tags(response.url, html)
@@ -114,8 +172,284 @@ class Spider(BaseSpider):
                 if icon.url.startswith("data:"):
                     self.logger.warning(f"Skipping data URL favicon at {response.url}")
                     continue
+                kind = (
+                    Kind.APPLE_TOUCH_ICON
+                    if icon.url in apple_touch_icon_urls
+                    else Kind.ICON
+                )
+                candidates.pending += 1
+                yield self.get_icon_request(icon.url, source_url, kind)
+
+            if manifest_href := response.css('link[rel="manifest"]::attr(href)').get():
+                self.logger.debug(f"Manifest URL: {manifest_href}")
+                candidates.pending += 1
                 yield Request(
-                    icon.url,
-                    callback=self.parse,
-                    cb_kwargs={"source_url": source_url or request.url},
+                    response.urljoin(manifest_href),
+                    callback=self.parse_manifest,
+                    errback=self.handle_icon_error,
+                    cb_kwargs={"source_url": source_url},
+                    dont_filter=True,
                 )
+
+    def parse_cached_logo(
+        self, response: Response, source_url: str
+    ) -> Generator[Request | JobLogo, None, None]:
+        entry = cast(dict[str, Any], self.logo_cache.get(source_url))
+        if response.status == 304:
+            self.logger.info(f"Logo of {source_url} not modified: {response.url}")
+            yield JobLogo(**entry["item"])
+        elif hashlib.sha256(response.body).hexdigest() == entry["hash"]:
+            self.logger.info(f"Logo of {source_url} unchanged: {response.url}")
+            yield JobLogo(**entry["item"])
+        else:
+            self.logger.info(f"Logo of {source_url} changed: {response.url}")
+            yield Request(source_url, dont_filter=True)
+
+    def handle_cached_logo_error(
+        self, failure: Failure
+    ) -> Generator[Request, None, None]:
+        source_url = failure.request.cb_kwargs["source_url"]  # type: ignore
+        self.logger.warning(
+            f"Failed to revalidate logo of {source_url}: {failure.value!r}"
+        )
+        yield Request(source_url, dont_filter=True)
+
+    def parse_manifest(
+        self, response: Response, source_url: str
+    ) -> Generator[Request | JobLogo, None, None]:
+        self.logger.info(f"Processing {response.url} (originally {source_url})")
+        try:
+            manifest = json.loads(response.body)
+            icon = select_manifest_icon(manifest.get("icons") or [])
+        except (ValueError, AttributeError, TypeError) as e:
+            self.logger.warning(f"Invalid manifest at {response.url}: {e}")
+        else:
+            if icon:
+                self.candidates[source_url].pending += 1
+                yield self.get_icon_request(
+                    response.urljoin(icon["src"]), source_url, Kind.MANIFEST
+                )
+        yield from self.resolve_candidate(source_url)
+
+    def parse_icon(
+        self, response: Response, source_url: str, kind: Kind
+    ) -> Generator[JobLogo, None, None]:
+        self.logger.info(f"Processing {response.url} (originally {source_url})")
+        logo = None
+        if (content_type := self.get_content_type(response)) is not None:
+            if hasattr(response, "text"):
+                self.logger.warning(f"Icon URL doesn't return an image: {response.url}")
+            else:
+                logo = self.load_logo(response, content_type, source_url)
+        yield from self.resolve_candidate(source_url, kind, logo)
+
+    def handle_icon_error(self, failure: Failure) -> Generator[JobLogo, None, None]:
+        if failure.check(DownloadCancelledError, CancelledError):
+            self.logger.warning(f"Image download cancelled: {failure.value}")
+        else:
+            self.logger.warning(f"Failed to download icon: {failure.value!r}")
+        yield from self.resolve_candidate(failure.request.cb_kwargs["source_url"])  # type: ignore
+
+    def spider_idle(self) -> None:
+        if self.candidates:
+            self.logger.warning(
+                f"Requests of {len(self.candidates)} sources got lost, flushing"
+            )
+            self.crawler.engine.crawl(
+                Request("data:,", callback=self.flush_candidates, dont_filter=True)
+            )
+            raise DontCloseSpider()
+
+    def flush_candidates(self, response: Response) -> Generator[JobLogo, None, None]:
+        while self.candidates:
+            source_url, candidates = self.candidates.popitem()
+            if logo := select_logo(candidates.logos):
+                yield logo
+
+    def item_scraped(self, item: JobLogo, response: Response) -> None:
+        icon_url = item["original_image_url"]
+        if validators := self.icon_validators.get(icon_url):
+            self.logo_cache.set(
+                self.source_links.get(item["source_url"], item["source_url"]),
+                dict(icon_url=icon_url, item=dict(item), **validators),
+            )
+
+    def get_revalidation_request(self, url: str, entry: dict[str, Any]) -> Request:
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return Request(
+            entry["icon_url"],
+            headers=headers,
+            callback=self.parse_cached_logo,
+            errback=self.handle_cached_logo_error,
+            cb_kwargs={"source_url": url},
+            meta={
+                "dont_cache": True,
+                "handle_httpstatus_list": [304],
+                "download_maxsize": self.image_maxsize,
+            },
+            dont_filter=True,
+        )
+
+    def get_icon_request(self, url: str, source_url: str, kind: Kind) -> Request:
+        return Request(
+            url,
+            callback=self.parse_icon,
+            errback=self.handle_icon_error,
+            cb_kwargs={"source_url": source_url, "kind": kind},
+            meta={"download_maxsize": self.image_maxsize},
+            # the same icon can be shared by several sources
+            dont_filter=True,
+        )
+
+    def load_logo(
+        self, response: Response, content_type: str, source_url: str
+    ) -> JobLogo | None:
+        if len(response.body) > self.image_maxsize:
+            self.logger.warning(
+                f"Image too large: {len(response.body)} bytes (max {self.image_maxsize})"
+            )
+            return None
+        try:
+            content_type, width, height = read_image_header(response.body, content_type)
+            format = Format.from_content_type(content_type)
+        except (UnidentifiedImageError, OSError, SyntaxError, ValueError) as e:
+            self.logger.warning(f"Unable to read image {response.url}: {e}")
+            return None
+        self.logger.debug(f"Detected content type: {content_type!r}")
+        self.logger.debug(f"Image size: {width}x{height}")
+        image_hash = hashlib.sha256(response.body).hexdigest()
+        self.icon_validators[response.url] = dict(
+            hash=image_hash,
+            etag=get_header(response, "ETag"),
+            last_modified=get_header(response, "Last-Modified"),
+        )
+        return JobLogo(
+            image_url=response.body,
+            image_hash=image_hash,
+            original_image_url=response.url,
+            width=width,
+            height=height,
+            format=format,
+            source_url=source_url,
+        )
+
+    def resolve_candidate(
+        self, source_url: str, kind: Kind | None = None, logo: JobLogo | None = None
+    ) -> Generator[JobLogo, None, None]:
+        if not (candidates := self.candidates.get(source_url)):
+            return
+        if kind and logo:
+            candidates.logos.append((kind, logo))
+        candidates.pending -= 1
+        if candidates.pending <= 0:
+            del self.candidates[source_url]
+            if logo := select_logo(candidates.logos):
+                yield logo
+            else:
+                self.logger.warning(f"No logo found for {source_url}")
+
+    def get_content_type(self, response: Response) -> str | None:
+        content_type = (response.headers.get("Content-Type") or b"").decode("utf8")
+        if not content_type.startswith(("image/", "text/")):
+            self.logger.warning(f"Declared content type: {content_type!r}")
+        elif "image/svg" in content_type:
+            self.logger.warning("SVG images are not supported")
+            return None
+        else:
+            self.logger.debug(f"Declared content type: {content_type!r}")
+        return content_type
+
+
+class LogoCache:
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        ttl: int | None = None,
+        kvs_name: str | None = None,
+    ):
+        self.ttl = ttl
+        self._cache: Cache | KeyValueStoreCache | None = None
+        if kvs_name:
+            self._cache = KeyValueStoreCache(kvs_name)
+        elif path:
+            self._cache = Cache(str(path))
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        if self._cache is None:
+            return None
+        return cast(dict[str, Any] | None, self._cache.get(key))
+
+    def set(self, key: str, entry: dict[str, Any]) -> None:
+        if self._cache is not None:
+            self._cache.set(key, entry, expire=self.ttl)
+
+    def close(self) -> None:
+        if self._cache is not None:
+            self._cache.close()
+
+
+def get_header(response: Response, name: str) -> str | None:
+    if value := response.headers.get(name):
+        return value.decode("latin-1")
+    return None
+
+
+def select_logo(logos: list[tuple[Kind, JobLogo]]) -> JobLogo | None:
+    if not logos:
+        return None
+    (_, best_logo), *alternatives = sorted(logos, key=get_logo_rank, reverse=True)
+    hashes = {best_logo["image_hash"]}
+    best_logo["alternatives"] = []
+    for kind, logo in alternatives:
+        if logo["image_hash"] not in hashes:
+            hashes.add(logo["image_hash"])
+            best_logo["alternatives"].append(
+                dict(
+                    url=logo["original_image_url"],
+                    width=logo["width"],
+                    height=logo["height"],
+                    format=str(logo["format"]),
+                    kind=str(kind),
+                )
+            )
+    return best_logo
+
+
+def get_logo_rank(candidate: tuple[Kind, JobLogo]) -> tuple[bool, bool, int]:
+    kind, logo = candidate
+    width, height = logo["width"], logo["height"]
+    return (width == height, kind in PREFERRED_KINDS, width * height)
+
+
+def select_manifest_icon(icons: list[dict[str, Any]]) -> dict[str, Any] | None:
+    icons = [
+        icon
+        for icon in icons
+        if icon.get("src")
+        and "svg" not in icon.get("type", "")
+        and not icon["src"].endswith(".svg")
+        and not icon["src"].startswith("data:")
+    ]
+    return max(icons, key=get_manifest_icon_size, default=None)
+
+
+def get_manifest_icon_size(icon: dict[str, Any]) -> int:
+    sizes = []
+    for size in icon.get("sizes", "").split():
+        try:
+            width, height = map(int, size.lower().split("x"))
+        except ValueError:
+            continue
+        sizes.append(width * height)
+    return max(sizes, default=0)
+
+
+# Pillow only reads the header when opening an image, the pixels aren't decoded
+def read_image_header(body: bytes, content_type: str) -> tuple[str, int, int]:
+    with Image.open(BytesIO(body)) as img:
+        width, height = img.size
+        return img.get_format_mimetype() or content_type, width, height
@@ -1,20 +1,27 @@
 import hashlib
 import json
+import math
 import re
 import uuid
+from dataclasses import dataclass, field
 from datetime import date, datetime
 from functools import lru_cache
 from logging import Logger
 from pathlib import Path
 from typing import Any, Generator, Iterable, cast
-from urllib.parse import parse_qs, urljoin, urlparse
+from urllib.parse import parse_qs, parse_qsl, urlencode, urljoin, urlparse
 
+from diskcache import Cache
 from itemloaders.processors import Compose, Identity, MapCompose, TakeFirst
-from scrapy import Request, Spider as BaseSpider
+from scrapy import Request, Spider as BaseSpider, signals
+from scrapy.crawler import Crawler
+from scrapy.exceptions import DontCloseSpider, IgnoreRequest
 from scrapy.http.response import Response
 from scrapy.http.response.html import HtmlResponse
 from scrapy.http.response.text import TextResponse
 from scrapy.loader import ItemLoader
+from scrapy.spidermiddlewares.httperror import HttpError
+from twisted.python.failure import Failure
 
 from jg.plucker.items import Job
 from jg.plucker.processors import first, split
@@ -35,38 +42,6 @@ MULTIPLE_LOCATIONS_RE = re.compile(
 
 WIDGET_DATA_RE = re.compile(r"window\.__LMC_CAREER_WIDGET__\.push\((.+)\);")
 
-WIDGET_DATA_SCRIPT_JSON_RE = re.compile(
-    r"""
-        =JSON\.parse\('
-        (?P<data>
-            {"[^"]+":         # JSON object key
-            (                 # one or more characters that are not the start of "function" or "JSON.parse"
-                (?!function)
-                (?!JSON\.parse)
-                .
-            )+
-        )
-        '\)
-        (}|,\w+={)
-    """,
-    re.VERBOSE,
-)
-
-WIDGET_DATA_SCRIPT_MESS_RE = re.compile(
-    r"""
-        \([^"]+
-        "
-            (?P<key>[^"]+)
-        "
-        \s*,\s*
-        "
-            (?P<value>[^"]+)
-        "
-        \)
-    """,
-    re.VERBOSE,
-)
-
 SCRIPT_URL_RE = re.compile(
     r"""
         /assets/js/
@@ -77,16 +52,52 @@ SCRIPT_URL_RE = re.compile(
     re.VERBOSE,
 )
 
-REACT_CHUNK_RE = re.compile(r'"(?P<chunk_name>react\.[^\.]+\.react.min.js)"')
+RESULTS_COUNT_RE = re.compile(r'"resultsCount":(?P<count>\d+)')
+
+LISTING_DOWNLOAD_SLOT = "jobs.cz-listing"
+
+WIDGET_SCRIPT_JSON_MARKER = "JSON.parse('{\""
+
+WIDGET_SCRIPT_MESS_MARKERS = {
+    '"widgetId"': "widgetId",
+    '"widgetApiKey"': "widgetApiKey",
+}
+
+REACT_CHUNK_MARKER = '"react.'
+
+JS_ESCAPE_RE = re.compile(r"\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)", re.DOTALL)
+
+JS_ESCAPES = {
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+    "v": "\v",
+    "0": "\0",
+}
 
 WIDGET_QUERY_PATH = Path(__file__).parent / "widget.gql"
 
+WIDGET_JOB_VARIABLES = ["jobAdId", "rps", "impressionId", "referer"]
+
+GQL_QUERY_RE = re.compile(
+    r"\s*query\s+\w+\((?P<definitions>[^)]*)\)\s*{(?P<body>.*)}\s*$", re.DOTALL
+)
+
+GQL_DEFINITION_RE = re.compile(r"\$(?P<name>\w+):\s*(?P<type>[^\s$]+)")
+
+GQL_VARIABLE_RE = re.compile(r"\$(?P<name>\w+)")
+
 
 class Spider(BaseSpider):
     name = "jobs-jobscz"
 
     custom_settings = {
         "RETRY_TIMES": 5,
+        # Listing pages are fetched in parallel, but in their own download slot,
+        # so that they don't starve the job pages or hammer the site
+        "DOWNLOAD_SLOTS": {LISTING_DOWNLOAD_SLOT: {"concurrency": 4}},
     }
 
     start_urls = [
@@ -97,10 +108,46 @@ class Spider(BaseSpider):
 
     employment_types_labels = ["Typ pracovního poměru", "Employment form"]
 
+    max_listing_pages = 50
+
+    # Widget configs can be persisted across runs by setting a path, e.g. as a
+    # spider param, otherwise they're only cached in memory for the current run
+    widget_configs_path: str | None = None
+
+    widget_configs_ttl = 60 * 60 * 24 * 7  # seconds
+
+    widget_batch_size = 10
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.widget_configs = WidgetConfigCache(
+            self.widget_configs_path, ttl=self.widget_configs_ttl
+        )
+        self.widget_configs_waiting: dict[str, list[tuple[str, Job, str]]] = {}
+        self.widget_configs_failed: set[str] = set()
+        self.widget_batches: dict[tuple[str, str, str], list[tuple[str, Job, str]]] = {}
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler, *args: Any, **kwargs: Any) -> "Spider":
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(spider.spider_idle, signal=signals.spider_idle)
+        return spider
+
+    def closed(self, reason: str) -> None:
+        for widget_host, waiting in self.widget_configs_waiting.items():
+            if waiting:
+                self.logger.warning(
+                    f"Widget config for {widget_host} never resolved, "
+                    f"{len(waiting)} jobs left unscraped"
+                )
+        self.widget_configs.close()
+
     def logger_trk(self, trk: str) -> Logger:
         return self.logger.logger.getChild(trk)
 
-    def parse(self, response: Response) -> Generator[Request, None, None]:
+    def parse(
+        self, response: Response, follow_next: bool = True
+    ) -> Generator[Request, None, None]:
         response = cast(HtmlResponse, response)
         page = get_page(response.url)
         self.logger.debug(f"Parsing listing {response.url} (page: {page})")
@@ -135,9 +182,29 @@ class Spider(BaseSpider):
             )
         self.logger.debug(f"Found {len(cards)} job cards on {response.url}")
 
+        if not follow_next:
+            return
         next_page_css = f'.Pagination__link[href*="page={page + 1}"]::attr(href)'
         if next_page_link := response.css(next_page_css).get():
-            yield response.follow(next_page_link, callback=self.parse)
+            next_page_url = response.urljoin(next_page_link)
+            page_count = get_page_count(response.text, len(cards))
+            if page == 1 and page_count:
+                last_page = min(page_count, self.max_listing_pages)
+                self.logger.debug(
+                    f"Fanning out {response.url} to pages 2-{last_page} "
+                    f"(pages: {page_count})"
+                )
+                for next_page in range(2, last_page + 1):
+                    yield Request(
+                        set_page(next_page_url, next_page),
+                        callback=self.parse,
+                        # the last page keeps following the pagination
+                        # in case there are more pages than expected
+                        cb_kwargs=dict(follow_next=next_page == last_page),
+                        meta=dict(download_slot=LISTING_DOWNLOAD_SLOT),
+                    )
+            else:
+                yield response.follow(next_page_link, callback=self.parse)
         else:
             self.logger.debug(f"No next page found for {response.url}")
 
@@ -181,10 +248,32 @@ class Spider(BaseSpider):
     def parse_job_widget_data(
         self, response: HtmlResponse, item: Job, trk: str
     ) -> Generator[Request, None, None]:
+        widget_host = get_widget_host(response.url)
+        if widget_config := self.widget_configs.get(widget_host):
+            self.logger_trk(trk).debug(f"Using cached widget config of {widget_host}")
+            yield from self.parse_job_widget(
+                response.url, item, trk=trk, **widget_config
+            )
+            return
         try:
             self.logger_trk(trk).debug("Looking for widget data in the HTML")
             widget_data = json.loads(response.css("script::text").re(WIDGET_DATA_RE)[0])
         except IndexError:
+            if widget_host in self.widget_configs_failed:
+                self.logger_trk(trk).warning(
+                    f"Widget config for {widget_host} not resolved, skipping"
+                )
+                return
+            if widget_host in self.widget_configs_waiting:
+                self.logger_trk(trk).debug(
+                    f"Waiting for widget config of {widget_host} to be resolved"
+                )
+                self.widget_configs_waiting[widget_host].append(
+                    (response.url, item, trk)
+                )
+                return
+            self.widget_configs_waiting[widget_host] = []
+
             self.logger_trk(trk).debug("Looking for widget data in attached JavaScript")
             script_urls = sorted(
                 map(
@@ -199,6 +288,7 @@ class Spider(BaseSpider):
             yield response.follow(
                 script_urls.pop(0),
                 callback=self.parse_job_widget_script,
+                errback=self.handle_widget_script_error,
                 cb_kwargs=dict(
                     item=item,
                     url=response.url,
@@ -207,7 +297,7 @@ class Spider(BaseSpider):
                 ),
             )
         else:
-            yield from self.parse_job_widget(
+            yield from self.resolve_widget_config(
                 response.url,
                 item,
                 widget_host=widget_data["host"],
@@ -226,10 +316,12 @@ class Spider(BaseSpider):
     ) -> Generator[Request, None, None]:
         script_response = cast(TextResponse, script_response)
 
-        if data := parse_widget_script_json(script_response.text):
+        script_data = scan_widget_script(script_response.text)
+
+        if data := script_data.config:
             widget_name = select_widget(list(data["widgets"].keys()))
             widget_data = data["widgets"][widget_name]
-            yield from self.parse_job_widget(
+            yield from self.resolve_widget_config(
                 url,
                 item,
                 widget_host=data["host"],
@@ -237,8 +329,8 @@ class Spider(BaseSpider):
                 widget_id=widget_data["id"],
                 trk=trk,
             )
-        elif mess := parse_widget_script_mess(script_response.text):
-            yield from self.parse_job_widget(
+        elif mess := script_data.mess:
+            yield from self.resolve_widget_config(
                 url,
                 item,
                 widget_host=get_widget_host(url),
@@ -246,7 +338,7 @@ class Spider(BaseSpider):
                 widget_id=mess["widgetId"],
                 trk=trk,
             )
-        elif chunk_names := parse_react_chunk_names(script_response.text):
+        elif chunk_names := script_data.react_chunk_names:
             chunk_urls = [
                 url.replace("react.min.js", chunk_name) for chunk_name in chunk_names
             ]
@@ -254,6 +346,7 @@ class Spider(BaseSpider):
             yield Request(
                 chunk_urls.pop(0),
                 callback=self.parse_job_widget_script,
+                errback=self.handle_widget_script_error,
                 cb_kwargs=dict(
                     item=item,
                     url=url,
@@ -266,6 +359,7 @@ class Spider(BaseSpider):
             yield Request(
                 script_urls.pop(0),
                 callback=self.parse_job_widget_script,
+                errback=self.handle_widget_script_error,
                 cb_kwargs=dict(
                     item=item,
                     url=url,
@@ -274,8 +368,66 @@ class Spider(BaseSpider):
                 ),
             )
         else:
+            self.fail_widget_config(get_widget_host(url))
             raise NotImplementedError("Widget data not found")
 
+    # Scripts failing with server or network errors are tried once more, after
+    # the retries of RetryMiddleware. The repeated request must bypass the
+    # dupefilter, which has already seen the URL.
+    def handle_widget_script_error(
+        self, failure: Failure
+    ) -> Generator[Request, None, None]:
+        request = cast(Request, failure.request)  # type: ignore
+        trk = request.cb_kwargs["trk"]
+        if is_transient_error(failure) and not request.meta.get("widget_script_retry"):
+            self.logger_trk(trk).warning(
+                f"Failed to download widget script {request.url}: {failure.value!r}, "
+                "trying again"
+            )
+            yield request.replace(
+                dont_filter=True, meta={**request.meta, "widget_script_retry": True}
+            )
+            return
+        self.logger_trk(trk).warning(
+            f"Failed to download widget script {request.url}: {failure.value!r}"
+        )
+        self.fail_widget_config(get_widget_host(request.cb_kwargs["url"]))
+
+    # Looking for the widget config fails the same way for every job of the host,
+    # so the host is remembered and its jobs are dropped, both the waiting ones
+    # and those coming later, instead of downloading the scripts again for each
+    def fail_widget_config(self, widget_host: str) -> None:
+        self.widget_configs_failed.add(widget_host)
+        if waiting := self.widget_configs_waiting.pop(widget_host, []):
+            self.logger.warning(
+                f"Widget config for {widget_host} not resolved, "
+                f"{len(waiting)} waiting jobs left unscraped"
+            )
+
+    def resolve_widget_config(
+        self,
+        url: str,
+        item: Job,
+        widget_host: str,
+        widget_api_key: str,
+        widget_id: str,
+        trk: str,
+    ) -> Generator[Request, None, None]:
+        widget_config = dict(
+            widget_host=widget_host,
+            widget_api_key=widget_api_key,
+            widget_id=widget_id,
+        )
+        self.widget_configs.set(get_widget_host(url), widget_config)
+        yield from self.parse_job_widget(url, item, trk=trk, **widget_config)
+
+        waiting = self.widget_configs_waiting.pop(get_widget_host(url), [])
+        for waiting_url, waiting_item, waiting_trk in waiting:
+            self.logger_trk(waiting_trk).debug("Widget config resolved")
+            yield from self.parse_job_widget(
+                waiting_url, waiting_item, trk=waiting_trk, **widget_config
+            )
+
     def parse_job_widget(
         self,
         url: str,
@@ -290,9 +442,64 @@ class Spider(BaseSpider):
         loader.add_value("company_url", f"https://{widget_host}")
         loader.add_value("source_urls", url)
 
-        self.logger_trk(trk).debug("Requesting data from job widget API")
-        params = get_params(url)
-        yield Request(
+        widget_job = (url, loader.load_item(), trk)
+        widget_config = (widget_host, widget_api_key, widget_id)
+        if self.widget_batch_size <= 1:
+            yield self.get_widget_request(widget_config, [widget_job])
+            return
+
+        widget_jobs = self.widget_batches.setdefault(widget_config, [])
+        widget_jobs.append(widget_job)
+        self.logger_trk(trk).debug(
+            f"Batching request to job widget API ({len(widget_jobs)}/{self.widget_batch_size})"
+        )
+        if len(widget_jobs) >= self.widget_batch_size:
+            yield self.get_widget_request(
+                widget_config, self.widget_batches.pop(widget_config)
+            )
+
+    def spider_idle(self) -> None:
+        if self.widget_batches:
+            self.logger.debug(
+                f"Flushing {len(self.widget_batches)} incomplete job widget API batches"
+            )
+            while self.widget_batches:
+                self.crawler.engine.crawl(
+                    self.get_widget_request(*self.widget_batches.popitem())
+                )
+            raise DontCloseSpider()
+
+    def get_widget_request(
+        self,
+        widget_config: tuple[str, str, str],
+        widget_jobs: list[tuple[str, Job, str]],
+    ) -> Request:
+        widget_host, widget_api_key, widget_id = widget_config
+        variables = get_widget_variables(widget_host, widget_id)
+        if len(widget_jobs) == 1:
+            url, item, trk = widget_jobs[0]
+            self.logger_trk(trk).debug("Requesting data from job widget API")
+            operation_name = "DETAIL_QUERY"
+            query = load_gql(WIDGET_QUERY_PATH)
+            variables.update(get_widget_job_variables(url))
+            callback = self.parse_job_widget_api
+            errback = None
+            cb_kwargs = dict(item=item, trk=trk)
+        else:
+            self.logger.debug(
+                f"Requesting data of {len(widget_jobs)} jobs from job widget API "
+                f"of {widget_host}"
+            )
+            operation_name = "DETAIL_BATCH_QUERY"
+            query = get_batch_gql(WIDGET_QUERY_PATH, len(widget_jobs))
+            for n, (url, item, trk) in enumerate(widget_jobs):
+                self.logger_trk(trk).debug("Requesting data from job widget API")
+                for name, value in get_widget_job_variables(url).items():
+                    variables[f"{name}{n}"] = value
+            callback = self.parse_job_widget_batch_api
+            errback = self.handle_widget_batch_error
+            cb_kwargs = dict(widget_config=widget_config, widget_jobs=widget_jobs)
+        return Request(
             "https://api.capybara.lmc.cz/api/graphql/widget",
             method="POST",
             headers={
@@ -300,29 +507,11 @@ class Spider(BaseSpider):
                 "X-Api-Key": widget_api_key,
             },
             body=json.dumps(
-                dict(
-                    operationName="DETAIL_QUERY",
-                    variables=dict(
-                        jobAdId=params["id"],
-                        gaId=None,
-                        lmcVisitorId=None,
-                        rps=int(params["rps"]),
-                        impressionId=params["impressionId"],
-                        cookieConsent=[],
-                        matejId="",
-                        jobsUserId="",
-                        timeId=str(uuid.uuid4()),
-                        widgetId=widget_id,
-                        host=widget_host,
-                        referer=url,
-                        version="v3.49.1",
-                        pageReferer="https://www.jobs.cz/",
-                    ),
-                    query=load_gql(WIDGET_QUERY_PATH),
-                )
+                dict(operationName=operation_name, variables=variables, query=query)
             ),
-            callback=self.parse_job_widget_api,
-            cb_kwargs=dict(item=loader.load_item(), trk=trk),
+            callback=callback,
+            errback=errback,
+            cb_kwargs=cb_kwargs,
         )
 
     def parse_job_widget_api(
@@ -337,6 +526,46 @@ class Spider(BaseSpider):
             raise ValueError(f"Invalid JSON: {response!r}\n{response.text!r}") from e
         job_ad = payload["data"]["widget"]["jobAd"]
 
+        yield self.load_job_ad(response, item, job_ad)
+
+    def parse_job_widget_batch_api(
+        self,
+        response: Response,
+        widget_config: tuple[str, str, str],
+        widget_jobs: list[tuple[str, Job, str]],
+    ) -> Generator[Job | Request, None, None]:
+        response = cast(TextResponse, response)
+        self.logger.debug(f"Parsing job widget API response of {len(widget_jobs)} jobs")
+
+        try:
+            data = cast(dict, response.json()).get("data") or {}
+        except json.JSONDecodeError:
+            data = {}
+        for n, widget_job in enumerate(widget_jobs):
+            url, item, trk = widget_job
+            if (widget := data.get(f"job{n}")) and (job_ad := widget.get("jobAd")):
+                self.logger_trk(trk).debug("Parsing job widget API response")
+                yield self.load_job_ad(response, item, job_ad)
+            else:
+                self.logger_trk(trk).warning(
+                    "Job missing in batched job widget API response, requesting it separately"
+                )
+                yield self.get_widget_request(widget_config, [widget_job])
+
+    def handle_widget_batch_error(
+        self, failure: Failure
+    ) -> Generator[Request, None, None]:
+        request = cast(Request, failure.request)  # type: ignore
+        widget_config = request.cb_kwargs["widget_config"]
+        widget_jobs = request.cb_kwargs["widget_jobs"]
+        self.logger.warning(
+            f"Batched job widget API request failed: {failure.value!r}, "
+            f"requesting {len(widget_jobs)} jobs separately"
+        )
+        for widget_job in widget_jobs:
+            yield self.get_widget_request(widget_config, [widget_job])
+
+    def load_job_ad(self, response: Response, item: Job, job_ad: dict[str, Any]) -> Job:
         loader = Loader(item=item, response=response)
         loader.add_value("description_html", job_ad["content"]["htmlContent"])
 
@@ -351,7 +580,31 @@ class Spider(BaseSpider):
         for employment_type in job_ad["parameters"]["employmentTypes"]:
             loader.add_value("employment_types", employment_type)
 
-        yield loader.load_item()
+        return loader.load_item()
+
+
+class WidgetConfigCache:
+    def __init__(self, path: str | Path | None = None, ttl: int | None = None):
+        self.ttl = ttl
+        self._configs: dict[str, dict[str, str]] = {}
+        self._disk_cache = Cache(str(path)) if path else None
+
+    def get(self, key: str) -> dict[str, str] | None:
+        if config := self._configs.get(key):
+            return config
+        if self._disk_cache is not None and (config := self._disk_cache.get(key)):
+            self._configs[key] = cast(dict[str, str], config)
+            return self._configs[key]
+        return None
+
+    def set(self, key: str, config: dict[str, str]) -> None:
+        self._configs[key] = config
+        if self._disk_cache is not None:
+            self._disk_cache.set(key, config, expire=self.ttl)
+
+    def close(self) -> None:
+        if self._disk_cache is not None:
+            self._disk_cache.close()
 
 
 def get_page(url: str) -> int:
@@ -360,6 +613,18 @@ def get_page(url: str) -> int:
     return 1
 
 
+def set_page(url: str, page: int) -> str:
+    parts = urlparse(url)
+    params = [(name, value) for name, value in parse_qsl(parts.query) if name != "page"]
+    return parts._replace(query=urlencode(params + [("page", page)])).geturl()
+
+
+def get_page_count(html: str, page_size: int) -> int | None:
+    if page_size and (match := RESULTS_COUNT_RE.search(html)):
+        return math.ceil(int(match.group("count")) / page_size)
+    return None
+
+
 def get_trk(seed: str) -> str:
     return hashlib.sha1(seed.encode()).hexdigest()[:10]
 
@@ -369,6 +634,69 @@ def load_gql(path: str | Path) -> str:
     return Path(path).read_text()
 
 
+# Turns the query into one which asks for several jobs at once. Each job gets
+# its own aliased copy of the query body and its own copy of job variables.
+@lru_cache
+def get_batch_gql(path: str | Path, size: int) -> str:
+    match = GQL_QUERY_RE.match(load_gql(path))
+    if not match:
+        raise ValueError(f"Unexpected query format: {path}")
+    definitions = GQL_DEFINITION_RE.findall(match.group("definitions"))
+    batch_definitions = [
+        f"${name}: {type_}"
+        for name, type_ in definitions
+        if name not in WIDGET_JOB_VARIABLES
+    ]
+    batch_bodies = []
+    for n in range(size):
+        batch_definitions.extend(
+            f"${name}{n}: {type_}"
+            for name, type_ in definitions
+            if name in WIDGET_JOB_VARIABLES
+        )
+        body = GQL_VARIABLE_RE.sub(
+            lambda match: (
+                f"${match.group('name')}{n}"
+                if match.group("name") in WIDGET_JOB_VARIABLES
+                else match.group(0)
+            ),
+            match.group("body").strip(),
+        )
+        batch_bodies.append(f"job{n}: {body}")
+    return (
+        "query DETAIL_BATCH_QUERY(\n  "
+        + "\n  ".join(batch_definitions)
+        + "\n) {\n  "
+        + "\n  ".join(batch_bodies)
+        + "\n}\n"
+    )
+
+
+def get_widget_variables(widget_host: str, widget_id: str) -> dict[str, Any]:
+    return dict(
+        gaId=None,
+        lmcVisitorId=None,
+        cookieConsent=[],
+        matejId="",
+        jobsUserId="",
+        timeId=str(uuid.uuid4()),
+        widgetId=widget_id,
+        host=widget_host,
+        version="v3.49.1",
+        pageReferer="https://www.jobs.cz/",
+    )
+
+
+def get_widget_job_variables(url: str) -> dict[str, Any]:
+    params = get_params(url)
+    return dict(
+        jobAdId=params["id"],
+        rps=int(params["rps"]),
+        impressionId=params["impressionId"],
+        referer=url,
+    )
+
+
 def select_widget(names: list[str]) -> str:
     for name in names:
         if name.startswith("main"):
@@ -376,28 +704,125 @@ def select_widget(names: list[str]) -> str:
     return names[0]
 
 
+@dataclass
+class WidgetScriptData:
+    config: dict[str, Any] | None = None
+    mess: dict[str, str] | None = None
+    react_chunk_names: list[str] = field(default_factory=list)
+
+
+# Scans minified JavaScript bundles, which can be megabytes large, in a single
+# pass, jumping from one marker to another. Stops at the widget config, because
+# it takes precedence over anything else found in the script.
+def scan_widget_script(text: str) -> WidgetScriptData:
+    data = WidgetScriptData()
+    mess = {}
+    markers = [
+        WIDGET_SCRIPT_JSON_MARKER,
+        *WIDGET_SCRIPT_MESS_MARKERS.keys(),
+        REACT_CHUNK_MARKER,
+    ]
+    positions = {marker: text.find(marker) for marker in markers}
+    while found := [(pos, marker) for marker, pos in positions.items() if pos != -1]:
+        pos, marker = min(found)
+        next_pos = pos + len(marker)
+        if marker == WIDGET_SCRIPT_JSON_MARKER:
+            start = pos + len("JSON.parse('")
+            end = find_js_string_end(text, start)
+            if end == -1:
+                break
+            next_pos = end
+            if config := parse_widget_script_json(text[start:end]):
+                data.config = config
+                break
+        elif marker == REACT_CHUNK_MARKER:
+            if chunk_name := parse_react_chunk_name(text, pos):
+                data.react_chunk_names.append(chunk_name)
+        elif value := parse_widget_script_mess(text, pos, marker):
+            mess[WIDGET_SCRIPT_MESS_MARKERS[marker]] = value
+        for other_marker, other_pos in positions.items():
+            if other_pos != -1 and other_pos < next_pos:
+                positions[other_marker] = text.find(other_marker, next_pos)
+    if "widgetId" in mess and "widgetApiKey" in mess:
+        data.mess = {"widgetId": mess["widgetId"], "widgetApiKey": mess["widgetApiKey"]}
+    return data
+
+
+def find_js_string_end(text: str, start: int, quote: str = "'") -> int:
+    pos = start
+    while (pos := text.find(quote, pos)) != -1:
+        backslashes = 0
+        while text[pos - backslashes - 1] == "\\":
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return pos
+        pos += 1
+    return -1
+
+
+def unescape_js_string(text: str) -> str:
+    if "\\" not in text:
+        return text
+    return JS_ESCAPE_RE.sub(unescape_js_char, text)
+
+
+def unescape_js_char(match: re.Match) -> str:
+    escape = match.group(1)
+    if len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    return JS_ESCAPES.get(escape, escape)
+
+
 def parse_widget_script_json(text: str) -> dict[str, Any] | None:
-    for match in re.finditer(WIDGET_DATA_SCRIPT_JSON_RE, text):
-        data_text = match.group("data")
-        data_text = re.sub(r"\'", r"\\'", data_text)
-        data_text = re.sub(r'\\\\"', r"\"", data_text)
-        data = json.loads(data_text)
-        if "widgets" in data:
-            return data
+    if '"widgets"' not in text:
+        return None
+    try:
+        data = json.loads(unescape_js_string(text), strict=False)
+    except json.JSONDecodeError:
+        return None
+    if isinstance(data, dict) and "widgets" in data:
+        return data
     return None
 
 
-def parse_widget_script_mess(text: str) -> dict[str, str] | None:
-    matches = re.finditer(WIDGET_DATA_SCRIPT_MESS_RE, text)
-    data = {match.group("key"): match.group("value") for match in matches}
-    try:
-        return {"widgetId": data["widgetId"], "widgetApiKey": data["widgetApiKey"]}
-    except KeyError:
+# Matches e.g. n()(r,"widgetApiKey","555a0cef...")
+def parse_widget_script_mess(text: str, pos: int, marker: str) -> str | None:
+    paren_pos = text.rfind("(", max(pos - 100, 0), pos)
+    if paren_pos == -1 or paren_pos == pos - 1 or '"' in text[paren_pos:pos]:
         return None
+    value_pos = pos + len(marker)
+    while text[value_pos : value_pos + 1].isspace():
+        value_pos += 1
+    if text[value_pos : value_pos + 1] != ",":
+        return None
+    value_pos += 1
+    while text[value_pos : value_pos + 1].isspace():
+        value_pos += 1
+    if text[value_pos : value_pos + 1] != '"':
+        return None
+    value_end = text.find('"', value_pos + 1)
+    if value_end in (-1, value_pos + 1) or text[value_end + 1 : value_end + 2] != ")":
+        return None
+    return text[value_pos + 1 : value_end]
+
+
+# Matches e.g. "react.50e0a46e.react.min.js"
+def parse_react_chunk_name(text: str, pos: int) -> str | None:
+    end = text.find('"', pos + 1, pos + 100)
+    chunk_name = text[pos + 1 : end]
+    if end == -1 or not chunk_name.endswith(".react.min.js"):
+        return None
+    if hash := chunk_name.removeprefix("react.").removesuffix(".react.min.js"):
+        if "." not in hash:
+            return chunk_name
+    return None
 
 
-def parse_react_chunk_names(text: str) -> list[str]:
-    return [match.group("chunk_name") for match in REACT_CHUNK_RE.finditer(text)]
+def is_transient_error(failure: Failure) -> bool:
+    if failure.check(HttpError):
+        status = failure.value.response.status
+        return status >= 500 or status == 429
+    return not failure.check(IgnoreRequest)
 
 
 def get_widget_host(url: str) -> str:
@@ -1,17 +1,32 @@
 import html
-from typing import Generator, cast
+import re
+from typing import Any, AsyncGenerator, Generator
 
 from itemloaders.processors import Compose, Identity, MapCompose, TakeFirst
-from scrapy import Spider as BaseSpider
-from scrapy.http import Response, TextResponse
+from scrapy import Request, Spider as BaseSpider
+from scrapy.crawler import Crawler
+from scrapy.http import Response
 from scrapy.loader import ItemLoader
 
+from jg.plucker.cache import FeedCache
 from jg.plucker.items import Job
+from jg.plucker.json_stream import iter_json_array
 from jg.plucker.processors import parse_iso_date
 
 
 EXPORT_URL = "https://feedback.startupjobs.cz/feed/juniorguru2.php"
 
+OFFER_FIELDS = [
+    "url",
+    "position",
+    "startup",
+    "cities",
+    "jobtypes",
+    "lastUpdate",
+    "description",
+    "startupLogo",
+]
+
 
 class Spider(BaseSpider):
     name = "jobs-startupjobs"
@@ -20,12 +35,40 @@ class Spider(BaseSpider):
 
     min_items = 1
 
+    feed_cache: FeedCache | None = None
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler, *args: Any, **kwargs: Any) -> "Spider":
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.feed_cache = FeedCache.from_crawler(crawler)
+        return spider
+
+    async def start(self) -> AsyncGenerator[Request | Job, None]:
+        for url in self.start_urls:
+            if self.feed_cache and (offers := self.feed_cache.get(url)) is not None:
+                self.logger.info(f"Using cached feed {url}")
+                for job in self.parse_offers(offers, url):
+                    yield job
+            else:
+                yield Request(url, dont_filter=True)
+
+    def closed(self, reason: str) -> None:
+        if self.feed_cache:
+            self.feed_cache.close()
+
     def parse(self, response: Response) -> Generator[Job, None, None]:
-        response = cast(TextResponse, response)
-        for offer in response.json()["offers"]:
-            loader = Loader(item=Job(), response=response)
+        offers = parse_offers(response)
+        if self.feed_cache and response.request:
+            self.feed_cache.set(response.request.url, offers)
+        yield from self.parse_offers(offers, response.url)
+
+    def parse_offers(
+        self, offers: list[dict[str, Any]], url: str
+    ) -> Generator[Job, None, None]:
+        for offer in offers:
+            loader = Loader(item=Job())
             loader.add_value("source", self.name)
-            loader.add_value("source_urls", response.url)
+            loader.add_value("source_urls", url)
             loader.add_value("title", offer["position"])
             loader.add_value("url", offer["url"])
             loader.add_value("company_name", offer["startup"])
@@ -40,6 +83,25 @@ class Spider(BaseSpider):
             yield loader.load_item()
 
 
+def parse_offer_id(url: str) -> int:
+    if match := re.search(r"/nabidka/(\d+)/", url):
+        return int(match.group(1))
+    raise ValueError(f"Could not parse StartupJobs ID: {url}")
+
+
+# Keeps only the fields needed by the spiders, so that the result is small
+# enough to be cached and shared, see 'FeedCache'
+def parse_offers(response: Response) -> list[dict[str, Any]]:
+    return [
+        {field: offer[field] for field in OFFER_FIELDS if field in offer}
+        for offer in iter_json_array(response.body, "offers")
+    ]
+
+
+def get_offer_ids(offers: list[dict[str, Any]]) -> set[int]:
+    return {parse_offer_id(offer["url"]) for offer in offers}
+
+
 def drop_remote(types: list[str]) -> list[str]:
     return [type_ for type_ in types if type_.lower() != "remote"]
 
@@ -0,0 +1,80 @@
+import json
+import re
+from typing import Any, Generator
+
+
+WHITESPACE_RE = re.compile(rb"[ \t\n\r]*")
+
+STRUCTURE_RE = re.compile(rb'["\[\]{}]')
+
+STRING_END_RE = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+SCALAR_END_RE = re.compile(rb"[^ \t\n\r,\]}]*")
+
+BOM = b"\xef\xbb\xbf"
+
+
+# Yields items of a JSON array one by one, without decoding the whole document
+# first. The array can be either the root of the document, or a value of a key
+# in the root object. Boundaries of the items are found in the raw bytes and
+# only the items themselves get decoded, so peak memory stays at the size of
+# the raw body plus a single item, not the entire text and object tree.
+def iter_json_array(data: bytes, key: str | None = None) -> Generator[Any, None, None]:
+    pos = skip_whitespace(data, len(BOM) if data.startswith(BOM) else 0)
+    if key is not None:
+        pos = find_object_key(data, pos, key)
+    pos = expect(data, pos, b"[")
+    if data.startswith(b"]", pos):
+        return
+    while True:
+        end = find_value_end(data, pos)
+        yield json.loads(data[pos:end])
+        pos = skip_whitespace(data, end)
+        if data.startswith(b"]", pos):
+            return
+        pos = expect(data, pos, b",")
+
+
+def find_object_key(data: bytes, pos: int, key: str) -> int:
+    pos = expect(data, pos, b"{")
+    while data.startswith(b'"', pos):
+        end = find_value_end(data, pos)
+        name = json.loads(data[pos:end])
+        pos = expect(data, skip_whitespace(data, end), b":")
+        if name == key:
+            return pos
+        pos = skip_whitespace(data, find_value_end(data, pos))
+        if data.startswith(b",", pos):
+            pos = skip_whitespace(data, pos + 1)
+    raise KeyError(key)
+
+
+# Only jumps between quotes and brackets, the rest is left to the regular
+# expressions, which is what keeps this fast enough in pure Python
+def find_value_end(data: bytes, pos: int) -> int:
+    if not data.startswith((b"{", b"[", b'"'), pos):
+        return SCALAR_END_RE.match(data, pos).end()  # type: ignore
+    depth = 0
+    while True:
+        if data.startswith(b'"', pos):
+            if not (match := STRING_END_RE.match(data, pos + 1)):
+                raise ValueError(f"Unterminated string at position {pos}")
+            pos = match.end()
+        else:
+            depth += 1 if data.startswith((b"{", b"["), pos) else -1
+            pos += 1
+        if depth == 0:
+            return pos
+        if not (match := STRUCTURE_RE.search(data, pos)):
+            raise ValueError(f"Unterminated value at position {pos}")
+        pos = match.start()
+
+
+def expect(data: bytes, pos: int, char: bytes) -> int:
+    if not data.startswith(char, pos):
+        raise ValueError(f"Expecting {char.decode()!r} at position {pos}")
+    return skip_whitespace(data, pos + 1)
+
+
+def skip_whitespace(data: bytes, pos: int) -> int:
+    return WHITESPACE_RE.match(data, pos).end()  # type: ignore
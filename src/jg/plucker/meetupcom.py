@@ -0,0 +1,101 @@
+import re
+from typing import NotRequired, TypedDict
+
+
+# This module is imported also by spiders which only need to recognize events
+# of these groups, keep its imports light
+
+
+class GroupSpec(TypedDict):
+    name: NotRequired[str]
+    description: str
+    homepage_url: NotRequired[str]
+    skip: list[str]
+
+
+# Groups scraped by the meetups-meetupcom spider. Other spiders skip events of
+# these groups, so that they don't end up scraped twice.
+GROUPS = {
+    "https://www.meetup.com/pydata-prague/": {
+        "description": "komunita kolem Pythonu a dat",
+        "homepage_url": "https://pydata.cz/",
+    },
+    "https://www.meetup.com/reactgirls/": {
+        "description": "komunita (nejen) žen kolem Reactu a frontendu",
+        "homepage_url": "https://reactgirls.com/",
+        "skip": ["workshop", "canvas:"],
+    },
+    "https://www.meetup.com/frontendisti/": {
+        "description": "komunita kolem frontendu",
+        "homepage_url": "https://www.frontendisti.cz/",
+    },
+    "https://www.meetup.com/professionaltesting/": {
+        "description": "komunita kolem testování",
+    },
+    "https://www.meetup.com/protest_cz/": {
+        "description": "komunita kolem testování",
+        "homepage_url": "https://www.pro-test.info/",
+    },
+    "https://www.meetup.com/praguejs/": {
+        "description": "komunita kolem JavaScriptu",
+    },
+    "https://www.meetup.com/techmeetupostrava/": {
+        "description": "místní IT komunita",
+        "homepage_url": "https://www.techmeetup.cz/",
+        "skip": ["agile circle"],
+    },
+    "https://www.meetup.com/prague-gen-ai/": {
+        "description": "komunita kolem AI",
+    },
+    "https://www.meetup.com/brno-java-meetup/": {
+        "description": "komunita kolem Javy",
+        "homepage_url": "https://www.jug.cz/",
+    },
+    "https://www.meetup.com/pyconsk/": {
+        "description": "komunita kolem Pythonu",
+        "homepage_url": "https://pycon.sk/",
+    },
+    "https://www.meetup.com/bratislava-react-meetup-group/": {
+        "description": "komunita kolem Reactu",
+    },
+    "https://www.meetup.com/net-bratislava-meetup/": {
+        "description": "komunita kolem .NETu",
+    },
+    "https://www.meetup.com/webup-web-developers-in-zilina/": {
+        "description": "místní IT komunita",
+    },
+    "https://www.meetup.com/meetup-group-xlwhsgnm/": {
+        "description": "komunita kolem Javy",
+    },
+    "https://www.meetup.com/wordpress-brno-meetups/": {
+        "description": "komunita kolem WordPressu",
+    },
+    "https://www.meetup.com/junior-dev-support-group/": {
+        "description": "komunita juniorů",
+    },
+    "https://www.meetup.com/wordpress-ostrava/": {
+        "description": "komunita kolem WordPressu",
+    },
+}
+
+GROUP_URL_RE = re.compile(
+    r"meetup\.com/(?:(?-i:[a-z]{2}-[A-Z]{2})/)?(?P<slug>[\w-]+)", re.IGNORECASE
+)
+
+
+def get_group_slug(url: str) -> str:
+    if match := GROUP_URL_RE.search(url):
+        return match.group("slug").lower()
+    raise ValueError(f"Not a meetup.com group URL: {url}")
+
+
+GROUP_SLUGS = frozenset(get_group_slug(url) for url in GROUPS)
+
+
+# Extracts slugs from all meetup.com URLs in the text and looks them up in
+# a set, so the cost doesn't grow with the number of groups
+def find_group_slug(text: str) -> str | None:
+    for match in GROUP_URL_RE.finditer(text):
+        if (slug := match.group("slug").lower()) in GROUP_SLUGS:
+            return slug
+    return None
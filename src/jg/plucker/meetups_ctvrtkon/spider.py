@@ -1,4 +1,3 @@
-import json
 from datetime import date, datetime
 from typing import Generator
 from zoneinfo import ZoneInfo
@@ -7,6 +6,7 @@ from scrapy import Spider as BaseSpider
 from scrapy.http import TextResponse
 
 from jg.plucker.items import Meetup
+from jg.plucker.json_stream import iter_json_array
 
 
 class Spider(BaseSpider):
@@ -14,6 +14,12 @@ class Spider(BaseSpider):
 
     start_urls = ["https://ctvrtkon.cz/api/events/feed"]
 
+    custom_settings = {
+        # Revalidates the cached feed instead of downloading it again
+        "HTTPCACHE_POLICY": "jg.plucker.cache.ConditionalPolicy",
+        "HTTPCACHE_EXPIRATION_SECS": 60 * 60 * 24 * 30,  # 30 days
+    }
+
     min_items = 0
 
     def parse(
@@ -21,8 +27,7 @@ class Spider(BaseSpider):
     ) -> Generator[Meetup, None, None]:
         today = today or date.today()
         self.logger.info(f"Parsing {response.url}, today is {today}")
-        events = json.loads(response.text)["data"]
-        self.logger.debug(f"Total events: {len(events)}")
+        events = iter_json_array(response.body, "data")
         meetups = (self.parse_event(response.url, today, event) for event in events)
         yield from filter(None, meetups)
 
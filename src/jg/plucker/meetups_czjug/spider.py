@@ -1,78 +1,45 @@
 import re
 from datetime import date
-from typing import Generator
 
-from ics import Calendar, Event
-from scrapy import Spider as BaseSpider
-from scrapy.http import TextResponse
+from ics import Event
 
-from jg.plucker.items import Meetup
-from jg.plucker.meetups_meetupcom.spider import GROUPS as MEETUPCOM_GROUPS
+from jg.plucker.ical import CalendarSpider, EventFilter
+from jg.plucker.meetupcom import find_group_slug
 
 
-class Spider(BaseSpider):
+class Spider(CalendarSpider):
     name = "meetups-czjug"
 
     start_urls = [
         "https://calendar.google.com/calendar/ical/mjil9nmeva31du9eofmbpobdeo%40group.calendar.google.com/public/basic.ics"
     ]
 
-    min_items = 0
+    series_name = "CZJUG"
 
-    meetup_com_url_re = re.compile(
-        r"|".join(re.escape(f"meetup.com/{slug}/") for slug in MEETUPCOM_GROUPS),
-        re.IGNORECASE,
-    )
+    series_org = "komunita kolem Javy"
 
-    jug_url_re = re.compile(r"https?://(www\.)?jug\.cz/[^/]+/")
+    series_url = "https://www.jug.cz/"
 
     default_event_url = "https://www.jug.cz/category/udalosti/"
 
-    def parse(
-        self, response: TextResponse, today: date | None = None
-    ) -> Generator[Meetup, None, None]:
-        today = today or date.today()
-        self.logger.info(f"Parsing {response.url}, today is {today}")
-        events = Calendar(response.text).events
-        self.logger.debug(f"Total events: {len(events)}")
-        meetups = (self.parse_event(response.url, today, event) for event in events)
-        yield from filter(None, meetups)
-
-    def parse_event(self, source_url: str, today: date, event: Event) -> Meetup | None:
-        if not event.location or event.location.startswith("http"):
-            self.logger.debug(f"Event without location: {event.summary} {event.begin}")
-            return
-
-        if match := self.meetup_com_url_re.search(event.description or ""):
-            self.logger.debug(
-                f"Meetup.com event: {event.summary} {event.begin} ({match.group(0)} found in {event.description!r})"
-            )
-            return
+    require_location = True
 
-        if "BrnoJUG" in (event.summary or ""):
-            self.logger.debug(
-                f"Meetup.com event: {event.summary} {event.begin} (BrnoJUG)"
-            )
-            return
+    jug_url_re = re.compile(r"https?://(www\.)?jug\.cz/[^/]+/")
 
-        if event.begin and event.begin.date() < today:
-            self.logger.debug(f"Past event: {event.summary} {event.begin}")
-            return
+    # Events of groups scraped from meetup.com are left to the meetups-meetupcom spider
+    def get_filters(self) -> list[EventFilter]:
+        return [
+            ("Meetup.com event", self.is_meetup_com_event),
+            *super().get_filters(),
+        ]
+
+    def is_meetup_com_event(self, event: Event, today: date) -> bool:
+        return bool(
+            find_group_slug(event.description or "")
+            or "BrnoJUG" in (event.summary or "")
+        )
 
-        self.logger.info(f"Event: {event.summary} {event.begin}")
+    def get_url(self, event: Event) -> str | None:
         if match := self.jug_url_re.search(event.description or ""):
-            url = match.group(0)
-        else:
-            url = self.default_event_url
-        return Meetup(
-            title=event.summary,
-            url=url,
-            description=event.description,
-            starts_at=event.begin,
-            ends_at=event.end,
-            location=event.location,
-            source_url=source_url,
-            series_name="CZJUG",
-            series_org="komunita kolem Javy",
-            series_url="https://www.jug.cz/",
-        )
+            return match.group(0)
+        return self.default_event_url
@@ -1,81 +1,38 @@
-from typing import AsyncGenerator, Generator, NotRequired, TypedDict
+from datetime import datetime
+from itertools import batched
+from typing import Any, AsyncGenerator, Generator
 
 import teemup
 from scrapy import Spider as BaseSpider
-from scrapy.http import Request, Response
+from scrapy.crawler import Crawler
+from scrapy.http import JsonRequest, Request, Response
+from twisted.python.failure import Failure
 
+from jg.plucker.cache import FeedCache
 from jg.plucker.items import Meetup
+from jg.plucker.meetupcom import GROUPS, GroupSpec, get_group_slug
 
 
-class GroupSpec(TypedDict):
-    name: NotRequired[str]
-    description: str
-    homepage_url: NotRequired[str]
-    skip: list[str]
-
-
-GROUPS = {
-    "https://www.meetup.com/pydata-prague/": {
-        "description": "komunita kolem Pythonu a dat",
-        "homepage_url": "https://pydata.cz/",
-    },
-    "https://www.meetup.com/reactgirls/": {
-        "description": "komunita (nejen) žen kolem Reactu a frontendu",
-        "homepage_url": "https://reactgirls.com/",
-        "skip": ["workshop", "canvas:"],
-    },
-    "https://www.meetup.com/frontendisti/": {
-        "description": "komunita kolem frontendu",
-        "homepage_url": "https://www.frontendisti.cz/",
-    },
-    "https://www.meetup.com/professionaltesting/": {
-        "description": "komunita kolem testování",
-    },
-    "https://www.meetup.com/protest_cz/": {
-        "description": "komunita kolem testování",
-        "homepage_url": "https://www.pro-test.info/",
-    },
-    "https://www.meetup.com/praguejs/": {
-        "description": "komunita kolem JavaScriptu",
-    },
-    "https://www.meetup.com/techmeetupostrava/": {
-        "description": "místní IT komunita",
-        "homepage_url": "https://www.techmeetup.cz/",
-        "skip": ["agile circle"],
-    },
-    "https://www.meetup.com/prague-gen-ai/": {
-        "description": "komunita kolem AI",
-    },
-    "https://www.meetup.com/brno-java-meetup/": {
-        "description": "komunita kolem Javy",
-        "homepage_url": "https://www.jug.cz/",
-    },
-    "https://www.meetup.com/pyconsk/": {
-        "description": "komunita kolem Pythonu",
-        "homepage_url": "https://pycon.sk/",
-    },
-    "https://www.meetup.com/bratislava-react-meetup-group/": {
-        "description": "komunita kolem Reactu",
-    },
-    "https://www.meetup.com/net-bratislava-meetup/": {
-        "description": "komunita kolem .NETu",
-    },
-    "https://www.meetup.com/webup-web-developers-in-zilina/": {
-        "description": "místní IT komunita",
-    },
-    "https://www.meetup.com/meetup-group-xlwhsgnm/": {
-        "description": "komunita kolem Javy",
-    },
-    "https://www.meetup.com/wordpress-brno-meetups/": {
-        "description": "komunita kolem WordPressu",
-    },
-    "https://www.meetup.com/junior-dev-support-group/": {
-        "description": "komunita juniorů",
-    },
-    "https://www.meetup.com/wordpress-ostrava/": {
-        "description": "komunita kolem WordPressu",
-    },
+GRAPHQL_URL = "https://www.meetup.com/gql2"
+
+GRAPHQL_GROUP_FRAGMENT = """
+fragment GroupEvents on Group {
+  name
+  events(status: ACTIVE, first: 20) {
+    edges {
+      node {
+        title
+        eventUrl
+        description
+        dateTime
+        endTime
+        status
+        venue { name address city state country }
+      }
+    }
+  }
 }
+"""
 
 
 class Spider(BaseSpider):
@@ -83,13 +40,59 @@ class Spider(BaseSpider):
 
     min_items = 1
 
-    async def start(self) -> AsyncGenerator[Request, None]:
+    # Events of this many groups can be fetched in a single request to the
+    # GraphQL API, which the meetup.com pages get their data from. Groups which
+    # can't be fetched this way are scraped from their pages. The pages remain
+    # the default, as the API isn't public and can change without notice.
+    graphql_batch_size: int | None = None
+
+    feed_cache: FeedCache | None = None
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler, *args: Any, **kwargs: Any) -> "Spider":
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.feed_cache = FeedCache.from_crawler(crawler)
+        return spider
+
+    async def start(self) -> AsyncGenerator[Request | Meetup, None]:
+        series_urls = []
         for series_url in GROUPS:
-            yield Request(
-                f"{series_url.rstrip('/')}/events/",
-                callback=self.parse,
-                cb_kwargs={"series_url": series_url, "group": GROUPS[series_url]},
-            )
+            if (
+                self.feed_cache
+                and (events := self.feed_cache.get(series_url)) is not None
+            ):
+                self.logger.info(f"Using cached events of {series_url}")
+                for meetup in self.parse_events(events, series_url):
+                    yield meetup
+            else:
+                series_urls.append(series_url)
+        if self.graphql_batch_size:
+            for batch in batched(series_urls, self.graphql_batch_size):
+                yield self.get_graphql_request(list(batch))
+        else:
+            for series_url in series_urls:
+                yield self.get_page_request(series_url)
+
+    def closed(self, reason: str) -> None:
+        if self.feed_cache:
+            self.feed_cache.close()
+
+    def get_page_request(self, series_url: str) -> Request:
+        return Request(
+            get_events_url(series_url),
+            callback=self.parse,
+            cb_kwargs={"series_url": series_url, "group": GROUPS[series_url]},
+        )
+
+    def get_graphql_request(self, series_urls: list[str]) -> JsonRequest:
+        return JsonRequest(
+            GRAPHQL_URL,
+            data=get_graphql_data(series_urls),
+            callback=self.parse_graphql,
+            errback=self.handle_graphql_error,
+            cb_kwargs={"series_urls": series_urls},
+            dont_filter=True,
+        )
 
     def parse(
         self, response: Response, series_url: str, group: GroupSpec
@@ -97,11 +100,60 @@ class Spider(BaseSpider):
         self.logger.info(f"Parsing {response.url}")
         events = teemup.parse(response.text)
         self.logger.debug(f"Total events: {len(events)}")
+        self.cache_events(series_url, events)
         meetups = (
             self.parse_event(response.url, event, series_url, group) for event in events
         )
         yield from filter(None, meetups)
 
+    def parse_graphql(
+        self, response: Response, series_urls: list[str]
+    ) -> Generator[Request | Meetup, None, None]:
+        self.logger.info(f"Parsing {response.url} ({len(series_urls)} groups)")
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        for error in data.get("errors") or []:
+            self.logger.warning(f"GraphQL error: {error.get('message', error)}")
+        groups = data.get("data") or {}
+        for n, series_url in enumerate(series_urls):
+            try:
+                events = parse_graphql_group(groups[f"group{n}"])
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.warning(
+                    f"Unable to get events of {series_url} from GraphQL ({e!r}), "
+                    "falling back to the page"
+                )
+                yield self.get_page_request(series_url)
+            else:
+                self.logger.debug(f"Total events of {series_url}: {len(events)}")
+                self.cache_events(series_url, events)
+                yield from self.parse_events(events, series_url)
+
+    def handle_graphql_error(self, failure: Failure) -> Generator[Request, None, None]:
+        series_urls = failure.request.cb_kwargs["series_urls"]  # type: ignore
+        self.logger.warning(
+            f"Unable to get events from GraphQL ({failure.value!r}), "
+            f"falling back to pages of {len(series_urls)} groups"
+        )
+        for series_url in series_urls:
+            yield self.get_page_request(series_url)
+
+    def cache_events(self, series_url: str, events: list[teemup.Event]) -> None:
+        if self.feed_cache:
+            self.feed_cache.set(series_url, events)
+
+    def parse_events(
+        self, events: list[teemup.Event], series_url: str
+    ) -> Generator[Meetup, None, None]:
+        source_url = get_events_url(series_url)
+        group = GROUPS[series_url]
+        meetups = (
+            self.parse_event(source_url, event, series_url, group) for event in events
+        )
+        yield from filter(None, meetups)
+
     def parse_event(
         self,
         source_url: str,
@@ -138,3 +190,40 @@ class Spider(BaseSpider):
             )
         self.logger.warning(f"Skipping {event['title']!r}, has no venue")
         return None
+
+
+def get_events_url(series_url: str) -> str:
+    return f"{series_url.rstrip('/')}/events/"
+
+
+# Groups are queried under aliases, so that any number of them fits into
+# a single request and their results can be told apart
+def get_graphql_data(series_urls: list[str]) -> dict[str, Any]:
+    variables = {
+        f"urlname{n}": get_group_slug(series_url)
+        for n, series_url in enumerate(series_urls)
+    }
+    params = ", ".join(f"${name}: String!" for name in variables)
+    fields = "\n".join(
+        f"  group{n}: groupByUrlname(urlname: ${name}) {{ ...GroupEvents }}"
+        for n, name in enumerate(variables)
+    )
+    query = f"query ({params}) {{\n{fields}\n}}\n{GRAPHQL_GROUP_FRAGMENT}"
+    return {"query": query, "variables": variables}
+
+
+# Produces the same events as teemup.parse() does from the pages
+def parse_graphql_group(group: dict[str, Any]) -> list[teemup.Event]:
+    return [
+        teemup.Event(
+            title=event["title"],
+            url=event["eventUrl"],
+            description=event["description"],
+            starts_at=datetime.fromisoformat(event["dateTime"]),
+            ends_at=datetime.fromisoformat(event["endTime"]),
+            venue=teemup.parse_venue(event["venue"]) if event["venue"] else None,
+            group_name=group["name"],
+        )
+        for event in (edge["node"] for edge in group["events"]["edges"])
+        if event["status"] == "ACTIVE"
+    ]
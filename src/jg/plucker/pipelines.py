@@ -1,12 +1,21 @@
+import asyncio
 import hashlib
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 from apify import Actor
 from scrapy import Item
 from scrapy.crawler import Crawler
-from scrapy.exceptions import DropItem
+from scrapy.exceptions import DropItem, NotConfigured
 
-from jg.plucker.items import get_image_fields, get_required_fields
+from jg.plucker.images import normalize_image
+from jg.plucker.items import (
+    JobLogo,
+    get_hash_field,
+    get_image_fields,
+    get_required_fields,
+)
 
 
 logger = logging.getLogger("jg.plucker.pipelines")
@@ -26,10 +35,73 @@ class RequiredFieldsFilterPipeline:
         return item
 
 
+class LogoNormalizationPipeline:
+    def __init__(self, max_size: int, format: str = "webp", workers: int | None = None):
+        self.max_size = max_size
+        self.format = format
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> "LogoNormalizationPipeline":
+        if not crawler.settings.getbool("LOGO_NORMALIZATION_ENABLED"):
+            raise NotConfigured()
+        return cls(
+            max_size=crawler.settings.getint("LOGO_NORMALIZATION_MAX_SIZE"),
+            format=crawler.settings.get("LOGO_NORMALIZATION_FORMAT"),
+            workers=crawler.settings.getint("LOGO_NORMALIZATION_WORKERS") or None,
+        )
+
+    def open_spider(self) -> None:
+        # Forking a process with a running reactor isn't safe
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def close_spider(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def process_item(self, item: Item) -> Item:
+        if not isinstance(item, JobLogo) or not isinstance(item["image_url"], bytes):
+            return item
+        assert self._executor is not None, "Process pool not started"
+        loop = asyncio.get_running_loop()
+        try:
+            image, width, height = await loop.run_in_executor(
+                self._executor,
+                normalize_image,
+                item["image_url"],
+                self.max_size,
+                self.format,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to normalize {item['original_image_url']}: {e}")
+            return item
+        logger.debug(
+            f"Normalized {item['original_image_url']}: "
+            f"{item['format']} {item.get('width')}x{item.get('height')} "
+            f"{len(item['image_url']) // 1024}kB → "
+            f"{self.format} {width}x{height} {len(image) // 1024}kB"
+        )
+        item["image_url"] = image
+        item["image_hash"] = hashlib.sha256(image).hexdigest()
+        item["width"] = width
+        item["height"] = height
+        item["format"] = self.format
+        return item
+
+
 class ImagePipeline:
     def __init__(self, crawler: Crawler):
         self.crawler = crawler
         self._kvs = None
+        self._semaphore = asyncio.Semaphore(
+            crawler.settings.getint("IMAGE_PIPELINE_CONCURRENCY", 1)
+        )
+        self._image_urls: dict[str, str] = {}
+        self._uploads: dict[str, asyncio.Task[str]] = {}
 
     @classmethod
     def from_crawler(cls, crawler: Crawler) -> "ImagePipeline":
@@ -46,6 +118,7 @@ class ImagePipeline:
         spider_name = spider.name if spider else "<unknown>"
 
         item_class = item.__class__
+        fields, uploads = [], []
         for field in get_image_fields(item_class):
             value = item[field]
             if isinstance(value, bytes):
@@ -53,13 +126,50 @@ class ImagePipeline:
                 logger.info(
                     f"Processing image: {item_class.__name__}.{field}, size {size_kb}kB, spider {spider_name}"
                 )
-                key = hashlib.sha256(value).hexdigest()
-                await self._kvs.set_value(key, value)
-                image_url = await self._kvs.get_public_url(key)
-                logger.info(f"Image URL: {image_url}")
-                item[field] = image_url
+                hash_field = get_hash_field(item_class, field)
+                key = item.get(hash_field) if hash_field else None
+                fields.append(field)
+                uploads.append(self.store_image(value, key))
             else:
                 logger.debug(
                     f"Skipping (not bytes): {item_class.__name__}.{field} with value {value!r}"
                 )
+        image_urls = await asyncio.gather(*uploads)
+        for field, image_url in zip(fields, image_urls):
+            logger.info(f"Image URL: {image_url}")
+            item[field] = image_url
         return item
+
+    async def store_image(self, image: bytes, key: str | None = None) -> str:
+        key = key or hashlib.sha256(image).hexdigest()
+        if image_url := self._image_urls.get(key):
+            logger.debug(f"Image {key} already stored during this run")
+            self.inc_stats("image_pipeline/deduplicated")
+            return image_url
+        if upload := self._uploads.get(key):
+            logger.debug(f"Image {key} is already being stored")
+            self.inc_stats("image_pipeline/deduplicated")
+            return await asyncio.shield(upload)
+        upload = asyncio.create_task(self.upload_image(key, image))
+        self._uploads[key] = upload
+        try:
+            image_url = await asyncio.shield(upload)
+        finally:
+            del self._uploads[key]
+        self._image_urls[key] = image_url
+        return image_url
+
+    async def upload_image(self, key: str, image: bytes) -> str:
+        assert self._kvs is not None, "Key-value store not opened"
+        async with self._semaphore:
+            if await self._kvs.record_exists(key):
+                logger.debug(f"Image {key} already exists in the key-value store")
+                self.inc_stats("image_pipeline/existing")
+            else:
+                await self._kvs.set_value(key, image)
+                self.inc_stats("image_pipeline/uploaded")
+            return await self._kvs.get_public_url(key)
+
+    def inc_stats(self, key: str) -> None:
+        if self.crawler.stats:
+            self.crawler.stats.inc_value(key)
@@ -0,0 +1,73 @@
+import re
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any, Iterable
+
+
+# See https://docs.python.org/3/using/cmdline.html#cmdoption-X
+IMPORT_TIME_RE = re.compile(
+    r"""
+        ^import\ time:
+        \s+(?P<self_us>\d+)\s+\|
+        \s+(?P<cumulative_us>\d+)\s+\|
+        (?P<indent>\s+)(?P<name>\S+)$
+    """,
+    re.VERBOSE,
+)
+
+
+@dataclass(frozen=True)
+class ImportTime:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_import_times(lines: Iterable[str]) -> tuple[list[ImportTime], list[str]]:
+    import_times, other_lines = [], []
+    for line in lines:
+        if match := IMPORT_TIME_RE.match(line):
+            import_times.append(
+                ImportTime(
+                    name=match.group("name"),
+                    self_us=int(match.group("self_us")),
+                    cumulative_us=int(match.group("cumulative_us")),
+                    depth=(len(match.group("indent")) - 1) // 2,
+                )
+            )
+        elif not line.startswith("import time:"):
+            other_lines.append(line)
+    return import_times, other_lines
+
+
+def summarize_import_times(import_times: Iterable[ImportTime]) -> dict[str, Any]:
+    import_times = list(import_times)
+    packages = defaultdict(int)
+    for import_time in import_times:
+        packages[import_time.name.split(".")[0]] += import_time.self_us
+    return {
+        "total_us": sum(import_time.self_us for import_time in import_times),
+        "packages": dict(
+            sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        ),
+        "modules": [
+            asdict(import_time)
+            for import_time in sorted(
+                import_times,
+                key=lambda import_time: import_time.cumulative_us,
+                reverse=True,
+            )
+        ],
+    }
+
+
+def format_import_times(summary: dict[str, Any], limit: int = 20) -> str:
+    lines = [f"Total import time: {summary['total_us'] / 1000:.0f}ms"]
+    lines.append("Slowest packages (self time of all their modules):")
+    for name, self_us in list(summary["packages"].items())[:limit]:
+        lines.append(f"· {self_us / 1000:>8.1f}ms {name}")
+    lines.append("Slowest modules (cumulative time):")
+    for module in summary["modules"][:limit]:
+        lines.append(f"· {module['cumulative_us'] / 1000:>8.1f}ms {module['name']}")
+    return "\n".join(lines)
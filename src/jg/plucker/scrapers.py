@@ -1,12 +1,13 @@
+import asyncio
+import json
 import logging
+import os
+from importlib import import_module
 from pathlib import Path
 from typing import Annotated, Any, Coroutine, Generator, Literal, Type
 
-from apify import Actor, Event as ApifyEvent
-from apify.scrapy import run_scrapy_actor
-from apify.scrapy.utils import apply_apify_settings
 from pydantic import BaseModel, HttpUrl, PlainSerializer
-from scrapy import Item, Spider
+from scrapy import Item, Request, Spider
 from scrapy.crawler import Crawler, CrawlerRunner
 from scrapy.settings import BaseSettings
 from scrapy.spiderloader import SpiderLoader as BaseSpiderLoader
@@ -15,6 +16,8 @@ from scrapy.utils.defer import deferred_to_future
 from scrapy.utils.project import get_project_settings
 from scrapy.utils.reactor import install_reactor
 
+from jg.plucker.extensions import PerformanceReport
+
 
 logger = logging.getLogger("jg.plucker")
 
@@ -26,7 +29,13 @@ class Link(BaseModel):
     method: Literal["GET"] = "GET"
 
 
+# The Apify SDK is imported only when needed, because it's slow to import.
+# Commands such as 'plucker schemas' or 'plucker manifest' shouldn't pay for it.
+
+
 def start_reactor(coroutine: Coroutine) -> None:
+    from apify.scrapy import run_scrapy_actor
+
     settings = get_project_settings()
     install_reactor(settings["TWISTED_REACTOR"])
     run_scrapy_actor(coroutine)
@@ -48,9 +57,51 @@ async def run_as_spider(
     check_crawl_results(crawler)
 
 
+async def run_as_spiders(
+    spider_classes: list[Type[Spider]], max_parallel: int = 4
+) -> None:
+    settings = get_project_settings()
+    settings["FEEDS"] = {
+        "items/%(name)s.json": {
+            "format": "json",
+            "encoding": "utf-8",
+            "indent": 2,
+            "overwrite": True,
+        },
+    }
+    settings["PERFORMANCE_REPORT_PATH"] = "performance/%(name)s.json"
+
+    logger.info(
+        f"Starting {len(spider_classes)} spiders, max {max_parallel} at the same time"
+    )
+    runner = CrawlerRunner(settings)
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def crawl(spider_class: Type[Spider]) -> CrawlResult:
+        async with semaphore:
+            logger.info(f"Starting the spider {spider_class.name}")
+            crawler = runner.create_crawler(spider_class)
+            await deferred_to_future(runner.crawl(crawler))
+        try:
+            check_crawl_results(crawler)
+        except StatsError as e:
+            return CrawlResult(spider_name=spider_class.name, error=str(e))
+        return CrawlResult(spider_name=spider_class.name)
+
+    results = await asyncio.gather(*map(crawl, spider_classes))
+    logger.info("Results:\n" + "\n".join(f"· {result}" for result in results))
+    if failed_results := [result for result in results if not result.ok]:
+        raise StatsError(
+            f"Spiders failed: {', '.join(result.spider_name for result in failed_results)}"
+        )
+
+
 async def run_as_actor(
     spider_class: Type[Spider], spider_params: dict[str, Any] | None
 ):
+    from apify import Actor, Event as ApifyEvent
+    from apify.scrapy.utils import apply_apify_settings
+
     async with Actor:
         logger.info(f"Starting actor for spider {spider_class.name}")
         Actor.on(ApifyEvent.MIGRATING, actor_migrate)
@@ -61,8 +112,14 @@ async def run_as_actor(
 
         settings = apply_apify_settings(proxy_config=proxy_config)
         settings["HTTPCACHE_STORAGE"] = "apify.scrapy.extensions.ApifyCacheStorage"
+        # Runs don't share disks, caches which should outlive them need to be
+        # stored in named key-value stores
+        settings["FEED_CACHE_KVS_NAME"] = "plucker-feed-cache"
+        settings["LOGO_CACHE_KVS_NAME"] = "plucker-logo-cache"
+        settings["CHECK_STATE_KVS_NAME"] = "plucker-check-state"
         settings["ITEM_PIPELINES"]["jg.plucker.pipelines.ImagePipeline"] = 500
         settings["FEEDS"] = {}
+        settings["PERFORMANCE_REPORT_PATH"] = None
 
         logger.info("Starting the spider")
         runner = CrawlerRunner(settings)
@@ -71,10 +128,16 @@ async def run_as_actor(
         logger.debug(f"Spider params: {params!r}")
         await deferred_to_future(runner.crawl(crawler, **params))
 
+        if performance_report := crawler.get_extension(PerformanceReport):
+            logger.info("Saving performance report to the key-value store")
+            await Actor.set_value("PERFORMANCE_REPORT", performance_report.get_report())
+
         check_crawl_results(crawler)
 
 
 async def actor_migrate() -> None:
+    from apify import Actor
+
     logger.error("Actor is migrating!")
     await Actor.reboot()
 
@@ -85,18 +148,114 @@ def iter_actor_paths(path: Path | str) -> Generator[Path, None, None]:
 
 
 def get_spider_module_name(actor_path: Path | str) -> str:
-    return f"{str(actor_path).replace('/', '.').removeprefix("src.")}.spider"
+    return f"{str(actor_path).replace('/', '.').removeprefix('src.')}.spider"
+
+
+class SpiderSpec(BaseModel):
+    name: str
+    module_name: str
+    actor_path: str
+    item_name: str
+    dataset_schema_path: str
+    required_input: list[str] = []
+
+
+def iter_spider_specs(path: Path | str) -> Generator[SpiderSpec, None, None]:
+    for actor_path in iter_actor_paths(path):
+        actor_config_path = actor_path / ".actor/actor.json"
+        actor_config = json.loads(actor_config_path.read_text())
+        dataset_schema_path = os.path.normpath(
+            actor_config_path.parent / actor_config["storages"]["dataset"]
+        )
+        dataset_schema = json.loads(Path(dataset_schema_path).read_text())
+        yield SpiderSpec(
+            name=actor_config["name"],
+            module_name=get_spider_module_name(actor_path),
+            actor_path=str(actor_path),
+            item_name=dataset_schema["title"],
+            dataset_schema_path=dataset_schema_path,
+            required_input=actor_config.get("input", {}).get("required", []),
+        )
 
 
+def generate_manifest(path: Path | str) -> list[dict[str, str]]:
+    specs = sorted(iter_spider_specs(path), key=lambda spec: spec.name)
+    return [spec.model_dump() for spec in specs]
+
+
+# If the path with spiders is given, the manifest is stale also when it misses
+# some of the actors in there, not only when it lists actors which don't exist.
+# Actors live right in the spiders path, so a shallow glob is enough to find
+# them. Unlike a recursive scan or reading the actor configs, it's cheap.
+def load_manifest(
+    manifest_path: Path | str, spiders_path: Path | str | None = None
+) -> list[SpiderSpec] | None:
+    try:
+        manifest = json.loads(Path(manifest_path).read_text())
+    except FileNotFoundError:
+        logger.debug(f"Manifest {manifest_path} not found")
+        return None
+    specs = list(map(SpiderSpec.model_validate, manifest))
+    if spiders_path is None:
+        is_stale = any(
+            not (Path(spec.actor_path) / ".actor/actor.json").is_file()
+            for spec in specs
+        )
+    else:
+        actor_paths = {
+            str(actor_config_path.parent.parent)
+            for actor_config_path in Path(spiders_path).glob("*/.actor/actor.json")
+        }
+        is_stale = {spec.actor_path for spec in specs} != actor_paths
+    if is_stale:
+        logger.warning(f"Manifest {manifest_path} is stale, run 'plucker manifest'")
+        return None
+    return specs
+
+
+def get_spider_specs(settings: BaseSettings) -> list[SpiderSpec]:
+    spider_path = settings.get("SPIDER_LOADER_SPIDERS_PATH", ".")
+    if manifest_path := settings.get("SPIDER_LOADER_MANIFEST_PATH"):
+        if specs := load_manifest(manifest_path, spider_path):
+            return specs
+    logger.debug(f"Scanning {spider_path} for spiders")
+    return list(iter_spider_specs(spider_path))
+
+
+# Imports spider modules lazily, only when a spider is actually loaded.
+# Names of the spiders come from the manifest or from the actor configs.
 class SpiderLoader(BaseSpiderLoader):
     def __init__(self, settings: BaseSettings):
         super().__init__(settings)
+        self._spider_module_names: dict[str, str] = {}
+        self._spider_path: str | None = None
         if not self.spider_modules:
-            spider_path = settings.get("SPIDER_LOADER_SPIDERS_PATH", ".")
-            self.spider_modules = list(
-                map(get_spider_module_name, iter_actor_paths(spider_path))
-            )
-        self._load_all_spiders()
+            self._spider_path = settings.get("SPIDER_LOADER_SPIDERS_PATH", ".")
+            self._spider_module_names = {
+                spec.name: spec.module_name for spec in get_spider_specs(settings)
+            }
+
+    def load(self, spider_name: str) -> Type[Spider]:
+        if spider_name not in self._spiders:
+            if spider_name not in self._spider_module_names and self._spider_path:
+                logger.debug(f"Spider {spider_name!r} not known, scanning for spiders")
+                self._spider_module_names = {
+                    spec.name: spec.module_name
+                    for spec in iter_spider_specs(self._spider_path)
+                }
+                self._spider_path = None
+            if module_name := self._spider_module_names.get(spider_name):
+                logger.debug(f"Importing spider {spider_name!r} from {module_name!r}")
+                self._load_spiders(import_module(module_name))
+        return super().load(spider_name)
+
+    def find_by_request(self, request: Request) -> list[str]:
+        for spider_name in self._spider_module_names:
+            self.load(spider_name)
+        return super().find_by_request(request)
+
+    def list(self) -> list[str]:
+        return sorted(set(self._spider_module_names) | set(self._spiders))
 
 
 def generate_schema(item_class: Type[Item]) -> dict:
@@ -149,6 +308,20 @@ class StatsError(RuntimeError):
     pass
 
 
+class CrawlResult(BaseModel):
+    spider_name: str
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __str__(self) -> str:
+        if self.ok:
+            return f"{self.spider_name}: OK"
+        return f"{self.spider_name}: FAILED ({self.error})"
+
+
 def evaluate_stats(stats: StatsT, min_items: int):
     item_count = stats.get("item_scraped_count", 0)
     if exc_count := stats.get("spider_exceptions"):
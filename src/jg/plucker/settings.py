@@ -27,14 +27,55 @@ HTTPCACHE_ENABLED = True
 
 HTTPCACHE_EXPIRATION_SECS = 43200  # 12 hours
 
+HTTPCACHE_STORAGE = "jg.plucker.cache.DiskCacheStorage"
+
+# Custom setting, see 'DiskCacheStorage'
+HTTPCACHE_SIZE_LIMIT = 2**30  # 1 GiB
+
+# Custom setting, see 'ConditionalPolicy'
+HTTPCACHE_FRESHNESS_SECS = 43200  # 12 hours
+
+# Custom settings, see 'FeedCache'
+FEED_CACHE_ENABLED = True
+
+FEED_CACHE_DIR = "feedcache"
+
+FEED_CACHE_EXPIRATION_SECS = 3600  # 1 hour
+
+FEED_CACHE_KVS_NAME = None  # set by 'run_as_actor()'
+
+# Custom setting, see 'LogoCache'
+LOGO_CACHE_KVS_NAME = None  # set by 'run_as_actor()'
+
+# Custom setting, see 'CheckState'
+CHECK_STATE_KVS_NAME = None  # set by 'run_as_actor()'
+
 SPIDER_LOADER_CLASS = "jg.plucker.scrapers.SpiderLoader"
 
 SPIDER_LOADER_SPIDERS_PATH = "./src/jg/plucker"
 
+# Custom setting, generated by 'plucker manifest', see 'get_spider_specs()'
+SPIDER_LOADER_MANIFEST_PATH = "./src/jg/plucker/manifest.json"
+
 # Custom setting, see 'run_spider()' and 'raise_for_stats()'
 SPIDER_MIN_ITEMS = 10
 
-ITEM_PIPELINES = {"jg.plucker.pipelines.RequiredFieldsFilterPipeline": 50}
+ITEM_PIPELINES = {
+    "jg.plucker.pipelines.RequiredFieldsFilterPipeline": 50,
+    "jg.plucker.pipelines.LogoNormalizationPipeline": 400,
+}
+
+# Custom settings, see 'LogoNormalizationPipeline'
+LOGO_NORMALIZATION_ENABLED = False
+
+LOGO_NORMALIZATION_MAX_SIZE = 256  # px
+
+LOGO_NORMALIZATION_FORMAT = "webp"
+
+LOGO_NORMALIZATION_WORKERS = 2
+
+# Custom setting, see 'ImagePipeline'
+IMAGE_PIPELINE_CONCURRENCY = 8
 
 CLOSESPIDER_ERRORCOUNT = 1
 
@@ -42,7 +83,17 @@ AUTOTHROTTLE_ENABLED = True
 
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
 
-EXTENSIONS = {"scrapy.extensions.memusage.MemoryUsage": None}
+EXTENSIONS = {
+    "scrapy.extensions.memusage.MemoryUsage": None,
+    "jg.plucker.extensions.PerformanceReport": 500,
+}
+
+SPIDER_MIDDLEWARES = {"jg.plucker.extensions.CallbackTimingMiddleware": 950}
+
+# Custom settings, see 'PerformanceReport'
+PERFORMANCE_REPORT_ENABLED = True
+
+PERFORMANCE_REPORT_PATH = "performance.json"
 
 APIFY_TOKEN = os.getenv("APIFY_TOKEN")
 
@@ -0,0 +1,26 @@
+from typing import Any
+
+import pytest
+
+
+class MemoryKeyValueStore:
+    def __init__(self):
+        self.values: dict[str, Any] = {}
+
+    async def get_value(self, key: str) -> Any:
+        return self.values.get(key)
+
+    async def set_value(self, key: str, value: Any, content_type: str | None = None):
+        self.values[key] = value
+
+
+# Replaces named key-value stores at Apify with ones living in memory
+@pytest.fixture
+def key_value_stores(monkeypatch: pytest.MonkeyPatch) -> dict[str, MemoryKeyValueStore]:
+    stores: dict[str, MemoryKeyValueStore] = {}
+
+    async def open_key_value_store(name: str) -> MemoryKeyValueStore:
+        return stores.setdefault(name, MemoryKeyValueStore())
+
+    monkeypatch.setattr("jg.plucker.cache.open_key_value_store", open_key_value_store)
+    return stores
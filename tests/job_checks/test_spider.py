@@ -1,11 +1,17 @@
+import asyncio
+import time
 from pathlib import Path
 
 import pytest
-from scrapy.http import TextResponse
+from scrapy import Request
+from scrapy.exceptions import StopDownload
+from scrapy.http import Response, TextResponse
 from scrapy.http.response.html import HtmlResponse
+from scrapy.spidermiddlewares.httperror import HttpErrorMiddleware
+from scrapy.utils.test import get_crawler
 
 from jg.plucker.items import JobCheck
-from jg.plucker.job_checks.spider import Spider
+from jg.plucker.job_checks.spider import CheckState, Spider, get_bulk_checker
 from jg.plucker.scrapers import StatsError
 
 
@@ -35,14 +41,209 @@ def test_spider_check_linkedin(
     )
 
 
-def test_spider_check_startupjobs():
+@pytest.mark.parametrize(
+    "method, status, expected_ok",
+    [
+        ("HEAD", 200, True),
+        ("HEAD", 404, False),
+        ("HEAD", 410, False),
+        ("GET", 206, True),
+        ("GET", 200, True),
+        ("GET", 405, False),
+    ],
+)
+def test_spider_check_http(method: str, status: int, expected_ok: bool):
+    url = "https://example.com/jobs/123"
+    response = Response(url, status=status, request=Request(url, method=method))
+    check = Spider().check_http(response)
+
+    assert check == JobCheck(url=url, ok=expected_ok, reason=f"HTTP {status}")
+
+
+@pytest.mark.parametrize("status", [405, 501])
+def test_spider_check_http_head_rejected(status: int):
+    url = "https://example.com/jobs/123"
+    response = Response(url, status=status, request=Request(url, method="HEAD"))
+    request = Spider().check_http(response)
+
+    assert isinstance(request, Request)
+    assert request.url == url
+    assert request.method == "GET"
+    assert request.headers["Range"] == b"bytes=0-0"
+    assert request.meta["abort_body"] is True
+    assert request.dont_filter is True
+
+
+@pytest.mark.parametrize("status", [404, 410, 405, 501])
+def test_spider_check_http_passes_http_error_middleware(status: int):
+    crawler = get_crawler(Spider)
+    crawler.spider = Spider.from_crawler(crawler)
+    middleware = HttpErrorMiddleware.from_crawler(crawler)
+    request = crawler.spider.get_http_request("https://example.com/jobs/123")
+    response = Response(request.url, status=status, request=request)
+    middleware.process_spider_input(response)
+
+    assert crawler.spider.check_http(response)
+
+
+def test_spider_headers_received_aborts_body():
+    request = Request("https://example.com/jobs/123", meta={"abort_body": True})
+
+    with pytest.raises(StopDownload):
+        Spider().headers_received({}, 1000, request, Spider())
+
+
+def test_spider_headers_received_keeps_body():
+    request = Request("https://example.com/jobs/123")
+
+    assert Spider().headers_received({}, 1000, request, Spider()) is None
+
+
+def test_spider_closed_reports_rate(caplog):
+    spider = Spider()
+    spider.item_scraped(
+        JobCheck(url="https://example.com/1", ok=True, reason="HTTP 200")
+    )
+    spider.item_scraped(
+        JobCheck(url="https://example.com/2", ok=False, reason="HTTP 404")
+    )
+
+    with caplog.at_level("INFO"):
+        spider.closed("finished")
+
+    assert "Checked 2 URLs in " in caplog.text
+    assert "1 ok, 1 not ok, 0 fell back from HEAD to GET" in caplog.text
+
+
+async def collect_start(spider: Spider) -> list:
+    return [obj async for obj in spider.start()]
+
+
+def test_spider_start_skips_recent_checks(tmp_path: Path):
+    spider = Spider(
+        links=[
+            {"url": "https://example.com/ok-recent"},
+            {"url": "https://example.com/ok-old"},
+            {"url": "https://example.com/dead-old"},
+            {"url": "https://example.com/new"},
+        ],
+        check_state_path=str(tmp_path),
+    )
+    now = time.time()
+    for url, ok, checked_at in [
+        ("https://example.com/ok-recent", True, now - 60),
+        ("https://example.com/ok-old", True, now - 60 * 60 * 48),
+        ("https://example.com/dead-old", False, now - 60 * 60 * 24 * 365),
+    ]:
+        spider._state.set(url, dict(url=url, ok=ok, reason="HTTP"), checked_at)
+    results = asyncio.run(collect_start(spider))
+    spider.closed("finished")
+
+    assert sorted(
+        result["url"] for result in results if isinstance(result, JobCheck)
+    ) == ["https://example.com/dead-old", "https://example.com/ok-recent"]
+    assert sorted(result.url for result in results if isinstance(result, Request)) == [
+        "https://example.com/new",
+        "https://example.com/ok-old",
+    ]
+
+
+def test_spider_start_rechecks_dead_links_if_configured(tmp_path: Path):
+    spider = Spider(
+        links=[{"url": "https://example.com/dead"}],
+        check_state_path=str(tmp_path),
+        recheck_not_ok_after=60,
+    )
+    spider._state.set(
+        "https://example.com/dead",
+        dict(url="https://example.com/dead", ok=False, reason="HTTP 404"),
+        time.time() - 120,
+    )
+    results = asyncio.run(collect_start(spider))
+    spider.closed("finished")
+
+    assert [result.url for result in results] == ["https://example.com/dead"]
+
+
+def test_spider_item_scraped_stores_state(tmp_path: Path):
+    spider = Spider(check_state_path=str(tmp_path))
+    request = Request(
+        "https://example.com/jobs/123",
+        method="HEAD",
+        meta={"check_url": "https://example.com/jobs/123"},
+    )
+    response = Response("https://example.com/jobs/", request=request)
+    check = JobCheck(url="https://example.com/jobs/", ok=True, reason="HTTP 200")
+    spider.item_scraped(check, response)
+
+    assert spider.get_recent_check("https://example.com/jobs/123") == check
+    assert spider.get_recent_check("https://example.com/jobs/") == check
+    spider.closed("finished")
+
+
+def test_spider_item_scraped_skips_replayed_checks(tmp_path: Path):
+    spider = Spider(check_state_path=str(tmp_path))
+    check = JobCheck(url="https://example.com/jobs/123", ok=True, reason="HTTP 200")
+    spider._replayed_urls.add(check["url"])
+    spider.item_scraped(check)
+
+    assert spider.get_recent_check(check["url"]) is None
+    spider.closed("finished")
+
+
+def test_check_state_persistence(tmp_path: Path):
+    state = CheckState(tmp_path)
+    state.set("https://example.com", dict(ok=True), 123.0)
+    state.close()
+    state = CheckState(tmp_path)
+
+    assert state.get("https://example.com") == dict(
+        item=dict(ok=True), checked_at=123.0
+    )
+    state.close()
+
+
+def test_spider_check_state_key_value_store(key_value_stores: dict):
+    crawler = get_crawler(Spider, settings_dict={"CHECK_STATE_KVS_NAME": "check-state"})
+    spider = Spider.from_crawler(crawler)
+    check = JobCheck(url="https://example.com/jobs/123", ok=True, reason="HTTP 200")
+    spider.item_scraped(check)
+    spider.closed("finished")
+    spider = Spider.from_crawler(crawler)
+
+    assert spider.get_recent_check("https://example.com/jobs/123") == check
+    assert list(key_value_stores) == ["check-state"]
+    spider.closed("finished")
+
+
+def test_spider_check_state_path_takes_precedence(
+    tmp_path: Path, key_value_stores: dict
+):
+    crawler = get_crawler(Spider, settings_dict={"CHECK_STATE_KVS_NAME": "check-state"})
+    spider = Spider.from_crawler(crawler, check_state_path=str(tmp_path))
+    check = JobCheck(url="https://example.com/jobs/123", ok=True, reason="HTTP 200")
+    spider.item_scraped(check)
+    spider.closed("finished")
+
+    assert key_value_stores == {}
+
+
+def test_check_state_disabled():
+    state = CheckState()
+    state.set("https://example.com", dict(ok=True), 123.0)
+
+    assert state.get("https://example.com") is None
+
+
+def test_spider_check_bulk_startupjobs():
     response = TextResponse(
         "https://example.com/feed.json",
         body=Path(FIXTURES_DIR / "startupjobs.json").read_bytes(),
     )
     links = list(
-        Spider().check_startupjobs(
+        Spider().check_bulk(
             response,
+            checker_name="STARTUPJOBS",
             urls=[
                 "https://www.startupjobs.cz/nabidka/81775/junior-software-administrator-do-naseho-interniho-it-tymu",
                 "https://www.startupjobs.cz/nabidka/82417/ict-engineer-se-zamerenim-na-linux-a-voip",
@@ -64,6 +265,90 @@ def test_spider_check_startupjobs():
     ]
 
 
+def test_spider_check_bulk_unparseable_url():
+    response = TextResponse(
+        "https://example.com/feed.json",
+        body=Path(FIXTURES_DIR / "startupjobs.json").read_bytes(),
+    )
+    results = list(
+        Spider().check_bulk(
+            response,
+            checker_name="STARTUPJOBS",
+            urls=["https://www.startupjobs.cz/startup/example"],
+        )
+    )
+
+    assert len(results) == 1
+    assert isinstance(results[0], Request)
+    assert results[0].url == "https://www.startupjobs.cz/startup/example"
+    assert results[0].method == "HEAD"
+
+
+def test_spider_start_groups_bulk_urls():
+    spider = Spider(
+        links=[
+            {"url": "https://www.startupjobs.cz/nabidka/1/a"},
+            {"url": "https://example.com/jobs/1"},
+            {"url": "https://www.startupjobs.cz/nabidka/2/b"},
+        ]
+    )
+    requests = asyncio.run(collect_start(spider))
+
+    assert sorted(request.url for request in requests) == [
+        "https://example.com/jobs/1",
+        "https://feedback.startupjobs.cz/feed/juniorguru2.php",
+    ]
+    bulk_request = next(request for request in requests if request.method == "GET")
+    assert bulk_request.cb_kwargs["checker_name"] == "STARTUPJOBS"
+    assert sorted(bulk_request.cb_kwargs["urls"]) == [
+        "https://www.startupjobs.cz/nabidka/1/a",
+        "https://www.startupjobs.cz/nabidka/2/b",
+    ]
+
+
+def test_spider_start_uses_cached_feed(tmp_path: Path):
+    crawler = get_crawler(
+        Spider,
+        settings_dict={"FEED_CACHE_ENABLED": True, "FEED_CACHE_DIR": str(tmp_path)},
+    )
+    spider = Spider.from_crawler(
+        crawler,
+        links=[
+            {"url": "https://www.startupjobs.cz/nabidka/1/a"},
+            {"url": "https://www.startupjobs.cz/nabidka/2/b"},
+        ],
+    )
+    spider.feed_cache.set(  # type: ignore
+        "https://feedback.startupjobs.cz/feed/juniorguru2.php",
+        [{"url": "https://www.startupjobs.cz/nabidka/1/a"}],
+    )
+    results = asyncio.run(collect_start(spider))
+    spider.closed("finished")
+
+    assert sorted(results, key=lambda check: check["url"]) == [
+        JobCheck(
+            url="https://www.startupjobs.cz/nabidka/1/a", ok=True, reason="STARTUPJOBS"
+        ),
+        JobCheck(
+            url="https://www.startupjobs.cz/nabidka/2/b", ok=False, reason="STARTUPJOBS"
+        ),
+    ]
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://www.startupjobs.cz/nabidka/81775/junior", "STARTUPJOBS"),
+        ("https://startupjobs.cz/nabidka/81775/junior", "STARTUPJOBS"),
+        ("https://example.com/nabidka/81775/junior", None),
+    ],
+)
+def test_get_bulk_checker(url: str, expected: str | None):
+    checker = get_bulk_checker(url)
+
+    assert (checker.name if checker else None) == expected
+
+
 def test_spider_linkedin_request_warns_and_skips(caplog):
     url = "https://www.linkedin.com/jobs/view/tester-at-coolpeople-4015921370/"
 
@@ -0,0 +1,529 @@
+import asyncio
+import hashlib
+from io import BytesIO
+from pathlib import Path
+from typing import cast
+
+import pytest
+from PIL import Image
+from scrapy import Request
+from scrapy.exceptions import DownloadCancelledError
+from scrapy.http import HtmlResponse, Response
+from scrapy.utils.test import get_crawler
+from twisted.python.failure import Failure
+
+from jg.plucker.items import JobLogo
+from jg.plucker.job_logos.spider import (
+    Candidates,
+    Kind,
+    LogoCache,
+    Spider,
+    read_image_header,
+    select_logo,
+    select_manifest_icon,
+)
+
+
+def create_image(
+    format: str, size: tuple[int, int], mode: str = "RGBA", **kwargs
+) -> bytes:
+    buffer = BytesIO()
+    Image.new(mode, size, "red").save(buffer, format=format, **kwargs)
+    return buffer.getvalue()
+
+
+def create_response(url: str, body: bytes, content_type: str) -> Response:
+    request = Request(url)
+    return Response(
+        url, body=body, headers={"Content-Type": content_type}, request=request
+    )
+
+
+def create_logo(
+    url: str, size: tuple[int, int], image_hash: str | None = None
+) -> JobLogo:
+    return JobLogo(
+        image_url=b"...",
+        image_hash=image_hash or url,
+        original_image_url=url,
+        width=size[0],
+        height=size[1],
+        format="png",
+        source_url="https://example.com",
+    )
+
+
+def test_spider_parse_image():
+    body = create_image("PNG", (32, 16))
+    response = create_response("https://example.com/logo.png", body, "image/png")
+    logo = next(Spider().parse(response))
+
+    assert isinstance(logo, JobLogo)
+    assert logo["image_url"] == body
+    assert logo["image_hash"] == hashlib.sha256(body).hexdigest()
+    assert logo["original_image_url"] == "https://example.com/logo.png"
+    assert logo["width"] == 32
+    assert logo["height"] == 16
+    assert logo["format"] == "png"
+    assert logo["source_url"] == "https://example.com/logo.png"
+    assert logo["alternatives"] == []
+
+
+def test_spider_parse_image_too_large():
+    body = create_image("PNG", (32, 16))
+    response = create_response("https://example.com/logo.png", body, "image/png")
+    spider = Spider()
+    spider.image_maxsize = 10
+
+    assert list(spider.parse(response)) == []
+
+
+def test_spider_parse_homepage():
+    request = Request("https://example.com")
+    response = HtmlResponse(
+        "https://example.com",
+        body=(
+            b'<html><head><link rel="icon" href="/icon.png">'
+            b'<link rel="apple-touch-icon" href="/touch.png">'
+            b'<link rel="manifest" href="/site.webmanifest"></head></html>'
+        ),
+        request=request,
+    )
+    spider = Spider()
+    requests = list(spider.parse(response))
+
+    assert sorted(
+        (request.url, request.cb_kwargs.get("kind")) for request in requests
+    ) == [
+        ("https://example.com/favicon.ico", "favicon"),
+        ("https://example.com/icon.png", "icon"),
+        ("https://example.com/site.webmanifest", None),
+        ("https://example.com/touch.png", "apple-touch-icon"),
+    ]
+    assert all(request.dont_filter for request in requests)
+    assert all(
+        request.meta["download_maxsize"] == Spider.image_maxsize
+        for request in requests
+        if request.callback == spider.parse_icon
+    )
+    assert spider.candidates["https://example.com"].pending == 4
+
+
+def test_spider_parse_icon_resolves_best_logo():
+    spider = Spider()
+    spider.candidates["https://example.com"] = Candidates(pending=2)
+    favicon = create_image("ICO", (16, 16))
+    touch_icon = create_image("PNG", (180, 180))
+
+    assert (
+        list(
+            spider.parse_icon(
+                create_response(
+                    "https://example.com/favicon.ico", favicon, "image/x-icon"
+                ),
+                source_url="https://example.com",
+                kind=Kind.FAVICON,
+            )
+        )
+        == []
+    )
+    logos = list(
+        spider.parse_icon(
+            create_response("https://example.com/touch.png", touch_icon, "image/png"),
+            source_url="https://example.com",
+            kind=Kind.APPLE_TOUCH_ICON,
+        )
+    )
+
+    assert len(logos) == 1
+    assert logos[0]["original_image_url"] == "https://example.com/touch.png"
+    assert logos[0]["source_url"] == "https://example.com"
+    assert logos[0]["alternatives"] == [
+        dict(
+            url="https://example.com/favicon.ico",
+            width=16,
+            height=16,
+            format="ico",
+            kind="favicon",
+        )
+    ]
+    assert spider.candidates == {}
+
+
+def test_spider_parse_icon_html():
+    spider = Spider()
+    spider.candidates["https://example.com"] = Candidates(pending=1)
+    request = Request("https://example.com/favicon.ico")
+    response = HtmlResponse(
+        "https://example.com/favicon.ico", body=b"<html></html>", request=request
+    )
+
+    assert (
+        list(
+            spider.parse_icon(
+                response, source_url="https://example.com", kind=Kind.FAVICON
+            )
+        )
+        == []
+    )
+    assert spider.candidates == {}
+
+
+def test_spider_parse_manifest():
+    spider = Spider()
+    spider.candidates["https://example.com"] = Candidates(pending=1)
+    body = (
+        b'{"icons": ['
+        b'{"src": "/icon-192.png", "sizes": "192x192"},'
+        b'{"src": "/icon-512.png", "sizes": "512x512"},'
+        b'{"src": "/icon.svg", "sizes": "any", "type": "image/svg+xml"}'
+        b"]}"
+    )
+    response = create_response(
+        "https://example.com/site.webmanifest", body, "application/manifest+json"
+    )
+    requests = list(spider.parse_manifest(response, source_url="https://example.com"))
+
+    assert [request.url for request in requests] == ["https://example.com/icon-512.png"]
+    assert requests[0].cb_kwargs["kind"] == Kind.MANIFEST
+    assert spider.candidates["https://example.com"].pending == 1
+
+
+def test_spider_parse_manifest_invalid():
+    spider = Spider()
+    spider.candidates["https://example.com"] = Candidates(pending=1)
+    spider.candidates["https://example.com"].logos.append(
+        (Kind.FAVICON, create_logo("https://example.com/favicon.ico", (16, 16)))
+    )
+    response = create_response(
+        "https://example.com/site.webmanifest", b"<html>", "application/json"
+    )
+    logos = list(spider.parse_manifest(response, source_url="https://example.com"))
+
+    assert [logo["original_image_url"] for logo in logos] == [
+        "https://example.com/favicon.ico"
+    ]
+
+
+@pytest.mark.parametrize(
+    "exception",
+    [DownloadCancelledError("Too large"), ValueError("Boom")],
+)
+def test_spider_handle_icon_error(exception: Exception):
+    spider = Spider()
+    spider.candidates["https://example.com"] = Candidates(pending=2)
+    failure = Failure(exception)
+    failure.request = spider.get_icon_request(  # type: ignore
+        "https://example.com/favicon.ico", "https://example.com", Kind.FAVICON
+    )
+
+    assert list(spider.handle_icon_error(failure)) == []
+    assert spider.candidates["https://example.com"].pending == 1
+
+
+def test_spider_flush_candidates():
+    spider = Spider()
+    spider.candidates["https://example.com"] = Candidates(
+        pending=1,
+        logos=[(Kind.ICON, create_logo("https://example.com/icon.png", (32, 32)))],
+    )
+    logos = list(spider.flush_candidates(create_response("data:,", b"", "text/plain")))
+
+    assert [logo["original_image_url"] for logo in logos] == [
+        "https://example.com/icon.png"
+    ]
+    assert spider.candidates == {}
+
+
+def test_select_logo_empty():
+    assert select_logo([]) is None
+
+
+def test_select_logo_prefers_square():
+    logo = select_logo(
+        [
+            (Kind.ICON, create_logo("https://example.com/wide.png", (400, 100))),
+            (Kind.FAVICON, create_logo("https://example.com/favicon.ico", (32, 32))),
+        ]
+    )
+
+    assert logo
+    assert logo["original_image_url"] == "https://example.com/favicon.ico"
+
+
+def test_select_logo_prefers_kind_over_size():
+    logo = select_logo(
+        [
+            (Kind.ICON, create_logo("https://example.com/icon.png", (256, 256))),
+            (
+                Kind.APPLE_TOUCH_ICON,
+                create_logo("https://example.com/touch.png", (180, 180)),
+            ),
+        ]
+    )
+
+    assert logo
+    assert logo["original_image_url"] == "https://example.com/touch.png"
+
+
+def test_select_logo_prefers_larger():
+    logo = select_logo(
+        [
+            (Kind.ICON, create_logo("https://example.com/16.png", (16, 16))),
+            (Kind.ICON, create_logo("https://example.com/64.png", (64, 64))),
+        ]
+    )
+
+    assert logo
+    assert logo["original_image_url"] == "https://example.com/64.png"
+
+
+def test_select_logo_deduplicates_alternatives():
+    logo = select_logo(
+        [
+            (Kind.ICON, create_logo("https://example.com/a.png", (64, 64), "abc")),
+            (Kind.ICON, create_logo("https://example.com/b.png", (32, 32), "def")),
+            (Kind.ICON, create_logo("https://example.com/c.png", (32, 32), "def")),
+            (Kind.ICON, create_logo("https://example.com/d.png", (64, 64), "abc")),
+        ]
+    )
+
+    assert logo
+    assert [alternative["url"] for alternative in logo["alternatives"]] == [
+        "https://example.com/b.png"
+    ]
+
+
+@pytest.mark.parametrize(
+    "icons, expected",
+    [
+        ([], None),
+        ([{"src": "/a.png", "sizes": "48x48 96x96"}, {"src": "/b.png"}], "/a.png"),
+        (
+            [{"src": "/a.png", "sizes": "any"}, {"src": "/b.png", "sizes": "1x1"}],
+            "/b.png",
+        ),
+        ([{"src": "/a.svg", "sizes": "512x512"}], None),
+        ([{"src": "data:image/png;base64,", "sizes": "512x512"}], None),
+    ],
+)
+def test_select_manifest_icon(icons: list[dict], expected: str | None):
+    icon = select_manifest_icon(icons)
+
+    assert (icon["src"] if icon else None) == expected
+
+
+def create_cache_entry(**kwargs) -> dict:
+    return (
+        dict(
+            icon_url="https://example.com/touch.png",
+            hash="abc",
+            etag='"123"',
+            last_modified="Wed, 21 Oct 2015 07:28:00 GMT",
+            item=dict(
+                create_logo("https://example.com/touch.png", (180, 180)),
+                image_url="https://api.apify.com/v2/key-value-stores/123/records/abc",
+                alternatives=[],
+            ),
+        )
+        | kwargs
+    )
+
+
+async def collect_start_requests(spider: Spider) -> list[Request]:
+    return [request async for request in spider.start()]
+
+
+def test_spider_start(tmp_path: Path):
+    spider = Spider(
+        links=[{"url": "https://example.com"}, {"url": "https://example.org"}],
+        logo_cache_path=str(tmp_path),
+    )
+    spider.logo_cache.set("https://example.com/", create_cache_entry())
+    requests = sorted(
+        asyncio.run(collect_start_requests(spider)), key=lambda request: request.url
+    )
+    spider.closed("finished")
+
+    assert [request.url for request in requests] == [
+        "https://example.com/touch.png",
+        "https://example.org/",
+    ]
+    assert requests[0].headers["If-None-Match"] == b'"123"'
+    assert requests[0].headers["If-Modified-Since"] == b"Wed, 21 Oct 2015 07:28:00 GMT"
+    assert requests[0].meta["dont_cache"] is True
+    assert requests[0].meta["handle_httpstatus_list"] == [304]
+    assert requests[0].callback == spider.parse_cached_logo
+    assert requests[1].callback is None
+
+
+def test_spider_get_revalidation_request_without_validators():
+    request = Spider().get_revalidation_request(
+        "https://example.com", create_cache_entry(etag=None, last_modified=None)
+    )
+
+    assert "If-None-Match" not in request.headers
+    assert "If-Modified-Since" not in request.headers
+
+
+@pytest.mark.parametrize(
+    "status, body",
+    [
+        (304, b""),
+        (200, b"unchanged"),
+    ],
+)
+def test_spider_parse_cached_logo_unchanged(tmp_path: Path, status: int, body: bytes):
+    spider = Spider(logo_cache_path=str(tmp_path))
+    entry = create_cache_entry(hash=hashlib.sha256(b"unchanged").hexdigest())
+    spider.logo_cache.set("https://example.com", entry)
+    response = Response(
+        "https://example.com/touch.png",
+        status=status,
+        body=body,
+        request=Request("https://example.com/touch.png"),
+    )
+    logos = list(spider.parse_cached_logo(response, source_url="https://example.com"))
+    spider.closed("finished")
+
+    assert len(logos) == 1
+    assert isinstance(logos[0], JobLogo)
+    assert dict(logos[0]) == entry["item"]
+
+
+def test_spider_parse_cached_logo_changed(tmp_path: Path):
+    spider = Spider(logo_cache_path=str(tmp_path))
+    spider.logo_cache.set("https://example.com", create_cache_entry())
+    response = create_response(
+        "https://example.com/touch.png", create_image("PNG", (16, 16)), "image/png"
+    )
+    requests = list(
+        spider.parse_cached_logo(response, source_url="https://example.com")
+    )
+    spider.closed("finished")
+
+    assert [request.url for request in requests] == ["https://example.com"]
+    assert requests[0].callback is None
+
+
+def test_spider_handle_cached_logo_error():
+    spider = Spider()
+    failure = Failure(ValueError("Boom"))
+    failure.request = spider.get_revalidation_request(  # type: ignore
+        "https://example.com", create_cache_entry()
+    )
+    requests = list(spider.handle_cached_logo_error(failure))
+
+    assert [request.url for request in requests] == ["https://example.com"]
+
+
+def test_spider_item_scraped_caches_logo(tmp_path: Path):
+    spider = Spider(logo_cache_path=str(tmp_path))
+    body = create_image("PNG", (180, 180))
+    response = create_response("https://example.com/touch.png", body, "image/png")
+    response.headers["ETag"] = '"123"'
+    logo = cast(JobLogo, spider.load_logo(response, "image/png", "https://example.com"))
+    logo["image_url"] = "https://api.apify.com/v2/key-value-stores/123/records/abc"
+    spider.item_scraped(logo, response)
+
+    assert spider.logo_cache.get("https://example.com") == dict(
+        icon_url="https://example.com/touch.png",
+        hash=hashlib.sha256(body).hexdigest(),
+        etag='"123"',
+        last_modified=None,
+        item=dict(logo),
+    )
+    spider.closed("finished")
+
+
+def test_spider_item_scraped_caches_logo_of_redirected_link(tmp_path: Path):
+    spider = Spider(
+        links=[{"url": "https://example.com"}], logo_cache_path=str(tmp_path)
+    )
+    request = Request(
+        "https://www.example.com/",
+        meta={"redirect_urls": ["https://example.com/"]},
+    )
+    response = HtmlResponse(
+        "https://www.example.com/",
+        body=b"<html><head></head></html>",
+        request=request,
+    )
+    list(spider.parse(response))
+    body = create_image("PNG", (180, 180))
+    response = create_response("https://www.example.com/favicon.ico", body, "image/png")
+    logo = cast(
+        JobLogo, spider.load_logo(response, "image/png", "https://www.example.com/")
+    )
+    spider.item_scraped(logo, response)
+    requests = asyncio.run(collect_start_requests(spider))
+    spider.closed("finished")
+
+    assert [request.url for request in requests] == [
+        "https://www.example.com/favicon.ico"
+    ]
+    assert requests[0].cb_kwargs == {"source_url": "https://example.com/"}
+
+
+def test_spider_item_scraped_ignores_replayed_logo(tmp_path: Path):
+    spider = Spider(logo_cache_path=str(tmp_path))
+    logo = JobLogo(**create_cache_entry()["item"])
+    spider.item_scraped(logo, create_response("data:,", b"", "text/plain"))
+
+    assert spider.logo_cache.get("https://example.com") is None
+    spider.closed("finished")
+
+
+def test_logo_cache_persistence(tmp_path: Path):
+    cache = LogoCache(tmp_path, ttl=60)
+    cache.set("https://example.com", create_cache_entry())
+    cache.close()
+    cache = LogoCache(tmp_path, ttl=60)
+
+    assert cache.get("https://example.com") == create_cache_entry()
+    cache.close()
+
+
+def test_spider_logo_cache_key_value_store(key_value_stores: dict):
+    crawler = get_crawler(Spider, settings_dict={"LOGO_CACHE_KVS_NAME": "logo-cache"})
+    spider = Spider.from_crawler(crawler)
+    spider.logo_cache.set("https://example.com", create_cache_entry())
+    spider.closed("finished")
+    spider = Spider.from_crawler(crawler)
+
+    assert spider.logo_cache.get("https://example.com") == create_cache_entry()
+    assert list(key_value_stores) == ["logo-cache"]
+    spider.closed("finished")
+
+
+def test_spider_logo_cache_path_takes_precedence(
+    tmp_path: Path, key_value_stores: dict
+):
+    crawler = get_crawler(Spider, settings_dict={"LOGO_CACHE_KVS_NAME": "logo-cache"})
+    spider = Spider.from_crawler(crawler, logo_cache_path=str(tmp_path))
+    spider.logo_cache.set("https://example.com", create_cache_entry())
+
+    assert key_value_stores == {}
+    spider.closed("finished")
+
+
+def test_logo_cache_disabled():
+    cache = LogoCache()
+    cache.set("https://example.com", create_cache_entry())
+
+    assert cache.get("https://example.com") is None
+
+
+@pytest.mark.parametrize(
+    "format, kwargs, expected_content_type",
+    [
+        ("PNG", {}, "image/png"),
+        ("GIF", {}, "image/gif"),
+        ("WEBP", {}, "image/webp"),
+        ("ICO", {"sizes": [(16, 16), (48, 48)]}, "image/x-icon"),
+    ],
+)
+def test_read_image_header(format: str, kwargs: dict, expected_content_type: str):
+    body = create_image(format, (48, 48), **kwargs)
+
+    assert read_image_header(body, "") == (expected_content_type, 48, 48)
@@ -2,14 +2,32 @@ import itertools
 import json
 from datetime import date
 from pathlib import Path
+from types import SimpleNamespace
 from typing import cast
 
 import pytest
+from scrapy import Request
+from scrapy.core.scheduler import Scheduler
+from scrapy.exceptions import DontCloseSpider
 from scrapy.http.response.html import HtmlResponse
 from scrapy.http.response.text import TextResponse
+from scrapy.spidermiddlewares.httperror import HttpError
+from scrapy.utils.test import get_crawler
+from twisted.python.failure import Failure
 
 from jg.plucker.items import Job
-from jg.plucker.jobs_jobscz.spider import Spider, get_param, get_params, select_widget
+from jg.plucker.jobs_jobscz.spider import (
+    WIDGET_QUERY_PATH,
+    Spider,
+    WidgetConfigCache,
+    get_batch_gql,
+    get_page_count,
+    get_param,
+    get_params,
+    scan_widget_script,
+    select_widget,
+    set_page,
+)
 
 
 FIXTURES_DIR = Path(__file__).parent
@@ -22,7 +40,7 @@ def test_spider_parse():
     )
     requests = list(Spider().parse(response))
 
-    assert len(requests) == 30 + 1  # jobs + next page
+    assert len(requests) == 30 + 22  # jobs + pages 2-23
 
     assert (
         requests[1].url
@@ -53,12 +71,73 @@ def test_spider_parse():
         "https://beta.www.jobs.cz/rpd/2000120375/?searchId=868cde40-9065-4e83-83ce-2fe2fa38d529&rps=228",
     }
 
+    assert (
+        requests[30].url
+        == "https://beta.www.jobs.cz/prace/programator/?profession%5B0%5D=201100249&page=2"
+    )
+    assert (
+        requests[-1].url
+        == "https://beta.www.jobs.cz/prace/programator/?profession%5B0%5D=201100249&page=23"
+    )
+
+
+def test_spider_parse_fans_out_listing_pages():
+    response = HtmlResponse(
+        "https://beta.www.jobs.cz/prace/...",
+        body=Path(FIXTURES_DIR / "listing.html").read_bytes(),
+    )
+    requests = list(Spider().parse(response))[30:]
+
+    assert [request.cb_kwargs["follow_next"] for request in requests] == [
+        False
+    ] * 21 + [True]
+    assert {request.meta["download_slot"] for request in requests} == {
+        "jobs.cz-listing"
+    }
+
+
+def test_spider_parse_fans_out_listing_pages_max():
+    response = HtmlResponse(
+        "https://beta.www.jobs.cz/prace/...",
+        body=Path(FIXTURES_DIR / "listing.html").read_bytes(),
+    )
+    spider = Spider()
+    spider.max_listing_pages = 5
+    requests = list(spider.parse(response))[30:]
+
+    assert [request.url for request in requests] == [
+        f"https://beta.www.jobs.cz/prace/programator/?profession%5B0%5D=201100249&page={page}"
+        for page in range(2, 6)
+    ]
+    assert requests[-1].cb_kwargs["follow_next"] is True
+
+
+def test_spider_parse_fans_out_listing_pages_without_results_count():
+    response = HtmlResponse(
+        "https://beta.www.jobs.cz/prace/...",
+        body=Path(FIXTURES_DIR / "listing.html")
+        .read_bytes()
+        .replace(b'"resultsCount"', b'"foo"'),
+    )
+    requests = list(Spider().parse(response))
+
+    assert len(requests) == 30 + 1  # jobs + next page
     assert (
         requests[-1].url
         == "https://beta.www.jobs.cz/prace/programator/?profession%5B0%5D=201100249&page=2"
     )
 
 
+def test_spider_parse_listing_page_without_following_next():
+    url = "https://www.jobs.cz/prace/programator/?profession[0]=201100249&page=5"
+    response = HtmlResponse(
+        url, body=Path(FIXTURES_DIR / "listing_page.html").read_bytes()
+    )
+    requests = list(Spider().parse(response, follow_next=False))
+
+    assert len(requests) == 30
+
+
 def test_spider_parse_listing_page():
     url = "https://www.jobs.cz/prace/programator/?profession[0]=201100249&page=5"
     response = HtmlResponse(
@@ -228,7 +307,7 @@ def test_spider_parse_job_widget():
     response = HtmlResponse(
         url, body=Path(FIXTURES_DIR / "job_widget.html").read_bytes()
     )
-    request = next(Spider().parse_job(response, Job(), "123"))
+    request = next(Spider(widget_batch_size=1).parse_job(response, Job(), "123"))
 
     assert request.method == "POST"
     assert request.headers["Content-Type"] == b"application/json"
@@ -336,7 +415,9 @@ def test_spider_parse_job_widget_script_response():
         body=Path(FIXTURES_DIR / "job_widget_script.js").read_bytes(),
     )
     request = next(
-        Spider().parse_job_widget_script(response, html_url, Job(), [], "123")
+        Spider(widget_batch_size=1).parse_job_widget_script(
+            response, html_url, Job(), [], "123"
+        )
     )
 
     assert request.method == "POST"
@@ -375,11 +456,349 @@ def test_spider_parse_job_widget_script_response_parsing_doesnt_raise(path: Path
     response = TextResponse(
         "https://foo.jobs.cz/assets/js/script.min.js", body=path.read_bytes()
     )
-    requests = Spider().parse_job_widget_script(response, html_url, Job(), [], "123")
+    requests = Spider(widget_batch_size=1).parse_job_widget_script(
+        response, html_url, Job(), [], "123"
+    )
 
     assert next(requests)
 
 
+@pytest.mark.parametrize(
+    "path, expected_host",
+    [
+        ("job_widget_script.js", "skoda-auto.jobs.cz"),
+        ("job_widget_script2.js", "commerzbank.jobs.cz"),
+        ("job_widget_script3.js", "skoda-auto.jobs.cz"),
+        ("job_widget_script4.js", "aricoma.jobs.cz"),
+        ("job_widget_script5.js", "kbc.jobs.cz"),
+        ("job_widget_script7.js", "hofmann-personal.jobs.cz"),
+        ("job_widget_script8.js", "csas.jobs.cz"),
+        ("job_widget_script9.js", "mcdonalds.jobs.cz"),
+    ],
+)
+def test_scan_widget_script_config(path: str, expected_host: str):
+    data = scan_widget_script(Path(FIXTURES_DIR / path).read_text())
+
+    assert data.config
+    assert data.config["host"] == expected_host
+    assert data.config["widgets"]
+
+
+def test_scan_widget_script_config_unescapes_js_string():
+    data = scan_widget_script(Path(FIXTURES_DIR / "job_widget_script2.js").read_text())
+
+    assert data.config
+    assert data.config["pages"]["article-en"]["pattern"] == "/^article\\/.*$/"
+
+
+def test_scan_widget_script_mess():
+    data = scan_widget_script(Path(FIXTURES_DIR / "job_widget_script6.js").read_text())
+
+    assert data.config is None
+    assert data.mess == {
+        "widgetId": "9c835d8e-d25b-432e-9865-4a48fc6f4133",
+        "widgetApiKey": "555a0cef136000b1f58a4a3f05915ac645831d57492ff0d96386f03c307c7e4e",
+    }
+
+
+def test_scan_widget_script_react_chunk_names():
+    data = scan_widget_script(
+        Path(FIXTURES_DIR / "job_widget_script_react_chunks.js").read_text()
+    )
+
+    assert data.config is None
+    assert data.mess is None
+    assert data.react_chunk_names == [
+        "react.50e0a46e.react.min.js",
+        "react.49d0a293.react.min.js",
+        "react.b48beae3.react.min.js",
+        "react.a6b7edbd.react.min.js",
+        "react.092d452b.react.min.js",
+        "react.493cc602.react.min.js",
+        "react.229eafb5.react.min.js",
+    ]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        'var a=JSON.parse(\'{"widgets":',
+        "var a=JSON.parse('{\"widgets\":{}')",
+        'n()(r,"widgetApiKey","abc")',
+        '"widgetApiKey","abc")n()(r,"widgetId","123")',
+        '"react..react.min.js"',
+    ],
+)
+def test_scan_widget_script_nothing(text: str):
+    data = scan_widget_script(text)
+
+    assert data.config is None
+    assert data.mess is None
+    assert data.react_chunk_names == []
+
+
+def test_spider_parse_job_widget_uses_cached_config():
+    url = "https://skoda-auto.jobs.cz/detail-pozice?r=detail&id=1632413478&rps=233&impressionId=24d42f33-4e37-4a12-98a8-892a30257708"
+    spider = Spider(widget_batch_size=1)
+    spider.widget_configs.set(
+        "skoda-auto.jobs.cz",
+        dict(widget_host="skoda-auto.jobs.cz", widget_api_key="abc", widget_id="123"),
+    )
+    response = HtmlResponse(
+        url, body=Path(FIXTURES_DIR / "job_widget_script.html").read_bytes()
+    )
+    request = next(spider.parse_job(response, Job(), "123"))
+
+    assert request.method == "POST"
+    assert request.headers["X-Api-Key"] == b"abc"
+    assert json.loads(request.body)["variables"]["widgetId"] == "123"
+
+
+def test_spider_parse_job_widget_waits_for_config_being_resolved():
+    url1 = "https://skoda-auto.jobs.cz/detail-pozice?r=detail&id=1632413478&rps=233&impressionId=24d42f33-4e37-4a12-98a8-892a30257708"
+    url2 = "https://skoda-auto.jobs.cz/detail-pozice?r=detail&id=1632413479&rps=233&impressionId=24d42f33-4e37-4a12-98a8-892a30257709"
+    body = Path(FIXTURES_DIR / "job_widget_script.html").read_bytes()
+    spider = Spider(widget_batch_size=1)
+    script_requests = list(spider.parse_job(HtmlResponse(url1, body=body), Job(), "1"))
+    waiting_requests = list(spider.parse_job(HtmlResponse(url2, body=body), Job(), "2"))
+
+    assert len(script_requests) == 1
+    assert waiting_requests == []
+
+    script_response = TextResponse(
+        script_requests[0].url,
+        body=Path(FIXTURES_DIR / "job_widget_script.js").read_bytes(),
+    )
+    requests = list(
+        spider.parse_job_widget_script(script_response, **script_requests[0].cb_kwargs)
+    )
+
+    assert [
+        json.loads(request.body)["variables"]["jobAdId"] for request in requests
+    ] == [
+        "1632413478",
+        "1632413479",
+    ]
+    assert spider.widget_configs.get("skoda-auto.jobs.cz") == dict(
+        widget_host="skoda-auto.jobs.cz",
+        widget_api_key="79b29ad58130f75778f8b9d041b789fdd7fc6b428d01ba27f3c1ca569ec39757",
+        widget_id="e06a5b79-9c00-495c-9f0d-a0cf77001ef6",
+    )
+
+
+def create_waiting_jobs(spider: Spider, count: int) -> Request:
+    url = "https://skoda-auto.jobs.cz/detail-pozice?r=detail&id={id}&rps=233&impressionId=24d42f33-4e37-4a12-98a8-892a30257708"
+    body = Path(FIXTURES_DIR / "job_widget_script.html").read_bytes()
+    responses = [HtmlResponse(url.format(id=n), body=body) for n in range(count)]
+    script_request = next(spider.parse_job(responses[0], Job(), "0"))
+    for n, response in enumerate(responses[1:], start=1):
+        assert list(spider.parse_job(response, Job(), str(n))) == []
+    return script_request
+
+
+def create_failure(request: Request, exception: Exception) -> Failure:
+    failure = Failure(exception)
+    failure.request = request  # type: ignore
+    return failure
+
+
+def test_spider_parse_job_widget_drops_waiting_jobs_on_script_error():
+    spider = Spider(widget_batch_size=1)
+    script_request = create_waiting_jobs(spider, 3)
+    response = TextResponse(script_request.url, status=404)
+    failure = create_failure(script_request, HttpError(response))
+
+    assert list(spider.handle_widget_script_error(failure)) == []
+    assert spider.widget_configs_waiting == {}
+    assert spider.widget_configs_failed == {"skoda-auto.jobs.cz"}
+
+
+def test_spider_parse_job_widget_retries_script_on_transient_error():
+    crawler = get_crawler(
+        Spider,
+        settings_dict={
+            "SCHEDULER_PRIORITY_QUEUE": "scrapy.pqueues.ScrapyPriorityQueue"
+        },
+    )
+    spider = Spider.from_crawler(crawler, widget_batch_size=1)
+    scheduler = Scheduler.from_crawler(crawler)
+    scheduler.open(spider)
+    script_request = create_waiting_jobs(spider, 2)
+    failure = create_failure(script_request, TimeoutError())
+    (retry_request,) = spider.handle_widget_script_error(failure)
+
+    assert scheduler.enqueue_request(script_request) is True
+    assert scheduler.enqueue_request(script_request.copy()) is False
+    assert scheduler.enqueue_request(retry_request) is True
+    assert retry_request.url == script_request.url
+    assert retry_request.callback == spider.parse_job_widget_script
+    assert len(spider.widget_configs_waiting["skoda-auto.jobs.cz"]) == 1
+
+    failure = create_failure(retry_request, TimeoutError())
+
+    assert list(spider.handle_widget_script_error(failure)) == []
+    assert spider.widget_configs_waiting == {}
+
+
+def test_spider_parse_job_widget_drops_waiting_jobs_when_not_found():
+    spider = Spider(widget_batch_size=1)
+    script_request = create_waiting_jobs(spider, 2)
+    script_response = TextResponse(script_request.url, body=b"console.log('nothing');")
+    results = spider.parse_job_widget_script(
+        script_response, **{**script_request.cb_kwargs, "script_urls": []}
+    )
+
+    with pytest.raises(NotImplementedError):
+        next(results)
+    assert spider.widget_configs_waiting == {}
+
+
+def test_spider_parse_job_widget_skips_jobs_of_failed_host():
+    url = "https://skoda-auto.jobs.cz/detail-pozice?r=detail&id=1632413478&rps=233&impressionId=24d42f33-4e37-4a12-98a8-892a30257708"
+    body = Path(FIXTURES_DIR / "job_widget_script.html").read_bytes()
+    spider = Spider(widget_batch_size=1)
+    spider.widget_configs_failed.add("skoda-auto.jobs.cz")
+
+    assert list(spider.parse_job(HtmlResponse(url, body=body), Job(), "1")) == []
+    assert spider.widget_configs_waiting == {}
+
+
+def test_widget_config_cache_persistence(tmp_path: Path):
+    config = dict(widget_host="example.com", widget_api_key="abc", widget_id="123")
+    cache = WidgetConfigCache(tmp_path)
+    cache.set("example.com", config)
+    cache.close()
+
+    cache = WidgetConfigCache(tmp_path)
+
+    assert cache.get("example.com") == config
+    assert cache.get("example.org") is None
+
+
+def test_widget_config_cache_in_memory():
+    config = dict(widget_host="example.com", widget_api_key="abc", widget_id="123")
+    cache = WidgetConfigCache()
+    cache.set("example.com", config)
+
+    assert cache.get("example.com") == config
+    assert WidgetConfigCache().get("example.com") is None
+
+
+def test_spider_parse_job_widget_batch():
+    url = "https://skoda-auto.jobs.cz/detail-pozice?r=detail&id={id}&rps=233&impressionId=24d42f33-4e37-4a12-98a8-892a30257708"
+    spider = Spider(widget_batch_size=2)
+    widget_config = dict(
+        widget_host="skoda-auto.jobs.cz", widget_api_key="abc", widget_id="123"
+    )
+    requests1 = list(
+        spider.parse_job_widget(url.format(id=1), Job(), trk="1", **widget_config)
+    )
+    requests2 = list(
+        spider.parse_job_widget(url.format(id=2), Job(), trk="2", **widget_config)
+    )
+
+    assert requests1 == []
+    assert len(requests2) == 1
+    assert requests2[0].headers["X-Api-Key"] == b"abc"
+
+    body = json.loads(requests2[0].body)
+
+    assert body["operationName"] == "DETAIL_BATCH_QUERY"
+    assert "job1: widget(" in body["query"]
+    assert body["variables"]["widgetId"] == "123"
+    assert body["variables"]["jobAdId0"] == "1"
+    assert body["variables"]["jobAdId1"] == "2"
+    assert body["variables"]["referer1"] == url.format(id=2)
+    assert spider.widget_batches == {}
+
+
+def test_spider_spider_idle_flushes_widget_batches():
+    url = "https://skoda-auto.jobs.cz/detail-pozice?r=detail&id={id}&rps=233&impressionId=24d42f33-4e37-4a12-98a8-892a30257708"
+    spider = Spider(widget_batch_size=10)
+    crawled_requests = []
+    spider.crawler = SimpleNamespace(  # type: ignore
+        engine=SimpleNamespace(crawl=crawled_requests.append)
+    )
+    for id in range(3):
+        list(
+            spider.parse_job_widget(
+                url.format(id=id),
+                Job(),
+                widget_host="skoda-auto.jobs.cz",
+                widget_api_key="abc",
+                widget_id="123",
+                trk=str(id),
+            )
+        )
+
+    with pytest.raises(DontCloseSpider):
+        spider.spider_idle()
+    spider.spider_idle()
+
+    assert len(crawled_requests) == 1
+    assert len(json.loads(crawled_requests[0].body)["variables"]) > 3 * 4
+
+
+def test_spider_parse_job_widget_batch_api():
+    url = "https://skoda-auto.jobs.cz/detail-pozice?r=detail&id={id}&rps=233&impressionId=24d42f33-4e37-4a12-98a8-892a30257708"
+    widget = json.loads(Path(FIXTURES_DIR / "job_widget_api.json").read_bytes())[
+        "data"
+    ]["widget"]
+    response = TextResponse(
+        "https://api.capybara.lmc.cz/api/graphql/widget",
+        body=json.dumps(dict(data=dict(job0=widget, job1=None))).encode(),
+    )
+    results = list(
+        Spider().parse_job_widget_batch_api(
+            response,
+            ("skoda-auto.jobs.cz", "abc", "123"),
+            [(url.format(id=1), Job(), "1"), (url.format(id=2), Job(), "2")],
+        )
+    )
+
+    assert len(results) == 2
+    assert isinstance(results[0], Job)
+    assert results[0]["posted_on"] == date(2024, 2, 6)
+    assert isinstance(results[1], Request)
+    assert json.loads(results[1].body)["operationName"] == "DETAIL_QUERY"
+    assert json.loads(results[1].body)["variables"]["jobAdId"] == "2"
+
+
+def test_spider_handle_widget_batch_error():
+    url = "https://skoda-auto.jobs.cz/detail-pozice?r=detail&id={id}&rps=233&impressionId=24d42f33-4e37-4a12-98a8-892a30257708"
+    spider = Spider()
+    widget_config = ("skoda-auto.jobs.cz", "abc", "123")
+    widget_jobs = [(url.format(id=1), Job(), "1"), (url.format(id=2), Job(), "2")]
+    request = spider.get_widget_request(widget_config, widget_jobs)
+    response = TextResponse(request.url, status=429, request=request)
+    results = list(
+        request.errback(create_failure(request, HttpError(response)))  # type: ignore
+    )
+
+    assert len(results) == 2
+    assert all(isinstance(result, Request) for result in results)
+    assert [json.loads(result.body)["operationName"] for result in results] == [
+        "DETAIL_QUERY",
+        "DETAIL_QUERY",
+    ]
+    assert [json.loads(result.body)["variables"]["jobAdId"] for result in results] == [
+        "1",
+        "2",
+    ]
+
+
+def test_get_batch_gql():
+    query = get_batch_gql(WIDGET_QUERY_PATH, 3)
+
+    assert query.startswith("query DETAIL_BATCH_QUERY(")
+    assert query.count("$widgetId: ID!") == 1
+    assert "$jobAdId2: ID!" in query
+    assert "job2: widget(" in query
+    assert "jobAd(id: $jobAdId2, rps: $rps2)" in query
+    assert "job3: widget(" not in query
+
+
 def test_spider_parse_job_widget_api():
     response = TextResponse(
         "https://api.capybara.lmc.cz/api/graphql/widget",
@@ -423,3 +842,31 @@ def test_get_params():
         rps="228",
         impressionId="a653a2a6-05c9-49fb-b391-96b185355f2d",
     )
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://example.com/prace/", "https://example.com/prace/?page=3"),
+        ("https://example.com/prace/?page=2", "https://example.com/prace/?page=3"),
+        (
+            "https://example.com/prace/?profession%5B0%5D=42&page=2",
+            "https://example.com/prace/?profession%5B0%5D=42&page=3",
+        ),
+    ],
+)
+def test_set_page(url: str, expected: str):
+    assert set_page(url, 3) == expected
+
+
+@pytest.mark.parametrize(
+    "html, page_size, expected",
+    [
+        ('{"resultsCount":689,"pageNumber":1}', 30, 23),
+        ('{"resultsCount":60,"pageNumber":1}', 30, 2),
+        ('{"resultsCount":60,"pageNumber":1}', 0, None),
+        ('{"pageNumber":1}', 30, None),
+    ],
+)
+def test_get_page_count(html: str, page_size: int, expected: int | None):
+    assert get_page_count(html, page_size) == expected
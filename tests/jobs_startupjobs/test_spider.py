@@ -1,15 +1,38 @@
+import asyncio
 from datetime import date
 from pathlib import Path
 
 import pytest
+from scrapy import Request
 from scrapy.http import TextResponse
-
-from jg.plucker.jobs_startupjobs.spider import Spider, drop_remote
+from scrapy.utils.test import get_crawler
+
+from jg.plucker.jobs_startupjobs.spider import (
+    EXPORT_URL,
+    OFFER_FIELDS,
+    Spider,
+    drop_remote,
+    get_offer_ids,
+    parse_offer_id,
+    parse_offers,
+)
 
 
 FIXTURES_DIR = Path(__file__).parent
 
 
+def create_spider(tmp_path: Path) -> Spider:
+    crawler = get_crawler(
+        Spider,
+        settings_dict={"FEED_CACHE_ENABLED": True, "FEED_CACHE_DIR": str(tmp_path)},
+    )
+    return Spider.from_crawler(crawler)
+
+
+async def collect_start(spider: Spider) -> list:
+    return [obj async for obj in spider.start()]
+
+
 def test_spider_parse():
     response = TextResponse(
         "https://example.com/example/",
@@ -57,6 +80,43 @@ def test_spider_parse():
     )
 
 
+def test_spider_parse_stores_feed(tmp_path: Path):
+    spider = create_spider(tmp_path)
+    response = TextResponse(
+        EXPORT_URL,
+        body=Path(FIXTURES_DIR / "feed.json").read_bytes(),
+        request=Request(EXPORT_URL),
+    )
+    jobs = list(spider.parse(response))
+    offers = spider.feed_cache.get(EXPORT_URL)  # type: ignore
+    spider.closed("finished")
+
+    assert len(offers) == len(jobs)
+    assert set(offers[0].keys()) <= set(OFFER_FIELDS)
+
+
+def test_spider_start_uses_cached_feed(tmp_path: Path):
+    spider = create_spider(tmp_path)
+    response = TextResponse(
+        EXPORT_URL,
+        body=Path(FIXTURES_DIR / "feed.json").read_bytes(),
+        request=Request(EXPORT_URL),
+    )
+    jobs = list(spider.parse(response))
+    cached_jobs = asyncio.run(collect_start(spider))
+    spider.closed("finished")
+
+    assert cached_jobs == jobs
+
+
+def test_spider_start_without_cached_feed(tmp_path: Path):
+    spider = create_spider(tmp_path)
+    requests = asyncio.run(collect_start(spider))
+    spider.closed("finished")
+
+    assert [request.url for request in requests] == [EXPORT_URL]
+
+
 def test_spider_parse_cities():
     response = TextResponse(
         "https://example.com/example/",
@@ -100,3 +160,32 @@ def test_spider_parse_remote():
 )
 def test_drop_remote(types: list[str], expected: list[str]):
     assert drop_remote(types) == expected
+
+
+def test_parse_offer_id():
+    url = "https://www.startupjobs.cz/nabidka/81775/junior-software-administrator"
+
+    assert parse_offer_id(url) == 81775
+
+
+def test_parse_offer_id_invalid():
+    with pytest.raises(ValueError):
+        parse_offer_id("https://www.startupjobs.cz/startup/example")
+
+
+def test_parse_offers():
+    response = TextResponse(
+        "https://example.com/feed.json",
+        body=b'{"offers": [{"url": "https://www.startupjobs.cz/nabidka/1/a", "id": 1}]}',
+    )
+
+    assert parse_offers(response) == [{"url": "https://www.startupjobs.cz/nabidka/1/a"}]
+
+
+def test_get_offer_ids():
+    offers = [
+        {"url": "https://www.startupjobs.cz/nabidka/1/a"},
+        {"url": "https://www.startupjobs.cz/nabidka/2/b"},
+    ]
+
+    assert get_offer_ids(offers) == {1, 2}
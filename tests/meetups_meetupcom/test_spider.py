@@ -0,0 +1,199 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+import pytest
+from scrapy import Request
+from scrapy.http import JsonRequest, TextResponse
+from scrapy.utils.test import get_crawler
+from twisted.python.failure import Failure
+
+from jg.plucker.items import Meetup
+from jg.plucker.meetupcom import GROUPS
+from jg.plucker.meetups_meetupcom.spider import (
+    GRAPHQL_URL,
+    Spider,
+    get_graphql_data,
+    parse_graphql_group,
+)
+
+
+SERIES_URLS = [
+    "https://www.meetup.com/pydata-prague/",
+    "https://www.meetup.com/praguejs/",
+]
+
+GROUP = {
+    "name": "PyData Prague",
+    "events": {
+        "edges": [
+            {
+                "node": {
+                    "title": "PyData Prague #42",
+                    "eventUrl": "https://www.meetup.com/pydata-prague/events/123/",
+                    "description": "Talks about data",
+                    "dateTime": "2026-11-05T18:00:00+01:00",
+                    "endTime": "2026-11-05T21:00:00+01:00",
+                    "status": "ACTIVE",
+                    "venue": {
+                        "name": "Impact Hub",
+                        "address": "Drtinova 10",
+                        "city": "Praha",
+                        "state": "",
+                        "country": "cz",
+                    },
+                }
+            },
+            {
+                "node": {
+                    "title": "PyData Prague #41",
+                    "eventUrl": "https://www.meetup.com/pydata-prague/events/122/",
+                    "description": "Cancelled",
+                    "dateTime": "2026-10-05T18:00:00+02:00",
+                    "endTime": "2026-10-05T21:00:00+02:00",
+                    "status": "CANCELLED",
+                    "venue": None,
+                }
+            },
+        ]
+    },
+}
+
+
+def create_spider(tmp_path: Path, **kwargs: Any) -> Spider:
+    crawler = get_crawler(
+        Spider,
+        settings_dict={"FEED_CACHE_ENABLED": True, "FEED_CACHE_DIR": str(tmp_path)},
+    )
+    return Spider.from_crawler(crawler, **kwargs)
+
+
+async def collect_start(spider: Spider) -> list:
+    return [obj async for obj in spider.start()]
+
+
+def create_graphql_response(series_urls: list[str], body: bytes) -> TextResponse:
+    request = JsonRequest(GRAPHQL_URL, data=get_graphql_data(series_urls))
+    return TextResponse(GRAPHQL_URL, body=body, request=request)
+
+
+def test_get_graphql_data():
+    data = get_graphql_data(SERIES_URLS)
+
+    assert data["variables"] == {"urlname0": "pydata-prague", "urlname1": "praguejs"}
+    assert "group0: groupByUrlname(urlname: $urlname0)" in data["query"]
+    assert "group1: groupByUrlname(urlname: $urlname1)" in data["query"]
+    assert "fragment GroupEvents on Group" in data["query"]
+
+
+def test_parse_graphql_group():
+    events = parse_graphql_group(GROUP)
+
+    assert events == [
+        {
+            "title": "PyData Prague #42",
+            "url": "https://www.meetup.com/pydata-prague/events/123/",
+            "description": "Talks about data",
+            "starts_at": datetime(2026, 11, 5, 18, tzinfo=timezone(timedelta(hours=1))),
+            "ends_at": datetime(2026, 11, 5, 21, tzinfo=timezone(timedelta(hours=1))),
+            "venue": {
+                "name": "Impact Hub",
+                "address": "Drtinova 10",
+                "city": "Praha",
+                "state": None,
+                "country": "cz",
+            },
+            "group_name": "PyData Prague",
+        }
+    ]
+
+
+def test_parse_graphql_group_unexpected():
+    with pytest.raises(KeyError):
+        parse_graphql_group({"name": "PyData Prague"})
+
+
+def test_spider_start_pages(tmp_path: Path):
+    requests = asyncio.run(collect_start(create_spider(tmp_path)))
+
+    assert len(requests) == len(GROUPS)
+    assert requests[0].url == "https://www.meetup.com/pydata-prague/events/"
+
+
+def test_spider_start_graphql(tmp_path: Path):
+    spider = create_spider(tmp_path, graphql_batch_size=10)
+    requests = asyncio.run(collect_start(spider))
+
+    assert [request.url for request in requests] == [GRAPHQL_URL, GRAPHQL_URL]
+    assert [len(request.cb_kwargs["series_urls"]) for request in requests] == [
+        10,
+        len(GROUPS) - 10,
+    ]
+
+
+def test_spider_start_uses_cached_events(tmp_path: Path):
+    spider = create_spider(tmp_path, graphql_batch_size=10)
+    spider.feed_cache.set(SERIES_URLS[0], parse_graphql_group(GROUP))  # type: ignore
+    results = asyncio.run(collect_start(spider))
+
+    assert [meetup["title"] for meetup in results[:1]] == ["PyData Prague #42"]
+    assert results[0]["source_url"] == "https://www.meetup.com/pydata-prague/events/"
+    assert SERIES_URLS[0] not in results[1].cb_kwargs["series_urls"]
+    assert sum(len(request.cb_kwargs["series_urls"]) for request in results[1:]) == (
+        len(GROUPS) - 1
+    )
+
+
+def test_spider_parse_graphql(tmp_path: Path):
+    spider = create_spider(tmp_path)
+    body = json.dumps({"data": {"group0": GROUP, "group1": None}}).encode()
+    results = list(
+        spider.parse_graphql(create_graphql_response(SERIES_URLS, body), SERIES_URLS)
+    )
+
+    assert len(results) == 2
+    assert isinstance(results[0], Meetup)
+    assert results[0]["location"] == "Impact Hub, Drtinova 10, Praha, CZ"
+    assert results[0]["series_url"] == "https://pydata.cz/"
+    assert isinstance(results[1], Request)
+    assert results[1].url == "https://www.meetup.com/praguejs/events/"
+
+
+def test_spider_parse_graphql_stores_events(tmp_path: Path):
+    spider = create_spider(tmp_path)
+    body = json.dumps({"data": {"group0": GROUP}}).encode()
+    list(
+        spider.parse_graphql(
+            create_graphql_response(SERIES_URLS[:1], body), SERIES_URLS[:1]
+        )
+    )
+
+    assert spider.feed_cache.get(SERIES_URLS[0]) == parse_graphql_group(GROUP)  # type: ignore
+
+
+def test_spider_parse_graphql_invalid(tmp_path: Path):
+    spider = create_spider(tmp_path)
+    body = b"<html>Something went wrong</html>"
+    results = list(
+        spider.parse_graphql(create_graphql_response(SERIES_URLS, body), SERIES_URLS)
+    )
+
+    assert [request.url for request in results] == [
+        "https://www.meetup.com/pydata-prague/events/",
+        "https://www.meetup.com/praguejs/events/",
+    ]
+
+
+def test_spider_handle_graphql_error(tmp_path: Path):
+    spider = create_spider(tmp_path)
+    request = spider.get_graphql_request(SERIES_URLS)
+    failure = Failure(ConnectionRefusedError())
+    failure.request = request  # type: ignore
+    results = list(spider.handle_graphql_error(failure))
+
+    assert [request.url for request in results] == [
+        "https://www.meetup.com/pydata-prague/events/",
+        "https://www.meetup.com/praguejs/events/",
+    ]
@@ -0,0 +1,337 @@
+from email.utils import formatdate
+from pathlib import Path
+from time import time
+
+import pytest
+from scrapy import Request, Spider
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.http import HtmlResponse, TextResponse
+from scrapy.settings import Settings
+from scrapy.utils.test import get_crawler
+
+from jg.plucker.cache import (
+    ConditionalPolicy,
+    DiskCacheStorage,
+    FeedCache,
+    KeyValueStoreCache,
+)
+
+
+class DummySpider(Spider):
+    name = "dummy"
+
+
+@pytest.fixture
+def spider(tmp_path: Path) -> Spider:
+    crawler = get_crawler(
+        DummySpider,
+        settings_dict={
+            "HTTPCACHE_DIR": str(tmp_path),
+            "HTTPCACHE_EXPIRATION_SECS": 60,
+            "HTTPCACHE_SIZE_LIMIT": 2**20,
+        },
+    )
+    return DummySpider.from_crawler(crawler)
+
+
+@pytest.fixture
+def storage(spider: Spider):
+    storage = DiskCacheStorage(spider.crawler.settings)
+    storage.open_spider(spider)
+    yield storage
+    storage.close_spider(spider)
+
+
+def test_disk_cache_storage_not_cached(storage: DiskCacheStorage, spider: Spider):
+    request = Request("https://example.com")
+
+    assert storage.retrieve_response(spider, request) is None
+
+
+def test_disk_cache_storage_cached(storage: DiskCacheStorage, spider: Spider):
+    request = Request("https://example.com")
+    response = HtmlResponse(
+        "https://example.com/",
+        status=203,
+        headers={"Content-Type": "text/html"},
+        body=b"<html>Hello</html>",
+    )
+    storage.store_response(spider, request, response)
+    cached_response = storage.retrieve_response(spider, request)
+
+    assert isinstance(cached_response, HtmlResponse)
+    assert cached_response.url == "https://example.com/"
+    assert cached_response.status == 203
+    assert cached_response.headers["Content-Type"] == b"text/html"
+    assert cached_response.body == b"<html>Hello</html>"
+
+
+def test_disk_cache_storage_persists(tmp_path: Path, spider: Spider):
+    request = Request("https://example.com")
+    response = TextResponse("https://example.com", body=b"Hello")
+
+    storage = DiskCacheStorage(spider.crawler.settings)
+    storage.open_spider(spider)
+    storage.store_response(spider, request, response)
+    storage.close_spider(spider)
+
+    storage = DiskCacheStorage(spider.crawler.settings)
+    storage.open_spider(spider)
+    cached_response = storage.retrieve_response(spider, request)
+    storage.close_spider(spider)
+
+    assert cached_response
+    assert cached_response.body == b"Hello"
+
+
+def test_disk_cache_storage_expired(
+    storage: DiskCacheStorage, spider: Spider, monkeypatch: pytest.MonkeyPatch
+):
+    request = Request("https://example.com")
+    response = TextResponse("https://example.com", body=b"Hello")
+    storage.store_response(spider, request, response)
+    monkeypatch.setattr("jg.plucker.cache.time", lambda: time() + 61)
+
+    assert storage.retrieve_response(spider, request) is None
+
+
+def test_disk_cache_storage_deduplicates_bodies(
+    storage: DiskCacheStorage, spider: Spider
+):
+    for url in ["https://example.com/1", "https://example.com/2"]:
+        storage.store_response(
+            spider, Request(url), TextResponse(url, body=b"Hello" * 1000)
+        )
+    assert storage.cache is not None
+
+    assert len(storage.cache) == 3  # 2× metadata, 1× body
+    assert spider.crawler.stats
+    assert spider.crawler.stats.get_value("httpcache/deduplicated") == 1
+
+
+def test_disk_cache_storage_compresses_bodies(
+    storage: DiskCacheStorage, spider: Spider
+):
+    request = Request("https://example.com")
+    response = TextResponse("https://example.com", body=b"Hello" * 1000)
+    storage.store_response(spider, request, response)
+    assert storage.cache is not None
+    body_key = next(key for key in storage.cache if key.startswith("body:"))
+
+    assert len(storage.cache[body_key]) < 100
+
+
+def test_disk_cache_storage_evicted_body(storage: DiskCacheStorage, spider: Spider):
+    request = Request("https://example.com")
+    response = TextResponse("https://example.com", body=b"Hello")
+    storage.store_response(spider, request, response)
+    assert storage.cache is not None
+    body_key = next(key for key in storage.cache if key.startswith("body:"))
+    del storage.cache[body_key]
+
+    assert storage.retrieve_response(spider, request) is None
+
+
+def test_feed_cache(tmp_path: Path):
+    cache = FeedCache(tmp_path, expiration_secs=60)
+    cache.set("https://example.com/feed.json", [{"id": 1}])
+
+    assert cache.get("https://example.com/feed.json") == [{"id": 1}]
+    assert cache.get("https://example.com/other.json") is None
+    cache.close()
+
+
+def test_feed_cache_shared_across_instances(tmp_path: Path):
+    cache = FeedCache(tmp_path, expiration_secs=60)
+    cache.set("https://example.com/feed.json", [{"id": 1}])
+    other_cache = FeedCache(tmp_path, expiration_secs=60)
+
+    assert other_cache.get("https://example.com/feed.json") == [{"id": 1}]
+    cache.close()
+    other_cache.close()
+
+
+def test_feed_cache_expired(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    cache = FeedCache(tmp_path, expiration_secs=60)
+    cache.set("https://example.com/feed.json", [{"id": 1}])
+    future = time() + 120
+    monkeypatch.setattr("diskcache.core.time.time", lambda: future)
+
+    assert cache.get("https://example.com/feed.json") is None
+    cache.close()
+
+
+def test_feed_cache_from_crawler(tmp_path: Path):
+    crawler = get_crawler(
+        DummySpider,
+        settings_dict={
+            "FEED_CACHE_ENABLED": True,
+            "FEED_CACHE_DIR": str(tmp_path),
+            "FEED_CACHE_EXPIRATION_SECS": 60,
+        },
+    )
+    cache = FeedCache.from_crawler(crawler)
+
+    assert cache is not None
+    assert cache.expiration_secs == 60
+    cache.close()
+
+
+def test_feed_cache_from_crawler_key_value_store(key_value_stores: dict):
+    crawler = get_crawler(
+        DummySpider,
+        settings_dict={
+            "FEED_CACHE_ENABLED": True,
+            "FEED_CACHE_EXPIRATION_SECS": 60,
+            "FEED_CACHE_KVS_NAME": "feed-cache",
+        },
+    )
+    cache = FeedCache.from_crawler(crawler)
+    assert cache is not None
+    cache.set("https://example.com/feed.json", [{"id": 1}])
+    cache.close()
+    other_cache = FeedCache.from_crawler(crawler)
+    assert other_cache is not None
+
+    assert isinstance(other_cache.cache, KeyValueStoreCache)
+    assert other_cache.get("https://example.com/feed.json") == [{"id": 1}]
+    assert list(key_value_stores) == ["feed-cache"]
+    other_cache.close()
+
+
+def test_feed_cache_requires_storage():
+    with pytest.raises(ValueError):
+        FeedCache()
+
+
+def test_key_value_store_cache(key_value_stores: dict):
+    cache = KeyValueStoreCache("cache")
+    cache.set("https://example.com/feed.json", {"offers": [1, 2, 3]})
+
+    assert cache.get("https://example.com/feed.json") == {"offers": [1, 2, 3]}
+    assert cache.get("https://example.com/other.json") is None
+    assert all(len(key) == 64 for key in key_value_stores["cache"].values)
+    cache.close()
+
+
+def test_key_value_store_cache_expired(
+    key_value_stores: dict, monkeypatch: pytest.MonkeyPatch
+):
+    cache = KeyValueStoreCache("cache")
+    cache.set("https://example.com/feed.json", [{"id": 1}], expire=60)
+    cache.set("https://example.com/other.json", [{"id": 2}])
+    future = time() + 120
+    monkeypatch.setattr("jg.plucker.cache.time", lambda: future)
+
+    assert cache.get("https://example.com/feed.json") is None
+    assert cache.get("https://example.com/other.json") == [{"id": 2}]
+    cache.close()
+
+
+def test_feed_cache_from_crawler_disabled():
+    crawler = get_crawler(DummySpider, settings_dict={"FEED_CACHE_ENABLED": False})
+
+    assert FeedCache.from_crawler(crawler) is None
+
+
+@pytest.fixture
+def policy() -> ConditionalPolicy:
+    return ConditionalPolicy(Settings({"HTTPCACHE_FRESHNESS_SECS": 60}))
+
+
+def test_conditional_policy_fresh(policy: ConditionalPolicy):
+    request = Request("https://example.com/calendar.ics")
+    response = TextResponse(
+        request.url,
+        headers={"Date": formatdate(time() - 30, usegmt=True), "ETag": '"123"'},
+    )
+
+    assert policy.is_cached_response_fresh(response, request) is True
+    assert "If-None-Match" not in request.headers
+
+
+def test_conditional_policy_stale(policy: ConditionalPolicy):
+    request = Request("https://example.com/calendar.ics")
+    response = TextResponse(
+        request.url,
+        headers={
+            "Date": formatdate(time() - 120, usegmt=True),
+            "ETag": '"123"',
+            "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+        },
+    )
+
+    assert policy.is_cached_response_fresh(response, request) is False
+    assert request.headers["If-None-Match"] == b'"123"'
+    assert request.headers["If-Modified-Since"] == b"Wed, 21 Oct 2015 07:28:00 GMT"
+
+
+def test_conditional_policy_stale_without_validators(policy: ConditionalPolicy):
+    request = Request("https://example.com/calendar.ics")
+    response = TextResponse(
+        request.url, headers={"Date": formatdate(time() - 120, usegmt=True)}
+    )
+
+    assert policy.is_cached_response_fresh(response, request) is False
+    assert "If-None-Match" not in request.headers
+    assert "If-Modified-Since" not in request.headers
+
+
+def test_conditional_policy_without_date(policy: ConditionalPolicy):
+    request = Request("https://example.com/calendar.ics")
+    response = TextResponse(request.url)
+
+    assert policy.is_cached_response_fresh(response, request) is False
+
+
+@pytest.mark.parametrize("status, expected", [(304, True), (200, False)])
+def test_conditional_policy_valid(
+    policy: ConditionalPolicy, status: int, expected: bool
+):
+    request = Request("https://example.com/calendar.ics")
+    cached_response = TextResponse(request.url)
+    response = TextResponse(request.url, status=status)
+
+    assert (
+        policy.is_cached_response_valid(cached_response, response, request) is expected
+    )
+
+
+def test_conditional_policy_revalidates_with_middleware(tmp_path: Path):
+    crawler = get_crawler(
+        DummySpider,
+        settings_dict={
+            "HTTPCACHE_ENABLED": True,
+            "HTTPCACHE_DIR": str(tmp_path),
+            "HTTPCACHE_STORAGE": "jg.plucker.cache.DiskCacheStorage",
+            "HTTPCACHE_POLICY": "jg.plucker.cache.ConditionalPolicy",
+            "HTTPCACHE_FRESHNESS_SECS": 60,
+            "HTTPCACHE_EXPIRATION_SECS": 3600,
+            "HTTPCACHE_SIZE_LIMIT": 2**20,
+        },
+    )
+    spider = DummySpider.from_crawler(crawler)
+    crawler.spider = spider
+    middleware = HttpCacheMiddleware.from_crawler(crawler)
+    middleware.spider_opened(spider)
+
+    request = Request("https://example.com/calendar.ics")
+    response = TextResponse(
+        request.url,
+        body=b"BEGIN:VCALENDAR",
+        headers={"Date": formatdate(time() - 120, usegmt=True), "ETag": '"123"'},
+    )
+    assert middleware.process_request(request) is None
+    middleware.process_response(request, response)
+
+    request = Request("https://example.com/calendar.ics")
+    assert middleware.process_request(request) is None
+    assert request.headers["If-None-Match"] == b'"123"'
+    result = middleware.process_response(request, TextResponse(request.url, status=304))
+    middleware.spider_closed(spider)
+
+    assert result.status == 200
+    assert result.body == b"BEGIN:VCALENDAR"
+    assert "cached" in result.flags
+    assert crawler.stats
+    assert crawler.stats.get_value("httpcache/revalidate") == 1
@@ -0,0 +1,36 @@
+from typing import Any
+
+import pytest
+from click.testing import CliRunner
+
+from jg.plucker import scrapers
+from jg.plucker.cli import main
+
+
+@pytest.fixture
+def crawled(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    spider_names = []
+
+    def run_as_spiders(spider_classes: list[Any], max_parallel: int) -> None:
+        spider_names.extend(spider_class.name for spider_class in spider_classes)
+
+    monkeypatch.setattr(scrapers, "run_as_spiders", run_as_spiders)
+    monkeypatch.setattr(scrapers, "start_reactor", lambda coroutine: None)
+    return spider_names
+
+
+def test_crawl_all_skips_spiders_requiring_input(crawled: list[str]):
+    result = CliRunner().invoke(main, ["crawl-all"])
+
+    assert result.exit_code == 0, result.output
+    assert "meetups-pyvo" in crawled
+    assert "jobs-jobscz" in crawled
+    assert "job-checks" not in crawled
+    assert "job-logos" not in crawled
+
+
+def test_crawl_all_explicit_spiders(crawled: list[str]):
+    result = CliRunner().invoke(main, ["crawl-all", "job-checks", "meetups-pyvo"])
+
+    assert result.exit_code == 0, result.output
+    assert crawled == ["job-checks", "meetups-pyvo"]
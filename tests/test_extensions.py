@@ -0,0 +1,82 @@
+from typing import Generator
+
+import pytest
+from scrapy import Request, Spider
+from scrapy.http import TextResponse
+from scrapy.utils.test import get_crawler
+
+from jg.plucker.extensions import (
+    CallbackTimingMiddleware,
+    PerformanceReport,
+    get_callback_name,
+    get_latency_bucket,
+)
+
+
+class DummySpider(Spider):
+    name = "dummy"
+
+    def parse_listing(self, response: TextResponse) -> Generator[Request, None, None]:
+        yield Request("https://example.com/1")
+        yield Request("https://example.com/2")
+
+
+@pytest.fixture
+def report() -> PerformanceReport:
+    return PerformanceReport(get_crawler(DummySpider))
+
+
+def test_callback_timing_middleware(report: PerformanceReport):
+    spider = DummySpider()
+    request = Request("https://example.com", callback=spider.parse_listing)
+    response = TextResponse("https://example.com", body=b"", request=request)
+    middleware = CallbackTimingMiddleware(report)
+    result = spider.parse_listing(response)
+
+    assert len(list(middleware.process_spider_output(response, result))) == 2
+    assert report.callbacks["DummySpider.parse_listing"]["calls"] == 1
+    assert report.callbacks["DummySpider.parse_listing"]["requests"] == 2
+    assert report.callbacks["DummySpider.parse_listing"]["items"] == 0
+    assert report.callbacks["DummySpider.parse_listing"]["wall_s"] > 0
+
+
+def test_performance_report_response_received(report: PerformanceReport):
+    request = Request("https://example.com/1", meta={"download_latency": 0.3})
+    response = TextResponse(request.url, body=b"12345", request=request)
+    report.response_received(response, request)
+
+    assert report.domains["example.com"]["responses"] == 1
+    assert report.domains["example.com"]["bytes"] == 5
+    assert report.domains["example.com"]["latency_histogram"]["<=0.5s"] == 1
+
+
+def test_performance_report_response_received_cached(report: PerformanceReport):
+    request = Request("https://example.com/1")
+    response = TextResponse(
+        request.url, body=b"12345", request=request, flags=["cached"]
+    )
+    report.response_received(response, request)
+
+    assert report.domains["example.com"]["cached_responses"] == 1
+    assert sum(report.domains["example.com"]["latency_histogram"].values()) == 0
+
+
+def test_get_callback_name_default():
+    response = TextResponse(
+        "https://example.com", body=b"", request=Request("https://example.com")
+    )
+
+    assert get_callback_name(response) == "Spider.parse"
+
+
+@pytest.mark.parametrize(
+    "latency, expected",
+    [
+        (0.05, "<=0.1s"),
+        (0.1, "<=0.1s"),
+        (3, "<=5s"),
+        (60, ">10s"),
+    ],
+)
+def test_get_latency_bucket(latency: float, expected: str):
+    assert get_latency_bucket(latency) == expected
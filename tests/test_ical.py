@@ -0,0 +1,181 @@
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from scrapy.http import TextResponse
+
+from jg.plucker.ical import CalendarSpider, is_before, iter_event_blocks, parse_events
+
+
+CALENDAR = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:test\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART:20240101T180000Z\r\n"
+    "SUMMARY:Past\r\n"
+    "UID:past@example.com\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART;VALUE=DATE:20260414\r\n"
+    "SUMMARY:Yesterday\r\n"
+    "UID:yesterday@example.com\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "SUMMARY:Upcoming\r\n"
+    "DTSTART;TZID=Europe/Prague:20260501T180000\r\n"
+    "UID:upcoming@example.com\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+def test_iter_event_blocks():
+    blocks = list(iter_event_blocks(CALENDAR))
+
+    assert len(blocks) == 3
+    assert all(block.startswith("BEGIN:VEVENT\r\n") for block in blocks)
+    assert all(block.endswith("END:VEVENT\r\n") for block in blocks)
+    assert "SUMMARY:Yesterday" in blocks[1]
+
+
+def test_iter_event_blocks_unterminated():
+    with pytest.raises(ValueError):
+        list(iter_event_blocks("BEGIN:VCALENDAR\nBEGIN:VEVENT\nSUMMARY:Oops\n"))
+
+
+@pytest.mark.parametrize(
+    "block, expected",
+    [
+        ("BEGIN:VEVENT\r\nDTSTART:20240101T180000Z\r\nEND:VEVENT\r\n", True),
+        ("BEGIN:VEVENT\r\nDTSTART:20260415T180000Z\r\nEND:VEVENT\r\n", False),
+        ("BEGIN:VEVENT\r\nDTSTART;VALUE=DATE:20260414\r\nEND:VEVENT\r\n", True),
+        ("BEGIN:VEVENT\r\nDTSTART;TZID=Europe/Prague:20260501T18\r\nEND:VEVENT", False),
+        ("BEGIN:VEVENT\r\nSUMMARY:No start\r\nEND:VEVENT\r\n", False),
+        ("BEGIN:VEVENT\r\nDESCRIPTION:DTSTART:20240101\r\nEND:VEVENT\r\n", False),
+    ],
+)
+def test_is_before(block: str, expected: bool):
+    assert is_before(block, date(2026, 4, 15)) is expected
+
+
+def test_parse_events():
+    events = parse_events(CALENDAR)
+
+    assert sorted(event.summary for event in events) == [
+        "Past",
+        "Upcoming",
+        "Yesterday",
+    ]
+
+
+def test_parse_events_since():
+    events = parse_events(CALENDAR, since=date(2026, 4, 15))
+
+    # one day of margin for time zones, exact filtering is up to the spiders
+    assert sorted(event.summary for event in events) == ["Upcoming", "Yesterday"]
+
+
+def test_parse_events_no_events():
+    text = "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:test\r\nEND:VCALENDAR\r\n"
+
+    assert parse_events(text) == []
+
+
+def test_parse_events_same_as_calendar():
+    text = (Path(__file__).parent / "meetups_pyvo" / "pyvo.ics").read_text()
+    since = date(2025, 1, 1)
+    events = parse_events(text, since=since)
+
+    assert 0 < len(events) < 641
+    assert all(event.begin.date() >= date(2024, 12, 31) for event in events)
+
+
+FEED = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:test\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART:20260101T180000Z\r\n"
+    "SUMMARY:Past\r\n"
+    "LOCATION:Praha\r\n"
+    "UID:past@example.com\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART:20260501T180000Z\r\n"
+    "SUMMARY:Online\r\n"
+    "LOCATION:https://example.com/stream\r\n"
+    "UID:online@example.com\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART:20260502T180000Z\r\n"
+    "SUMMARY:Tentative\r\n"
+    "LOCATION:Brno\r\n"
+    "CATEGORIES:tentative-date\r\n"
+    "UID:tentative@example.com\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTART:20260503T180000Z\r\n"
+    "DTEND:20260503T190000Z\r\n"
+    "SUMMARY:Upcoming\r\n"
+    "LOCATION:Ostrava\r\n"
+    "UID:upcoming@example.com\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+class ExampleSpider(CalendarSpider):
+    name = "example"
+
+    start_urls = ["https://example.com/calendar.ics"]
+
+    series_name = "Example"
+
+    series_org = "komunita kolem příkladů"
+
+    series_url = "https://example.com/"
+
+    default_event_url = "https://example.com/events/"
+
+    require_location = True
+
+    skip_categories = frozenset(["tentative-date"])
+
+    min_duration = timedelta(hours=3)
+
+
+@pytest.fixture
+def feed_response() -> TextResponse:
+    return TextResponse(
+        "https://example.com/calendar.ics", body=FEED.encode(), encoding="utf-8"
+    )
+
+
+def test_calendar_spider_filters(feed_response: TextResponse):
+    meetups = list(ExampleSpider().parse(feed_response, today=date(2026, 4, 15)))
+
+    assert [meetup["title"] for meetup in meetups] == ["Upcoming"]
+
+
+def test_calendar_spider_filters_default():
+    spider = CalendarSpider(name="example")
+
+    assert [reason for reason, _ in spider.filters] == ["Past event"]
+
+
+def test_calendar_spider_meetup(feed_response: TextResponse):
+    meetup = next(ExampleSpider().parse(feed_response, today=date(2026, 4, 15)))
+
+    assert dict(meetup) == {
+        "title": "Upcoming",
+        "url": "https://example.com/events/",
+        "description": None,
+        "starts_at": datetime(2026, 5, 3, 18, 0, tzinfo=timezone.utc),
+        "ends_at": datetime(2026, 5, 3, 21, 0, tzinfo=timezone.utc),
+        "location": "Ostrava",
+        "source_url": "https://example.com/calendar.ics",
+        "series_name": "Example",
+        "series_org": "komunita kolem příkladů",
+        "series_url": "https://example.com/",
+    }
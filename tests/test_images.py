@@ -0,0 +1,61 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from jg.plucker.images import normalize_image
+
+
+def create_image(format: str, size: tuple[int, int], mode: str = "RGBA", **kwargs):
+    buffer = BytesIO()
+    Image.new(mode, size, "red").save(buffer, format=format, **kwargs)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("format", ["webp", "png"])
+def test_normalize_image_format(format: str):
+    body = create_image("BMP", (32, 32), mode="RGB")
+    image, width, height = normalize_image(body, 64, format)
+
+    with Image.open(BytesIO(image)) as img:
+        assert img.format == format.upper()
+    assert (width, height) == (32, 32)
+
+
+def test_normalize_image_downsizes():
+    body = create_image("PNG", (1000, 500))
+    image, width, height = normalize_image(body, 200)
+
+    with Image.open(BytesIO(image)) as img:
+        assert img.size == (200, 100)
+    assert (width, height) == (200, 100)
+
+
+def test_normalize_image_doesnt_upsize():
+    body = create_image("PNG", (16, 16))
+    _, width, height = normalize_image(body, 200)
+
+    assert (width, height) == (16, 16)
+
+
+def test_normalize_image_picks_largest_ico_frame():
+    body = create_image("ICO", (64, 64), sizes=[(16, 16), (32, 32), (64, 64)])
+    _, width, height = normalize_image(body, 256)
+
+    assert (width, height) == (64, 64)
+
+
+def test_normalize_image_palette():
+    body = create_image("GIF", (20, 20), mode="P")
+    image, width, height = normalize_image(body, 256)
+
+    with Image.open(BytesIO(image)) as img:
+        assert img.mode in ("RGB", "RGBA")
+    assert (width, height) == (20, 20)
+
+
+def test_normalize_image_unsupported_format():
+    body = create_image("PNG", (20, 20))
+
+    with pytest.raises(ValueError, match="Unsupported format"):
+        normalize_image(body, 256, "bmp")
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from jg.plucker.json_stream import iter_json_array
+
+
+@pytest.mark.parametrize(
+    "data, key, expected",
+    [
+        (b"[]", None, []),
+        (b" [ ] ", None, []),
+        (b'[1, "two", {"three": [3]}, null]', None, [1, "two", {"three": [3]}, None]),
+        (b'\n[\n  {"a": 1},\n  {"a": 2}\n]\n', None, [{"a": 1}, {"a": 2}]),
+        (b'{"offers": [{"id": 1}, {"id": 2}]}', "offers", [{"id": 1}, {"id": 2}]),
+        (b'{"offers": []}', "offers", []),
+        (
+            b'{"meta": {"offers": [0]}, "count": 2, "data": [1, 2], "x": []}',
+            "data",
+            [1, 2],
+        ),
+        ('{"data": ["Čtvrtkon"]}'.encode(), "data", ["Čtvrtkon"]),
+        ('\ufeff["bom"]'.encode(), None, ["bom"]),
+        (
+            b'["a]b", "c\\"d", "e\\\\", {"f": "}"}]',
+            None,
+            ["a]b", 'c"d', "e\\", {"f": "}"}],
+        ),
+        (
+            b'{"a": "x\\"y", "data": [true, false, -1.5e3]}',
+            "data",
+            [True, False, -1500.0],
+        ),
+    ],
+)
+def test_iter_json_array(data: bytes, key: str | None, expected: list):
+    assert list(iter_json_array(data, key)) == expected
+
+
+def test_iter_json_array_matches_json_loads():
+    data = {
+        "offers": [
+            {"id": i, "title": f'Job "{i}" ☃', "tags": ["a", "b"], "x": None}
+            for i in range(100)
+        ]
+    }
+    body = json.dumps(data, indent=2, ensure_ascii=False).encode()
+
+    assert list(iter_json_array(body, "offers")) == data["offers"]
+
+
+def test_iter_json_array_is_lazy():
+    items = iter_json_array(b"[1, 2, oops]")
+
+    assert next(items) == 1
+    assert next(items) == 2
+    with pytest.raises(ValueError):
+        next(items)
+
+
+def test_iter_json_array_missing_key():
+    with pytest.raises(KeyError):
+        list(iter_json_array(b'{"data": []}', "offers"))
+
+
+@pytest.mark.parametrize(
+    "data, key",
+    [
+        (b'{"data": []}', None),
+        (b"[1, 2", None),
+        (b"[1 2]", None),
+        (b'{"data": 1}', "data"),
+        (b"[]", "data"),
+        (b'["unterminated]', None),
+        (b'[{"a": [1, 2}', None),
+    ],
+)
+def test_iter_json_array_invalid(data: bytes, key: str | None):
+    with pytest.raises(ValueError):
+        list(iter_json_array(data, key))
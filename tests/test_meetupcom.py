@@ -0,0 +1,48 @@
+import pytest
+
+from jg.plucker.meetupcom import GROUP_SLUGS, find_group_slug, get_group_slug
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://www.meetup.com/pydata-prague/", "pydata-prague"),
+        ("https://www.meetup.com/protest_cz/", "protest_cz"),
+        ("https://www.meetup.com/PyData-Prague/events/", "pydata-prague"),
+        ("https://www.meetup.com/cs-CZ/pydata-prague/", "pydata-prague"),
+    ],
+)
+def test_get_group_slug(url: str, expected: str):
+    assert get_group_slug(url) == expected
+
+
+def test_get_group_slug_invalid():
+    with pytest.raises(ValueError):
+        get_group_slug("https://www.jug.cz/")
+
+
+def test_group_slugs():
+    assert "brno-java-meetup" in GROUP_SLUGS
+    assert all(slug == slug.lower() for slug in GROUP_SLUGS)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        (
+            'Registrace: <a href="https://www.meetup.com/brno-java-meetup/events/123/">meetup</a>',
+            "brno-java-meetup",
+        ),
+        ("https://www.meetup.com/cs-CZ/Brno-Java-Meetup/events/", "brno-java-meetup"),
+        (
+            "https://www.meetup.com/other-group/ a https://meetup.com/praguejs",
+            "praguejs",
+        ),
+        ("https://www.meetup.com/brno-java-meetup-fans/", None),
+        ("https://www.meetup.com/other-group/", None),
+        ("Přednáška o Javě", None),
+        ("", None),
+    ],
+)
+def test_find_group_slug(text: str, expected: str | None):
+    assert find_group_slug(text) == expected
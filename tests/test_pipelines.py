@@ -1,7 +1,17 @@
+import asyncio
+import hashlib
+from io import BytesIO
+
 import pytest
+from PIL import Image as PILImage
 from scrapy import Field, Item
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.test import get_crawler
 
+from jg.plucker.items import JobLogo
 from jg.plucker.pipelines import (
+    ImagePipeline,
+    LogoNormalizationPipeline,
     MissingRequiredFields,
     RequiredFieldsFilterPipeline,
 )
@@ -14,6 +24,41 @@ class Something(Item):
     prop4 = Field(required=True)
 
 
+class Logo(Item):
+    name = Field()
+    image = Field(apify_format="image")
+    original_image = Field(apify_format="image")
+
+
+class KeyValueStore:
+    def __init__(self, keys: set[str] | None = None):
+        self.keys = set(keys or [])
+        self.uploads = []
+        self.concurrency = self.max_concurrency = 0
+
+    async def record_exists(self, key: str) -> bool:
+        return key in self.keys
+
+    async def set_value(self, key: str, value: bytes) -> None:
+        self.concurrency += 1
+        self.max_concurrency = max(self.concurrency, self.max_concurrency)
+        await asyncio.sleep(0.01)
+        self.concurrency -= 1
+        self.uploads.append(key)
+        self.keys.add(key)
+
+    async def get_public_url(self, key: str) -> str:
+        return f"https://example.com/{key}"
+
+
+@pytest.fixture
+def image_pipeline() -> ImagePipeline:
+    crawler = get_crawler(settings_dict={"IMAGE_PIPELINE_CONCURRENCY": 2})
+    pipeline = ImagePipeline.from_crawler(crawler)
+    pipeline._kvs = KeyValueStore()
+    return pipeline
+
+
 def test_required_fields_filter_pipeline():
     item = Something(prop1="foo", prop2="moo", prop4="boo")
     RequiredFieldsFilterPipeline().process_item(item)
@@ -24,3 +69,108 @@ def test_required_fields_filter_pipeline_drops():
 
     with pytest.raises(MissingRequiredFields, match="prop2, prop4"):
         RequiredFieldsFilterPipeline().process_item(item)
+
+
+def test_image_pipeline(image_pipeline: ImagePipeline):
+    item = Logo(name="foo", image=b"image", original_image="https://example.com/a")
+    item = asyncio.run(image_pipeline.process_item(item))
+    key = hashlib.sha256(b"image").hexdigest()
+
+    assert item["name"] == "foo"
+    assert item["image"] == f"https://example.com/{key}"
+    assert item["original_image"] == "https://example.com/a"
+
+
+def test_image_pipeline_deduplicates_uploads(image_pipeline: ImagePipeline):
+    async def process_items():
+        items = [Logo(image=b"image", original_image=b"image") for _ in range(3)]
+        await asyncio.gather(*map(image_pipeline.process_item, items))
+        await image_pipeline.process_item(Logo(image=b"image", original_image=""))
+
+    asyncio.run(process_items())
+
+    assert image_pipeline._kvs.uploads == [hashlib.sha256(b"image").hexdigest()]  # type: ignore
+
+
+def test_image_pipeline_skips_existing_images(image_pipeline: ImagePipeline):
+    key = hashlib.sha256(b"image").hexdigest()
+    image_pipeline._kvs = KeyValueStore(keys={key})
+    item = asyncio.run(
+        image_pipeline.process_item(Logo(image=b"image", original_image=""))
+    )
+
+    assert item["image"] == f"https://example.com/{key}"
+    assert image_pipeline._kvs.uploads == []
+
+
+def test_image_pipeline_limits_concurrency(image_pipeline: ImagePipeline):
+    async def process_items():
+        items = [Logo(image=f"image{i}".encode(), original_image="") for i in range(10)]
+        await asyncio.gather(*map(image_pipeline.process_item, items))
+
+    asyncio.run(process_items())
+
+    assert len(image_pipeline._kvs.uploads) == 10  # type: ignore
+    assert image_pipeline._kvs.max_concurrency == 2  # type: ignore
+
+
+class HashedLogo(Item):
+    image = Field(apify_format="image", hash_field="image_hash")
+    image_hash = Field()
+
+
+def test_image_pipeline_uses_hash_from_item(image_pipeline: ImagePipeline):
+    item = HashedLogo(image=b"image", image_hash="abc")
+    item = asyncio.run(image_pipeline.process_item(item))
+
+    assert item["image"] == "https://example.com/abc"
+    assert image_pipeline._kvs.uploads == ["abc"]  # type: ignore
+
+
+def test_logo_normalization_pipeline():
+    pipeline = LogoNormalizationPipeline(max_size=10, workers=1)
+    buffer = BytesIO()
+    PILImage.new("RGB", (40, 20), "red").save(buffer, format="BMP")
+    item = JobLogo(
+        image_url=buffer.getvalue(),
+        image_hash="abc",
+        original_image_url="https://example.com/favicon.bmp",
+        width=40,
+        height=20,
+        format="bmp",
+        source_url="https://example.com",
+    )
+    pipeline.open_spider()
+    try:
+        item = asyncio.run(pipeline.process_item(item))
+    finally:
+        pipeline.close_spider()
+
+    assert item["image_url"][:4] == b"RIFF"
+    assert item["image_hash"] == hashlib.sha256(item["image_url"]).hexdigest()
+    assert item["width"] == 10
+    assert item["height"] == 5
+    assert item["format"] == "webp"
+
+
+def test_logo_normalization_pipeline_keeps_broken_image():
+    pipeline = LogoNormalizationPipeline(max_size=10, workers=1)
+    item = JobLogo(
+        image_url=b"not an image",
+        original_image_url="https://example.com/favicon.ico",
+        format="ico",
+        source_url="https://example.com",
+    )
+    pipeline.open_spider()
+    try:
+        item = asyncio.run(pipeline.process_item(item))
+    finally:
+        pipeline.close_spider()
+
+    assert item["image_url"] == b"not an image"
+    assert item["format"] == "ico"
+
+
+def test_logo_normalization_pipeline_not_configured():
+    with pytest.raises(NotConfigured):
+        LogoNormalizationPipeline.from_crawler(get_crawler())
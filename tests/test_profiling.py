@@ -0,0 +1,67 @@
+from textwrap import dedent
+
+from jg.plucker.profiling import (
+    ImportTime,
+    format_import_times,
+    parse_import_times,
+    summarize_import_times,
+)
+
+
+STDERR = dedent(
+    """
+        import time: self [us] | cumulative | imported package
+        import time:       150 |        150 |   click.types
+        import time:       300 |        450 | click
+        [jg.plucker] INFO Generating schema for Job…
+        import time:        20 |         20 |     scrapy.http.cookies
+        import time:       200 |        220 |   scrapy.http
+        import time:      1000 |       1220 | scrapy
+    """
+).strip()
+
+
+def test_parse_import_times():
+    import_times, other_lines = parse_import_times(STDERR.splitlines())
+
+    assert import_times == [
+        ImportTime(name="click.types", self_us=150, cumulative_us=150, depth=1),
+        ImportTime(name="click", self_us=300, cumulative_us=450, depth=0),
+        ImportTime(name="scrapy.http.cookies", self_us=20, cumulative_us=20, depth=2),
+        ImportTime(name="scrapy.http", self_us=200, cumulative_us=220, depth=1),
+        ImportTime(name="scrapy", self_us=1000, cumulative_us=1220, depth=0),
+    ]
+    assert other_lines == ["[jg.plucker] INFO Generating schema for Job…"]
+
+
+def test_summarize_import_times():
+    import_times, _ = parse_import_times(STDERR.splitlines())
+    summary = summarize_import_times(import_times)
+
+    assert summary["total_us"] == 1670
+    assert summary["packages"] == {"scrapy": 1220, "click": 450}
+    assert [module["name"] for module in summary["modules"]] == [
+        "scrapy",
+        "click",
+        "scrapy.http",
+        "click.types",
+        "scrapy.http.cookies",
+    ]
+
+
+def test_format_import_times():
+    import_times, _ = parse_import_times(STDERR.splitlines())
+    text = format_import_times(summarize_import_times(import_times), limit=1)
+
+    assert (
+        text
+        == dedent(
+            """
+            Total import time: 2ms
+            Slowest packages (self time of all their modules):
+            ·      1.2ms scrapy
+            Slowest modules (cumulative time):
+            ·      1.2ms scrapy
+        """
+        ).strip()
+    )
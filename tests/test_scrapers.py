@@ -4,12 +4,17 @@ from pathlib import Path
 
 import pytest
 from scrapy import Field, Item, Spider
+from scrapy.settings import Settings
 
 from jg.plucker.scrapers import (
+    CrawlResult,
+    SpiderLoader,
     StatsError,
     evaluate_stats,
+    generate_manifest,
     generate_schema,
     get_spider_module_name,
+    load_manifest,
 )
 
 
@@ -180,6 +185,135 @@ def test_get_spider_module_path():
     )
 
 
+def test_manifest_is_updated():
+    manifest_path = Path("src/jg/plucker/manifest.json")
+
+    assert json.loads(manifest_path.read_text()) == generate_manifest("src/jg/plucker")
+
+
+def test_load_manifest():
+    specs = load_manifest("src/jg/plucker/manifest.json")
+
+    assert specs is not None
+    assert len(specs) == len(spider_packages)
+
+
+def test_load_manifest_missing(tmp_path: Path):
+    assert load_manifest(tmp_path / "manifest.json") is None
+
+
+def test_load_manifest_stale(tmp_path: Path):
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(
+        json.dumps(
+            [
+                {
+                    "name": "gravel-bikes",
+                    "module_name": "jg.plucker.gravel_bikes.spider",
+                    "actor_path": "src/jg/plucker/gravel_bikes",
+                    "item_name": "GravelBike",
+                    "dataset_schema_path": "src/jg/plucker/schemas/gravelBikeSchema.json",
+                }
+            ]
+        )
+    )
+
+    assert load_manifest(manifest_path) is None
+
+
+def test_load_manifest_with_spiders_path():
+    specs = load_manifest("src/jg/plucker/manifest.json", "./src/jg/plucker")
+
+    assert specs is not None
+    assert len(specs) == len(spider_packages)
+
+
+def test_load_manifest_stale_missing_actor(tmp_path: Path):
+    manifest = json.loads(Path("src/jg/plucker/manifest.json").read_text())
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(
+        json.dumps([spec for spec in manifest if spec["name"] != "meetups-pyvo"])
+    )
+
+    assert load_manifest(manifest_path) is not None
+    assert load_manifest(manifest_path, "./src/jg/plucker") is None
+
+
+def test_spider_loader_list_with_stale_manifest(tmp_path: Path):
+    manifest = json.loads(Path("src/jg/plucker/manifest.json").read_text())
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(
+        json.dumps([spec for spec in manifest if spec["name"] != "meetups-pyvo"])
+    )
+    spider_loader = SpiderLoader(
+        Settings(
+            {
+                "SPIDER_LOADER_SPIDERS_PATH": "./src/jg/plucker",
+                "SPIDER_LOADER_MANIFEST_PATH": manifest_path,
+            }
+        )
+    )
+
+    assert "meetups-pyvo" in spider_loader.list()
+
+
+def test_spider_loader_list():
+    spider_loader = SpiderLoader(
+        Settings(
+            {
+                "SPIDER_LOADER_SPIDERS_PATH": "./src/jg/plucker",
+                "SPIDER_LOADER_MANIFEST_PATH": "./src/jg/plucker/manifest.json",
+            }
+        )
+    )
+
+    assert spider_loader.list() == sorted(
+        spider_package.name.replace("_", "-") for spider_package in spider_packages
+    )
+
+
+def test_spider_loader_imports_lazily(monkeypatch: pytest.MonkeyPatch):
+    imported_module_names = []
+
+    def import_module_spy(module_name: str):
+        imported_module_names.append(module_name)
+        return import_module(module_name)
+
+    monkeypatch.setattr("jg.plucker.scrapers.import_module", import_module_spy)
+    spider_loader = SpiderLoader(
+        Settings({"SPIDER_LOADER_SPIDERS_PATH": "./src/jg/plucker"})
+    )
+
+    assert imported_module_names == []
+    assert spider_loader.load("exchange-rates").name == "exchange-rates"
+    assert spider_loader.load("exchange-rates").name == "exchange-rates"
+    assert imported_module_names == ["jg.plucker.exchange_rates.spider"]
+
+
+def test_spider_loader_list_without_manifest(tmp_path: Path):
+    spider_loader = SpiderLoader(
+        Settings(
+            {
+                "SPIDER_LOADER_SPIDERS_PATH": "./src/jg/plucker",
+                "SPIDER_LOADER_MANIFEST_PATH": tmp_path / "manifest.json",
+            }
+        )
+    )
+
+    assert spider_loader.list() == sorted(
+        spider_package.name.replace("_", "-") for spider_package in spider_packages
+    )
+
+
+def test_spider_loader_load_unknown():
+    spider_loader = SpiderLoader(
+        Settings({"SPIDER_LOADER_SPIDERS_PATH": "./src/jg/plucker"})
+    )
+
+    with pytest.raises(KeyError):
+        spider_loader.load("gravel-bikes")
+
+
 def test_generate_schema():
     class Bike(Item):
         name = Field()
@@ -204,3 +338,17 @@ def test_generate_schema():
             }
         },
     }
+
+
+def test_crawl_result_ok():
+    result = CrawlResult(spider_name="exchange-rates")
+
+    assert result.ok is True
+    assert str(result) == "exchange-rates: OK"
+
+
+def test_crawl_result_failed():
+    result = CrawlResult(spider_name="exchange-rates", error="Few items scraped: 0")
+
+    assert result.ok is False
+    assert str(result) == "exchange-rates: FAILED (Few items scraped: 0)"